@@ -5,18 +5,25 @@ Alembic 迁移环境配置
 import asyncio
 from logging.config import fileConfig
 
-from sqlalchemy import pool
+from sqlalchemy import pool, text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 
+from app.config import get_settings
 from app.db.base import Base
-from app.db.models import ProcessedMention, BotState  # noqa: F401
+from app.db import models  # noqa: F401
 
 config = context.config
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# ---- 连接串以应用配置为准，alembic.ini 中的只作本地兜底 ----
+config.set_main_option("sqlalchemy.url", get_settings().database_url.replace("%", "%%"))
+
+# ---- 多副本同时执行迁移时串行化 ----
+MIGRATION_LOCK_ID = 0x6D696772  # "migr"
 
 target_metadata = Base.metadata
 
@@ -36,6 +43,7 @@ def run_migrations_offline() -> None:
 def do_run_migrations(connection: Connection) -> None:
     context.configure(connection=connection, target_metadata=target_metadata)
     with context.begin_transaction():
+        connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
         context.run_migrations()
 
 
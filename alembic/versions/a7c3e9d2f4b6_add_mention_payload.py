@@ -0,0 +1,26 @@
+"""add processed_mentions.payload for restart recovery
+
+Revision ID: a7c3e9d2f4b6
+Revises: f2b8d6c1a9e3
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9d2f4b6'
+down_revision = 'f2b8d6c1a9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ---- 分区父表加列自动下发到各分区；可空列无默认值，不重写表 ----
+    op.add_column('processed_mentions', sa.Column('payload', JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('processed_mentions', 'payload')
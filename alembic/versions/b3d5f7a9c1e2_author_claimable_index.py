@@ -0,0 +1,30 @@
+"""index claimable processed_mentions by author for fair claiming
+
+Revision ID: b3d5f7a9c1e2
+Revises: e7f9a1c3d5b8
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d5f7a9c1e2'
+down_revision = 'e7f9a1c3d5b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ---- 公平认领先按作者取候选: 作者列表与每个作者最早的几条都只读这个部分索引 ----
+    op.create_index(
+        'ix_processed_mentions_author_claimable',
+        'processed_mentions',
+        ['author_id', 'created_at'],
+        postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_processed_mentions_author_claimable', table_name='processed_mentions')
@@ -0,0 +1,62 @@
+"""maintain updated_at on processed_mentions and revenge_relations for incremental export
+
+Revision ID: c4e6a8b0d2f1
+Revises: b3d5f7a9c1e2
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e6a8b0d2f1'
+down_revision = 'b3d5f7a9c1e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ---- 1. 先加可空列并按已有时间回填，再补默认值与非空约束 (回填早于触发器，不会被改写成迁移时刻) ----
+    op.add_column('processed_mentions', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE processed_mentions SET updated_at = coalesce(processed_at, created_at)")
+    op.alter_column('processed_mentions', 'updated_at', server_default=sa.func.now(), nullable=False)
+    op.create_index('ix_processed_mentions_updated_at', 'processed_mentions', ['updated_at'])
+
+    op.add_column('revenge_relations', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE revenge_relations SET updated_at = coalesce(last_attack_at, created_at, now())")
+    op.alter_column('revenge_relations', 'updated_at', server_default=sa.func.now(), nullable=False)
+    op.create_index('ix_revenge_relations_updated_at', 'revenge_relations', ['updated_at'])
+
+    # ---- 2. processed_mentions 的更新散在 ORM / Core / 原生 SQL 里，由触发器统一维护 ----
+    # 只比较导出的业务列: 租约 / payload / 归档清空 tweet_text 不推进 updated_at，避免重复导出与覆盖下游原文
+    op.execute("""
+        CREATE OR REPLACE FUNCTION processed_mentions_touch() RETURNS trigger AS $$
+        BEGIN
+            IF (NEW.status, NEW.trigger_type, NEW.target_handle, NEW.author_username, NEW.reply_to_tweet_id,
+                NEW.reply_tweet_id, NEW.reply_text, NEW.error_message, NEW.processed_at)
+               IS DISTINCT FROM
+               (OLD.status, OLD.trigger_type, OLD.target_handle, OLD.author_username, OLD.reply_to_tweet_id,
+                OLD.reply_tweet_id, OLD.reply_text, OLD.error_message, OLD.processed_at) THEN
+                NEW.updated_at := now();
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS trg_processed_mentions_touch ON processed_mentions")
+    op.execute("""
+        CREATE TRIGGER trg_processed_mentions_touch
+        BEFORE UPDATE ON processed_mentions
+        FOR EACH ROW EXECUTE FUNCTION processed_mentions_touch()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_processed_mentions_touch ON processed_mentions")
+    op.execute("DROP FUNCTION IF EXISTS processed_mentions_touch()")
+
+    op.drop_index('ix_revenge_relations_updated_at', table_name='revenge_relations')
+    op.drop_column('revenge_relations', 'updated_at')
+    op.drop_index('ix_processed_mentions_updated_at', table_name='processed_mentions')
+    op.drop_column('processed_mentions', 'updated_at')
@@ -0,0 +1,38 @@
+"""add processed_mentions lease columns for the worker queue
+
+Revision ID: c8d2e4f6a1b3
+Revises: a7c3e9d2f4b6
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d2e4f6a1b3'
+down_revision = 'a7c3e9d2f4b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ---- 可空列 / 常量默认值 (PG11+) 均不重写表，分区父表加列自动下发 ----
+    op.add_column('processed_mentions', sa.Column('claimed_by', sa.String(length=64), nullable=True))
+    op.add_column('processed_mentions', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('processed_mentions', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+
+    # ---- 分区父表上建索引会递归到各分区；未完成的行很少，建索引很快 ----
+    op.create_index(
+        'ix_processed_mentions_claimable',
+        'processed_mentions',
+        ['created_at'],
+        postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_processed_mentions_claimable', table_name='processed_mentions')
+    op.drop_column('processed_mentions', 'attempts')
+    op.drop_column('processed_mentions', 'lease_expires_at')
+    op.drop_column('processed_mentions', 'claimed_by')
@@ -0,0 +1,199 @@
+"""partition processed_mentions by created_at, add dedup keys and cold archive
+
+Revision ID: d41c7a9e5b13
+Revises: b7c8e724ce25
+Create Date: 2026-10-19
+
+"""
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41c7a9e5b13'
+down_revision = 'b7c8e724ce25'
+branch_labels = None
+depends_on = None
+
+# ---- 提前创建的未来月份数 ----
+MONTHS_AHEAD = 3
+
+_INDEXES = [
+    ('ix_processed_mentions_tweet_id', ['tweet_id']),
+    ('ix_processed_mentions_status', ['status']),
+    ('ix_processed_mentions_created_at', ['created_at']),
+    ('ix_processed_mentions_thread_target', ['reply_to_tweet_id', 'target_handle']),
+    ('ix_processed_mentions_thread_requester', ['reply_to_tweet_id', 'author_id']),
+]
+
+_COLUMNS = (
+    "id, tweet_id, author_id, author_username, tweet_text, reply_to_tweet_id, "
+    "trigger_type, target_handle, status, reply_tweet_id, reply_text, error_message, "
+    "created_at, processed_at"
+)
+
+
+# ---- DDL 在本迁移内联 (不引用 app.db.partitions)，保证该历史版本的行为固定不变 ----
+
+def _next_month(month_start: date) -> date:
+    if month_start.month == 12:
+        return date(month_start.year + 1, 1, 1)
+    return date(month_start.year, month_start.month + 1, 1)
+
+
+def _create_partitions(start: date, end: date) -> None:
+    """[start 所在月, end 所在月] 的月度分区 + DEFAULT 分区"""
+    month_start, last = date(start.year, start.month, 1), date(end.year, end.month, 1)
+    while month_start <= last:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS processed_mentions_p{month_start:%Y%m} PARTITION OF processed_mentions "
+            f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{_next_month(month_start).isoformat()}')"
+        )
+        month_start = _next_month(month_start)
+    op.execute("CREATE TABLE IF NOT EXISTS processed_mentions_default PARTITION OF processed_mentions DEFAULT")
+
+
+def _install_claim_trigger() -> None:
+    """INSERT 时先占用 processed_mention_keys，重复 tweet_id 触发唯一约束冲突"""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION processed_mentions_claim_key() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO processed_mention_keys (tweet_id, created_at)
+            VALUES (NEW.tweet_id, NEW.created_at);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS trg_processed_mentions_claim_key ON processed_mentions")
+    op.execute("""
+        CREATE TRIGGER trg_processed_mentions_claim_key
+        BEFORE INSERT ON processed_mentions
+        FOR EACH ROW EXECUTE FUNCTION processed_mentions_claim_key()
+    """)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # ---- 1. 旧表改名 ----
+    op.rename_table('processed_mentions', 'processed_mentions_legacy')
+
+    # ---- 2. 分区父表 (主键必须包含分区键) ----
+    op.execute("""
+        CREATE TABLE processed_mentions (
+            id UUID NOT NULL,
+            tweet_id VARCHAR(64) NOT NULL,
+            author_id VARCHAR(64) NOT NULL,
+            author_username VARCHAR(64) NOT NULL,
+            tweet_text TEXT NOT NULL,
+            reply_to_tweet_id VARCHAR(64),
+            trigger_type triggertype NOT NULL,
+            target_handle VARCHAR(64),
+            status processingstatus,
+            reply_tweet_id VARCHAR(64),
+            reply_text TEXT,
+            error_message TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            processed_at TIMESTAMP WITH TIME ZONE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    # ---- 3. 覆盖历史数据 + 未来几个月的分区 ----
+    oldest = conn.execute(sa.text(
+        "SELECT min(COALESCE(created_at, processed_at)) FROM processed_mentions_legacy"
+    )).scalar()
+    today = date.today()
+    start = oldest.date() if oldest else today
+    _create_partitions(start, today + timedelta(days=31 * MONTHS_AHEAD))
+
+    # ---- 4. 紧凑去重键表 + 冷归档表 ----
+    op.create_table(
+        'processed_mention_keys',
+        sa.Column('tweet_id', sa.String(64), primary_key=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_processed_mention_keys_created_at', 'processed_mention_keys', ['created_at'])
+
+    op.create_table(
+        'processed_mentions_archive',
+        sa.Column('tweet_id', sa.String(64), primary_key=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('payload', JSONB(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    # ---- 小行也尝试 TOAST 压缩 ----
+    op.execute("ALTER TABLE processed_mentions_archive SET (toast_tuple_target = 128)")
+
+    # ---- 5. 迁移数据 ----
+    op.execute(f"""
+        INSERT INTO processed_mentions ({_COLUMNS})
+        SELECT id, tweet_id, author_id, author_username, tweet_text, reply_to_tweet_id,
+               trigger_type, target_handle, status, reply_tweet_id, reply_text, error_message,
+               COALESCE(created_at, processed_at, now()), processed_at
+        FROM processed_mentions_legacy
+    """)
+    op.execute("""
+        INSERT INTO processed_mention_keys (tweet_id, created_at)
+        SELECT tweet_id, created_at FROM processed_mentions
+    """)
+
+    # ---- 6. 删除旧表，在父表上重建索引 (自动下发到各分区) ----
+    op.drop_table('processed_mentions_legacy')
+    for name, columns in _INDEXES:
+        op.create_index(name, 'processed_mentions', columns)
+
+    # ---- 7. 插入触发器占用去重键 ----
+    _install_claim_trigger()
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_processed_mentions_claim_key ON processed_mentions")
+    op.execute("DROP FUNCTION IF EXISTS processed_mentions_claim_key()")
+
+    op.rename_table('processed_mentions', 'processed_mentions_partitioned')
+    for name, _ in _INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_partitioned")
+
+    op.execute("""
+        CREATE TABLE processed_mentions (
+            id UUID PRIMARY KEY,
+            tweet_id VARCHAR(64) UNIQUE NOT NULL,
+            author_id VARCHAR(64) NOT NULL,
+            author_username VARCHAR(64) NOT NULL,
+            tweet_text TEXT NOT NULL,
+            reply_to_tweet_id VARCHAR(64),
+            trigger_type triggertype NOT NULL,
+            target_handle VARCHAR(64),
+            status processingstatus,
+            reply_tweet_id VARCHAR(64),
+            reply_text TEXT,
+            error_message TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            processed_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+
+    # ---- 归档过的文本回填 ----
+    op.execute(f"""
+        INSERT INTO processed_mentions ({_COLUMNS})
+        SELECT p.id, p.tweet_id, p.author_id, p.author_username,
+               COALESCE(a.payload->>'tweet_text', p.tweet_text), p.reply_to_tweet_id,
+               p.trigger_type, p.target_handle, p.status, p.reply_tweet_id,
+               COALESCE(a.payload->>'reply_text', p.reply_text),
+               COALESCE(a.payload->>'error_message', p.error_message),
+               p.created_at, p.processed_at
+        FROM processed_mentions_partitioned p
+        LEFT JOIN processed_mentions_archive a ON a.tweet_id = p.tweet_id
+    """)
+
+    op.drop_table('processed_mentions_partitioned')
+    op.drop_table('processed_mentions_archive')
+    op.drop_index('ix_processed_mention_keys_created_at', table_name='processed_mention_keys')
+    op.drop_table('processed_mention_keys')
+
+    for name, columns in _INDEXES:
+        op.create_index(name, 'processed_mentions', columns)
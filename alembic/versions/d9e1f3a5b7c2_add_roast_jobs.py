@@ -0,0 +1,55 @@
+"""add roast_jobs table for async /auth/roast
+
+Revision ID: d9e1f3a5b7c2
+Revises: c8d2e4f6a1b3
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e1f3a5b7c2'
+down_revision = 'c8d2e4f6a1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    roast_job_status = postgresql.ENUM(
+        'QUEUED', 'GENERATING', 'POSTING', 'SUCCEEDED', 'FAILED', name='roastjobstatus'
+    )
+    roast_job_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'roast_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('requester_id', sa.String(64), nullable=False),
+        sa.Column('requester_username', sa.String(64), nullable=False),
+        sa.Column('target_handle', sa.String(64), nullable=False),
+        sa.Column('status', postgresql.ENUM(name='roastjobstatus', create_type=False), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('not_before', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('roast_text', sa.Text(), nullable=True),
+        sa.Column('tweet_id', sa.String(64), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        'ix_roast_jobs_due',
+        'roast_jobs',
+        ['not_before'],
+        postgresql_where=sa.text("status IN ('QUEUED', 'GENERATING', 'POSTING')"),
+    )
+    op.create_index('ix_roast_jobs_requester', 'roast_jobs', ['requester_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_roast_jobs_requester', table_name='roast_jobs')
+    op.drop_index('ix_roast_jobs_due', table_name='roast_jobs')
+    op.drop_table('roast_jobs')
+    postgresql.ENUM(name='roastjobstatus').drop(op.get_bind(), checkfirst=True)
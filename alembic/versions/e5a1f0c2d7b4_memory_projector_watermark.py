@@ -0,0 +1,42 @@
+"""index processed_at for the memory projector and seed its high-water mark
+
+Revision ID: e5a1f0c2d7b4
+Revises: d41c7a9e5b13
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# ---- 与 app.db.projections.ROAST_MEMORY_HWM_KEY 一致；内联以固定该历史版本的行为 ----
+ROAST_MEMORY_HWM_KEY = "projector:roast_memory:hwm"
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a1f0c2d7b4'
+down_revision = 'd41c7a9e5b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ---- 在分区父表上建索引，自动下发到各分区 ----
+    op.create_index('ix_processed_mentions_processed_at', 'processed_mentions', ['processed_at'])
+
+    # ---- 旧代码已逐条更新过记忆表：水位从当前时刻开始，避免投影器重复累加历史记录 ----
+    op.get_bind().execute(
+        sa.text("""
+            INSERT INTO bot_state (id, key, value, updated_at)
+            VALUES (gen_random_uuid(), :key, CAST(now() AS text), now())
+            ON CONFLICT (key) DO NOTHING
+        """),
+        {"key": ROAST_MEMORY_HWM_KEY},
+    )
+
+
+def downgrade() -> None:
+    op.get_bind().execute(
+        sa.text("DELETE FROM bot_state WHERE key = :key"),
+        {"key": ROAST_MEMORY_HWM_KEY},
+    )
+    op.drop_index('ix_processed_mentions_processed_at', table_name='processed_mentions')
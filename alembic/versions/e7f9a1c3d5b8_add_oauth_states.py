@@ -0,0 +1,31 @@
+"""add oauth_states table for shared PKCE state
+
+Revision ID: e7f9a1c3d5b8
+Revises: d9e1f3a5b7c2
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f9a1c3d5b8'
+down_revision = 'd9e1f3a5b7c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'oauth_states',
+        sa.Column('state', sa.String(64), primary_key=True),
+        sa.Column('code_verifier', sa.String(128), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_oauth_states_expires_at', 'oauth_states', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_oauth_states_expires_at', table_name='oauth_states')
+    op.drop_table('oauth_states')
@@ -0,0 +1,44 @@
+"""add reply_outbox table
+
+Revision ID: f2b8d6c1a9e3
+Revises: e5a1f0c2d7b4
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d6c1a9e3'
+down_revision = 'e5a1f0c2d7b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    outbox_status = postgresql.ENUM('PENDING', 'SENT', 'FAILED', name='outboxstatus')
+    outbox_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'reply_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('mention_tweet_id', sa.String(64), nullable=False, unique=True),
+        sa.Column('reply_text', sa.Text(), nullable=False),
+        sa.Column('final_status', postgresql.ENUM(name='processingstatus', create_type=False), nullable=False),
+        sa.Column('status', postgresql.ENUM(name='outboxstatus', create_type=False), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('not_before', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('reply_tweet_id', sa.String(64), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_reply_outbox_due', 'reply_outbox', ['status', 'not_before'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reply_outbox_due', table_name='reply_outbox')
+    op.drop_table('reply_outbox')
+    postgresql.ENUM(name='outboxstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,103 @@
+"""
+[INPUT]: 依赖 fastapi, jwt, app.config, app.db.session, app.db.crud, app.utils.cache
+[OUTPUT]: 对外提供 Principal, decode_token, get_token, get_principal, get_profile_summary, issue_token
+[POS]: api 模块的认证依赖：从 Authorization: Bearer 或 ?token= 取 JWT，解码结果按 token 缓存 (不超过 exp)，
+       画像摘要走 crud 的缓存 (记忆表投影 / 登录回调 / 全量重建经 Postgres NOTIFY 广播失效，见 app.db.invalidation；
+       监听断开期间最多陈旧 REQUESTER_SUMMARY_CACHE_TTL 秒)，仪表盘轮询不再每次解码 + 查库
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+import jwt
+from fastapi import Depends, Header, HTTPException, Query
+
+from app.config import get_settings
+from app.db.session import get_async_session
+from app.db import crud
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+# ---- 已验证 token -> Principal；只缓存验证通过的 token ----
+_principal_cache = TTLCache(maxsize=settings.auth_principal_cache_size, ttl=settings.auth_principal_cache_ttl)
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: str
+    username: str
+    expires_at: float    # JWT exp (epoch 秒)
+
+
+def issue_token(user_id: str, username: str) -> str:
+    """签发 7 天有效的 HS256 JWT"""
+    return jwt.encode(
+        {
+            "user_id": user_id,
+            "username": username,
+            "exp": datetime.utcnow() + timedelta(days=7),
+        },
+        settings.jwt_secret,
+        algorithm="HS256",
+    )
+
+
+def decode_token(token: str) -> Optional[Principal]:
+    """验证 JWT；过期或无效返回 None"""
+    try:
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    if not payload.get("user_id"):
+        return None
+    return Principal(
+        user_id=payload["user_id"],
+        username=payload.get("username", ""),
+        expires_at=float(payload.get("exp", time.time() + settings.auth_principal_cache_ttl)),
+    )
+
+
+async def get_token(
+    authorization: Optional[str] = Header(None),
+    token: Optional[str] = Query(None),
+) -> str:
+    """Authorization: Bearer <token> 优先，兼容旧前端的 ?token="""
+    if authorization:
+        scheme, _, credentials = authorization.partition(" ")
+        if scheme.lower() == "bearer" and credentials:
+            return credentials.strip()
+    if token:
+        return token
+    raise HTTPException(status_code=401, detail="Missing token", headers={"WWW-Authenticate": "Bearer"})
+
+
+async def get_principal(token: str = Depends(get_token)) -> Principal:
+    """async 依赖在事件循环线程内执行 (sync def 会被放进线程池)，TTLCache 无锁访问是安全的"""
+    principal = _principal_cache.get(token)
+    if principal is not None and principal.expires_at > time.time():
+        return principal
+
+    principal = decode_token(token)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token", headers={"WWW-Authenticate": "Bearer"})
+
+    # ---- 缓存不超过 token 剩余有效期，过期 token 不会因缓存继续可用 ----
+    ttl = min(settings.auth_principal_cache_ttl, principal.expires_at - time.time())
+    if ttl > 0:
+        _principal_cache.set(token, principal, ttl=ttl)
+    return principal
+
+
+async def get_profile_summary(principal: Principal = Depends(get_principal)) -> dict:
+    """当前用户的画像摘要 (crud 层缓存)，不存在时 404；先查缓存，命中时不借连接 (借连接即一次 pre-ping 往返)"""
+    summary = crud.get_cached_requester_summary(principal.user_id)
+    if summary is None:
+        async with get_async_session("api") as session:
+            summary = await crud.get_requester_summary(session, principal.user_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return summary
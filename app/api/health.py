@@ -1,11 +1,28 @@
 """
-[INPUT]: 依赖 fastapi 的 APIRouter
-[OUTPUT]: 对外提供 /health 健康检查端点
+[INPUT]: 依赖 fastapi 的 APIRouter, app.db.session 的 get_async_session / get_pool_stats, app.db.crud, app.bot.admission, app.bot.projector, app.bot.outbox, app.bot.tasks, app.bot.worker, app.bot.pipeline, app.bot.roast_jobs, app.bot.roles, app.db.invalidation, app.config, app.services.upstream_api, app.services.roast_cache, app.services.retry, app.services.x_scheduler
+[OUTPUT]: 对外提供 /health 健康检查端点、/health/db 连接池状态端点、/health/bot 处理链路状态端点、/health/queue 按作者的队列深度端点
 [POS]: api 模块的健康检查路由
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+
+from app.db.session import get_async_session, get_pool_stats
+from app.db.crud import get_queue_depth_by_author
+from app.bot.admission import get_admission_controller
+from app.bot.projector import get_memory_projector
+from app.bot.outbox import get_reply_dispatcher
+from app.bot.tasks import get_task_registry
+from app.bot.worker import get_mention_worker
+from app.bot.pipeline import get_pipeline
+from app.bot.roast_jobs import get_roast_job_runner
+from app.bot.roles import get_ingest_elector, runs_api, runs_ingest, runs_worker
+from app.db.invalidation import get_requester_summary_listener
+from app.config import get_settings
+from app.services.upstream_api import upstream_limiter_stats
+from app.services.roast_cache import get_roast_cache
+from app.services.retry import retry_stats
+from app.services.x_scheduler import get_x_scheduler
 
 router = APIRouter()
 
@@ -16,3 +33,49 @@ async def health_check():
         "status": "healthy",
         "service": "skyeye-bot",
     }
+
+
+@router.get("/health/db")
+async def db_pool_stats():
+    """各负载连接池的占用、溢出与借出等待"""
+    return {"pools": get_pool_stats()}
+
+
+@router.get("/health/bot")
+async def bot_stats():
+    """Bot 处理链路的运行时统计 (只包含本进程角色实际运行的组件)"""
+    role = get_settings().app_role
+    stats: dict = {
+        "role": role,
+        "upstream": upstream_limiter_stats(),
+        "roast_cache": get_roast_cache().stats(),
+        "retry": retry_stats(),
+        "x_writes": get_x_scheduler().stats(),
+    }
+
+    if runs_api(role):
+        stats["summary_invalidation"] = get_requester_summary_listener().stats()
+
+    if runs_ingest(role):
+        stats["ingest_leader"] = get_ingest_elector().stats()
+        stats["admission"] = get_admission_controller().stats()
+
+    if runs_worker(role):
+        stats["tasks"] = get_task_registry().stats()
+        stats["worker"] = get_mention_worker().stats()
+        stats["memory_projector"] = get_memory_projector().stats()
+        stats["reply_outbox"] = get_reply_dispatcher().stats()
+        stats["roast_jobs"] = get_roast_job_runner().stats()
+
+    if runs_ingest(role) or runs_worker(role):
+        stats["pipeline"] = get_pipeline().stats()
+
+    return stats
+
+
+@router.get("/health/queue")
+async def queue_depth(limit: int = Query(20, ge=1, le=200)):
+    """mention 工作队列按作者的排队 / 在途数量 (全部 worker 合计)，用于发现刷屏账号"""
+    async with get_async_session("api") as session:
+        authors = await get_queue_depth_by_author(session, limit)
+    return {"authors": authors}
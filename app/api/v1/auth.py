@@ -1,32 +1,30 @@
 """
-[INPUT]: 依赖 fastapi, app.services.oauth_service, app.services.upstream_api, app.db.crud, app.config
-[OUTPUT]: 对外提供 OAuth 登录、回调、用户信息、喷人预览 API 端点
-[POS]: api/v1 模块的认证 + 用户操作 API
+[INPUT]: 依赖 fastapi, app.api.deps, app.services.oauth_service, app.services.oauth_state, app.db.crud, app.db.models, app.db.session, app.config
+[OUTPUT]: 对外提供 OAuth 登录、回调、用户信息、喷人任务提交 (202) 与进度查询 API 端点
+[POS]: api/v1 模块的认证 + 用户操作 API；受保护端点经 app.api.deps 取当前用户 (Authorization: Bearer 或 ?token=)
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
 import secrets
-import jwt
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Response, Cookie, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, Cookie, Query
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 
 from app.config import get_settings
+from app.api.deps import Principal, get_principal, get_profile_summary, issue_token
 from app.services.oauth_service import XOAuthService
-from app.services.upstream_api import UpstreamAPIClient
-from app.services.twitter import TwitterService
+from app.services.oauth_state import get_oauth_state_store
 from app.db.session import get_async_session
 from app.db import crud
+from app.db.models import RoastJob, RoastJobStatus
 from app.utils.logger import logger
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-# ---- 临时存储 PKCE state (生产环境应该用 Redis) ----
-_oauth_states: dict[str, dict] = {}
-
 oauth_service = XOAuthService()
 settings = get_settings()
 
@@ -63,17 +61,8 @@ async def oauth_login():
     state = secrets.token_urlsafe(32)
     code_verifier, code_challenge = oauth_service.generate_pkce()
 
-    # 存储 state -> code_verifier 映射
-    _oauth_states[state] = {
-        "code_verifier": code_verifier,
-        "created_at": datetime.utcnow(),
-    }
-
-    # 清理过期的 state (超过 10 分钟)
-    now = datetime.utcnow()
-    expired = [k for k, v in _oauth_states.items() if (now - v["created_at"]).seconds > 600]
-    for k in expired:
-        del _oauth_states[k]
+    # 存储 state -> code_verifier 映射 (过期与容量由存储后端处理)
+    await get_oauth_state_store().put(state, code_verifier)
 
     auth_url = oauth_service.get_authorization_url(state, code_challenge)
     return RedirectResponse(url=auth_url)
@@ -85,13 +74,12 @@ async def oauth_callback(
     state: str = Query(...),
 ):
     """OAuth 回调"""
-    # 验证 state
-    if state not in _oauth_states:
+    # 验证 state (一次性取出，过期或已使用均视为无效)
+    code_verifier = await get_oauth_state_store().pop(state)
+    if code_verifier is None:
         logger.error(f"Invalid OAuth state: {state}")
         return RedirectResponse(url=f"{settings.frontend_url}?error=invalid_state")
 
-    code_verifier = _oauth_states.pop(state)["code_verifier"]
-
     # 换取 token
     token_data = await oauth_service.exchange_code(code, code_verifier)
     if not token_data:
@@ -109,24 +97,18 @@ async def oauth_callback(
     username = user_info.get("username")
 
     # 更新数据库
-    async with get_async_session() as session:
+    async with get_async_session("api") as session:
         profile = await crud.get_or_create_requester_profile(session, user_id, username)
         profile.is_registered = True
         profile.oauth_access_token = access_token
         profile.oauth_refresh_token = refresh_token
         profile.last_login_at = datetime.utcnow()
+        await crud.publish_requester_summary_invalidation(session, [user_id])
         await session.commit()
+    crud.invalidate_requester_summaries([user_id])
 
     # 生成 JWT
-    jwt_token = jwt.encode(
-        {
-            "user_id": user_id,
-            "username": username,
-            "exp": datetime.utcnow() + timedelta(days=7),
-        },
-        settings.jwt_secret,
-        algorithm="HS256",
-    )
+    jwt_token = issue_token(user_id, username)
 
     # 重定向到前端，带上 token
     response = RedirectResponse(url=f"{settings.frontend_url}/dashboard?token={jwt_token}")
@@ -137,54 +119,21 @@ async def oauth_callback(
 #  Protected Endpoints
 # ============================================================
 
-def verify_token(token: str) -> Optional[dict]:
-    """验证 JWT token"""
-    try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
-        return payload
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
-
-
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(token: str = Query(...)):
-    """获取当前登录用户信息"""
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    user_id = payload.get("user_id")
-
-    async with get_async_session() as session:
-        profile = await crud.get_requester_profile_by_id(session, user_id)
-        if not profile:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        return UserResponse(
-            user_id=profile.user_id,
-            username=profile.username,
-            request_count=profile.request_count,
-            favorite_targets=profile.favorite_targets or [],
-        )
+async def get_current_user(summary: dict = Depends(get_profile_summary)):
+    """获取当前登录用户信息 (画像摘要带缓存，轮询不查库)"""
+    return UserResponse(**summary)
 
 
 @router.get("/me/roasts", response_model=RoastHistoryResponse)
 async def get_my_roasts(
-    token: str = Query(...),
+    principal: Principal = Depends(get_principal),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
 ):
     """获取我的喷人历史"""
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    user_id = payload.get("user_id")
-
-    async with get_async_session() as session:
-        roasts, total = await crud.get_roasts_by_requester(session, user_id, limit, offset)
+    async with get_async_session("api") as session:
+        roasts, total = await crud.get_roasts_by_requester(session, principal.user_id, limit, offset)
 
         return RoastHistoryResponse(
             total=total,
@@ -213,109 +162,71 @@ class RoastRequest(BaseModel):
     target_handle: str
 
 
-class RoastResponse(BaseModel):
-    success: bool
+class RoastJobResponse(BaseModel):
+    job_id: str
+    status: str
     target_handle: str
     roast_text: Optional[str] = None
     tweet_id: Optional[str] = None
     tweet_url: Optional[str] = None
-    error: Optional[str] = None
+    error: Optional[str] = None          # 失败原因；排队中时为延后原因 (如发推额度不足)
+    scheduled_at: Optional[str] = None   # 排队中的任务最早开始时间
+    created_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+
+def _job_response(job: RoastJob) -> RoastJobResponse:
+    pending = job.status == RoastJobStatus.QUEUED
+    return RoastJobResponse(
+        job_id=str(job.id),
+        status=job.status.value,
+        target_handle=job.target_handle,
+        roast_text=job.roast_text if job.status == RoastJobStatus.SUCCEEDED else None,
+        tweet_id=job.tweet_id,
+        tweet_url=f"https://x.com/NigaNPC/status/{job.tweet_id}" if job.tweet_id else None,
+        error=job.error,
+        scheduled_at=job.not_before.isoformat() if pending and job.not_before else None,
+        created_at=job.created_at.isoformat() if job.created_at else None,
+        finished_at=job.finished_at.isoformat() if job.finished_at else None,
+    )
 
 
-@router.post("/roast", response_model=RoastResponse)
+@router.post("/roast", response_model=RoastJobResponse, status_code=202)
 async def create_roast(
     request: RoastRequest,
-    token: str = Query(...),
+    principal: Principal = Depends(get_principal),
 ):
-    """发起喷人请求，Bot 会发推 @ 目标"""
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    user_id = payload.get("user_id")
-    username = payload.get("username")
+    """
+    提交喷人任务，立即返回 202 + job_id；生成与发推由 worker 角色异步执行 (app.bot.roast_jobs)
+    进度通过 GET /auth/roast/{job_id} 查询
+    """
+    user_id = principal.user_id
+    username = principal.username
     target = request.target_handle.strip().lstrip("@").lower()
 
     if not target:
-        return RoastResponse(
-            success=False,
-            target_handle=target,
-            error="目标不能为空",
-        )
+        raise HTTPException(status_code=400, detail="目标不能为空")
 
-    # 调用上游 API
-    api_client = UpstreamAPIClient()
-    try:
-        result = await api_client.x_roast(target)
-
-        if not result.get("success"):
-            error = result.get("error", "Unknown error")
-            if "not found" in error.lower() or "404" in error:
-                return RoastResponse(
-                    success=False,
-                    target_handle=target,
-                    error="用户不存在",
-                )
-            return RoastResponse(
-                success=False,
-                target_handle=target,
-                error=error,
-            )
-
-        roast = result.get("roast", "")
-        if not roast:
-            return RoastResponse(
-                success=False,
-                target_handle=target,
-                error="生成失败",
-            )
-
-        # 查询历史数据增强
-        async with get_async_session() as session:
-            profile = await crud.get_roast_profile(session, target)
-            roast_count = profile.roast_count if profile else 0
-
-            revenge_ctx = await crud.get_revenge_context(session, target, username)
-
-            # 本地增强
-            prefix = ""
-            if revenge_ctx and revenge_ctx.get("revenge_mode"):
-                attack_count = revenge_ctx.get("attack_count", 1)
-                prefix = f"[复仇模式] @{target} 曾喷过你{attack_count}次\n\n"
-            elif roast_count >= 5:
-                prefix = f"[老朋友警报] 第{roast_count + 1}次被喷\n\n"
-            elif roast_count >= 2:
-                prefix = f"[回头客] 第{roast_count + 1}次\n\n"
-
-            # 构建推文内容（我 @自己 要喷你 @受害者）
-            tweet_text = f"{prefix}我 @{username} 要喷你 @{target}：{roast}"
-
-            # 限制推文长度 (280 字符)
-            if len(tweet_text) > 280:
-                tweet_text = tweet_text[:277] + "..."
-
-            # 发推
-            twitter = TwitterService()
-            tweet_result = twitter.post_tweet(tweet_text)
-            tweet_id = tweet_result.get("tweet_id")
-
-            # 更新 memory 表
-            await crud.update_roast_profile_after_roast(session, target, user_id)
-            await crud.update_requester_after_roast(session, user_id, username, target)
-            await crud.record_revenge_relation(session, username, target)
-
-        return RoastResponse(
-            success=True,
-            target_handle=target,
-            roast_text=tweet_text,
-            tweet_id=tweet_id,
-            tweet_url=f"https://x.com/NigaNPC/status/{tweet_id}" if tweet_id else None,
+    async with get_async_session("api") as session:
+        job = await crud.create_roast_job(
+            session, user_id, username, target, max_active=settings.roast_job_max_active_per_user
         )
+    if job is None:
+        raise HTTPException(status_code=429, detail="进行中的任务过多，请稍后再试")
 
-    except Exception as e:
-        logger.error(f"Roast API error: {e}")
-        return RoastResponse(
-            success=False,
-            target_handle=target,
-            error=f"发送失败: {str(e)}",
-        )
+    logger.info(f"Roast job {job.id} queued: @{username} -> @{target}")
+    return _job_response(job)
+
+
+@router.get("/roast/{job_id}", response_model=RoastJobResponse)
+async def get_roast_job(
+    job_id: uuid.UUID,
+    principal: Principal = Depends(get_principal),
+):
+    """查询喷人任务进度 (queued / generating / posting / succeeded / failed)，只能查询自己的任务"""
+    async with get_async_session("api") as session:
+        job = await crud.get_roast_job(session, job_id)
+
+    if not job or job.requester_id != principal.user_id:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return _job_response(job)
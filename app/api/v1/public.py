@@ -1,7 +1,7 @@
 """
 [INPUT]: 依赖 app.db.session, app.db.models, app.db.crud
 [OUTPUT]: 对外提供排行榜、档案、统计 API 端点
-[POS]: api/v1 模块的公开 API，无需认证
+[POS]: api/v1 模块的公开 API，无需认证，走 read 负载 (配置副本时读副本)
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
@@ -60,7 +60,7 @@ async def get_leaderboard(
     offset: int = Query(0, ge=0),
 ):
     """获取被喷排行榜"""
-    async with get_async_session() as session:
+    async with get_async_session("read") as session:
         profiles, total = await crud.get_roast_leaderboard(session, limit, offset)
 
         return LeaderboardResponse(
@@ -81,7 +81,7 @@ async def get_leaderboard(
 @router.get("/profiles/{handle}", response_model=ProfileResponse)
 async def get_profile(handle: str):
     """获取单个用户的被喷档案"""
-    async with get_async_session() as session:
+    async with get_async_session("read") as session:
         profile = await crud.get_roast_profile(session, handle.lower())
 
         if not profile:
@@ -103,6 +103,6 @@ async def get_profile(handle: str):
 @router.get("/stats", response_model=StatsResponse)
 async def get_stats():
     """获取全局统计数据"""
-    async with get_async_session() as session:
+    async with get_async_session("read") as session:
         stats = await crud.get_global_stats(session)
         return StatsResponse(**stats)
@@ -1,5 +1,5 @@
 """
-[INPUT]: 依赖 app.config, app.services.twitter, app.services.upstream_api, app.db.session, app.db.crud
+[INPUT]: 依赖 app.config, app.services.twitter, app.services.upstream_api, app.services.x_scheduler, app.db.session, app.db.crud
 [OUTPUT]: 对外提供 run_active_roast 主循环
 [POS]: bot 模块的主动出击调度器，与 stream.py 并行运行，在 main.py lifespan 中启动
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
@@ -11,6 +11,7 @@ import random
 from app.config import get_settings
 from app.services.twitter import TwitterService
 from app.services.upstream_api import UpstreamAPIClient
+from app.services.x_scheduler import WritePriority, WriteDelayed
 from app.bot.response_builder import ResponseBuilder
 from app.db.session import get_async_session
 from app.db.crud import is_tweet_roasted, create_roast_record
@@ -126,9 +127,14 @@ async def run_active_roast():
 
             # ---- 发送回复 ----
             try:
-                reply_result = twitter.reply_to_tweet(tweet_id, reply_text)
+                reply_result = await twitter.reply_to_tweet(
+                    tweet_id, reply_text, priority=WritePriority.BACKGROUND, max_wait=settings.active_roast_max_wait
+                )
                 reply_tweet_id = reply_result.get("reply_tweet_id")
                 logger.info(f"Active Roast sent: reply_id={reply_tweet_id}")
+            except WriteDelayed as e:
+                logger.info(f"Active Roast skipped, write quota reserved for replies: {e}")
+                continue
             except Exception as e:
                 logger.error(f"Failed to send active roast reply: {e}")
                 continue
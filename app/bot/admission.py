@@ -0,0 +1,132 @@
+"""
+[INPUT]: 依赖 app.config, app.utils.cache 的 TTLCache
+[OUTPUT]: 对外提供 TokenBucket, AdmissionController, get_admission_controller, mark_pair_completed
+[POS]: bot 模块的准入控制，在解析后、意图分类前合并同 thread 同请求者的重复触发，并限制单个作者的突发量
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import time
+from functools import lru_cache
+from typing import Callable
+
+from app.config import get_settings
+from app.utils.cache import TTLCache
+
+_INFLIGHT = "inflight"
+_COMPLETED = "completed"
+
+
+class TokenBucket:
+    """令牌桶: 每秒补充 rate 个令牌，最多积攒 capacity 个"""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def try_acquire(self, now: float) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AdmissionController:
+    """
+    mention 准入控制 (进程内，运行在 ingest 进程)
+    - (reply_to_tweet_id, author_id) 正在入队或近期已完成 X_ROAST → 直接合并丢弃
+    - 每个作者一个令牌桶，超出突发上限 → 丢弃
+    in-flight 标记在入队结束时释放 (app.bot.ingest.admit_and_ingest)，入队之后由 crud.claim_thread_requester 的数据库占位把关；
+    完成标记只在 ingest 与 worker 同进程 (APP_ROLE=all) 时生效，是省一次分类的优化而非正确性保证
+    """
+
+    def __init__(
+        self,
+        pair_ttl: float = 600.0,
+        author_rate: float = 0.2,
+        author_burst: int = 5,
+        max_entries: int = 50_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self.author_rate = author_rate
+        self.author_burst = author_burst
+        self._pairs = TTLCache(maxsize=max_entries, ttl=pair_ttl, clock=clock)
+        # ---- 闲置超过补满时间的令牌桶与新桶等价，可以直接淘汰 ----
+        self._buckets = TTLCache(maxsize=max_entries, ttl=author_burst / author_rate, clock=clock)
+
+        self.admitted = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+
+    @staticmethod
+    def _pair_key(mention: dict):
+        reply_to_tweet_id = mention.get("reply_to_tweet_id")
+        if not reply_to_tweet_id:
+            return None
+        return (reply_to_tweet_id, mention["author_id"])
+
+    def admit(self, mention: dict) -> bool:
+        """判断 mention 是否进入处理流程"""
+        key = self._pair_key(mention)
+
+        if key and key in self._pairs:
+            self.coalesced += 1
+            return False
+
+        author_id = mention["author_id"]
+        now = self._clock()
+        bucket = self._buckets.get(author_id)
+        if bucket is None:
+            bucket = TokenBucket(self.author_rate, self.author_burst, now)
+        admitted = bucket.try_acquire(now)
+        self._buckets.set(author_id, bucket)
+
+        if not admitted:
+            self.rate_limited += 1
+            return False
+
+        if key:
+            self._pairs.set(key, _INFLIGHT)
+        self.admitted += 1
+        return True
+
+    def mark_completed(self, mention: dict):
+        """X_ROAST 已完成，TTL 内同 thread 同请求者不再进入分类"""
+        key = self._pair_key(mention)
+        if key:
+            self._pairs.set(key, _COMPLETED)
+
+    def release(self, mention: dict):
+        """处理结束：未标记完成的 in-flight 条目释放"""
+        key = self._pair_key(mention)
+        if key and self._pairs.get(key) == _INFLIGHT:
+            self._pairs.invalidate(key)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_pairs": len(self._pairs),
+            "tracked_authors": len(self._buckets),
+            "admitted": self.admitted,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+        }
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        pair_ttl=settings.admission_pair_ttl,
+        author_rate=settings.admission_author_rate,
+        author_burst=settings.admission_author_burst,
+    )
+
+
+def mark_pair_completed(mention: dict):
+    """worker 侧记录 X_ROAST 已完成；只有与 ingest 同进程时准入控制器才读得到，分进程部署时跳过"""
+    if get_settings().app_role == "all":
+        get_admission_controller().mark_completed(mention)
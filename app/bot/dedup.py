@@ -0,0 +1,124 @@
+"""
+[INPUT]: 依赖 app.config, app.db.session, app.db.crud
+[OUTPUT]: 对外提供 BloomFilter, MentionDedupFilter, DedupVerdict, get_mention_filter, warm_mention_filter
+[POS]: bot 模块的进程内幂等过滤器，挡在入队 INSERT 之前；数据库唯一约束仍是最终裁决
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import enum
+import hashlib
+import math
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.config import get_settings
+from app.db.session import get_async_session
+from app.db.crud import get_recent_mention_ids
+from app.utils.logger import logger
+
+
+class DedupVerdict(enum.Enum):
+    NEW = "new"              # Bloom 未命中：本进程从未见过，跳过查库，由唯一约束兜底
+    DUPLICATE = "duplicate"  # 最近集合命中：确定重复，直接丢弃
+    UNKNOWN = "unknown"      # Bloom 命中但不在最近集合：可能误判，需要查库
+
+
+# ============================================================
+#  Bloom Filter
+# ============================================================
+
+class BloomFilter:
+    """定长位图 Bloom Filter (blake2b 双重哈希)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def clear(self):
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+
+# ============================================================
+#  最近 ID 集合 + Bloom 组合过滤器
+# ============================================================
+
+class MentionDedupFilter:
+    """
+    进程内 mention 幂等过滤器
+    - recent: 最近 N 个 tweet_id 的 LRU 集合，命中即确定重复
+    - bloom: 覆盖预热窗口内全部 tweet_id，未命中即确定未见过
+    """
+
+    def __init__(self, recent_size: int = 10_000, bloom_capacity: int = 1_000_000, bloom_error_rate: float = 0.001):
+        self.recent_size = recent_size
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def add(self, tweet_id: str):
+        """记录已入库 (或确认已处理) 的 tweet_id"""
+        self._recent[tweet_id] = None
+        self._recent.move_to_end(tweet_id)
+        while len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
+
+        # ---- Bloom 超容量后误判率上升：重建并回填最近集合 ----
+        if self._bloom.count >= self._bloom.capacity:
+            self._bloom.clear()
+            for recent_id in self._recent:
+                self._bloom.add(recent_id)
+        else:
+            self._bloom.add(tweet_id)
+
+    def check(self, tweet_id: str) -> DedupVerdict:
+        if tweet_id in self._recent:
+            self._recent.move_to_end(tweet_id)
+            return DedupVerdict.DUPLICATE
+        if tweet_id not in self._bloom:
+            return DedupVerdict.NEW
+        return DedupVerdict.UNKNOWN
+
+
+@lru_cache
+def get_mention_filter() -> MentionDedupFilter:
+    settings = get_settings()
+    return MentionDedupFilter(
+        recent_size=settings.dedup_recent_size,
+        bloom_capacity=settings.dedup_bloom_capacity,
+        bloom_error_rate=settings.dedup_bloom_error_rate,
+    )
+
+
+async def warm_mention_filter():
+    """启动时用最近的 processed_mentions.tweet_id 预热过滤器"""
+    settings = get_settings()
+    mention_filter = get_mention_filter()
+
+    async with get_async_session() as session:
+        tweet_ids = await get_recent_mention_ids(session, limit=settings.dedup_warm_limit)
+
+    # ---- 由旧到新写入，保证最新的留在 LRU 尾部 ----
+    for tweet_id in reversed(tweet_ids):
+        mention_filter.add(tweet_id)
+
+    logger.info(f"Mention dedup filter warmed with {len(tweet_ids)} ids")
@@ -1,5 +1,5 @@
 """
-[INPUT]: 依赖 app.services.twitter, app.services.upstream_api, app.bot.response_builder
+[INPUT]: 依赖 app.services.twitter, app.services.upstream_api, app.services.limiter, app.bot.response_builder
 [OUTPUT]: 对外提供 FaceSearchHandler
 [POS]: handlers 模块的人脸搜索处理器，被 processor.py 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
@@ -9,6 +9,7 @@ import re
 
 from app.services.twitter import TwitterService
 from app.services.upstream_api import UpstreamAPIClient
+from app.services.limiter import LimiterRejected
 from app.bot.response_builder import ResponseBuilder
 from app.utils.logger import logger
 
@@ -70,6 +71,9 @@ class FaceSearchHandler:
                 "reply_text": ResponseBuilder.face_search_success(links),
             }
 
+        except LimiterRejected:
+            # ---- 上游限流拒绝: 交给调用方延后重试，而不是回复错误 ----
+            raise
         except Exception as e:
             logger.error(f"FaceSearchHandler error: {e}")
             return {"success": False, "reply_text": ResponseBuilder.error()}
@@ -0,0 +1,57 @@
+"""
+[INPUT]: 依赖 app.db.session, app.db.crud, app.bot.dedup, app.bot.admission
+[OUTPUT]: 对外提供 ingest_mention, admit_and_ingest 异步函数
+[POS]: bot 模块的 mention 入队：stream 解析后只写一条 PENDING 记录 (含 payload)，分类与生成交给 app.bot.worker；
+       准入的 in-flight 标记只覆盖到入队为止，之后由数据库里的 X_ROAST 占位 (C3 覆盖处理中的记录) 把关 (worker 可能在另一个进程)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+from app.db.session import get_async_session
+from app.db.crud import enqueue_mention, is_mention_processed
+from app.bot.dedup import DedupVerdict, get_mention_filter
+from app.bot.admission import AdmissionController
+from app.utils.logger import logger
+
+
+async def ingest_mention(mention: dict) -> bool:
+    """
+    幂等入队，按进程内过滤器的判定分流:
+    - DUPLICATE: 最近集合命中，直接跳过
+    - NEW: Bloom 未命中，直接插入，唯一约束兜底
+    - UNKNOWN: Bloom 命中 (大概率真重复)，先查去重键表，已存在则不再插入，
+      避免一次必然失败的 INSERT (触发器占键冲突 + 回滚 + 死元组)
+    返回 False 表示已处理过 / 已在队列中
+    """
+    tweet_id = mention["tweet_id"]
+    mention_filter = get_mention_filter()
+    verdict = mention_filter.check(tweet_id)
+
+    if verdict == DedupVerdict.DUPLICATE:
+        logger.debug(f"Mention {tweet_id} already queued (in-memory), skipping")
+        return False
+
+    async with get_async_session() as session:
+        if verdict == DedupVerdict.UNKNOWN and await is_mention_processed(session, tweet_id):
+            queued = False
+        else:
+            queued = await enqueue_mention(session, mention)
+
+    mention_filter.add(tweet_id)
+    if queued:
+        logger.info(f"Queued mention {tweet_id} from @{mention['author_username']}")
+    else:
+        logger.debug(f"Mention {tweet_id} already queued, skipping")
+    return queued
+
+
+async def admit_and_ingest(mention: dict, admission: AdmissionController) -> bool:
+    """
+    准入后入队；入队结束 (无论成败) 立即释放该 thread + 请求者的 in-flight 标记
+    worker 与 ingest 分属不同进程时，worker 无法释放 ingest 进程里的标记，不能等到处理结束
+    """
+    if not admission.admit(mention):
+        return False
+    try:
+        return await ingest_mention(mention)
+    finally:
+        admission.release(mention)
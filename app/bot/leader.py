@@ -0,0 +1,99 @@
+"""
+[INPUT]: 依赖 sqlalchemy, app.db.session
+[OUTPUT]: 对外提供 INGEST_LEADER_LOCK_ID, LeaderElector
+[POS]: bot 模块的 leader 选举：Postgres 会话级 advisory lock，保证多副本 / 多 worker 进程中只有一个持有 Filtered Stream 连接
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import get_engine
+from app.utils.logger import logger
+
+INGEST_LEADER_LOCK_ID = 0x73747265  # "stre"
+
+
+class LeaderElector:
+    """
+    持锁连接存活即为 leader:
+    - 备用进程每 retry_interval 秒 pg_try_advisory_lock 一次；leader 崩溃时 Postgres 随连接断开释放锁
+    - leader 每 check_interval 秒探测锁连接，探测失败先取消 leader 任务再让位，不会出现两个持锁者同时工作
+    - 正常退出显式 unlock，备用进程在下一次重试内接管
+    锁连接为 AUTOCOMMIT，不会长时间 idle in transaction；必须直连 Postgres (PgBouncer 事务池模式下会话锁无效)
+    """
+
+    def __init__(self, name: str, lock_id: int, retry_interval: float = 2.0, check_interval: float = 5.0):
+        self.name = name
+        self.lock_id = lock_id
+        self.retry_interval = retry_interval
+        self.check_interval = check_interval
+
+        self.is_leader = False
+        self.leader_since: datetime | None = None
+        self.elections = 0
+
+    async def run(self, lead: Callable[[], Awaitable[None]]):
+        """竞选循环: 当选后运行 lead()，失去锁或 lead() 退出后重新竞选"""
+        logger.info(f"{self.name}: standing for leadership (lock {self.lock_id:#x})")
+
+        while True:
+            try:
+                async with get_engine("bot").connect() as conn:
+                    await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    acquired = await conn.scalar(
+                        text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self.lock_id}
+                    )
+                    if acquired:
+                        await self._hold(conn, lead)
+
+            except asyncio.CancelledError:
+                logger.info(f"{self.name}: election task cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"{self.name}: leadership lost or election failed: {e}")
+
+            await asyncio.sleep(self.retry_interval)
+
+    async def _hold(self, conn: AsyncConnection, lead: Callable[[], Awaitable[None]]):
+        self.is_leader = True
+        self.leader_since = datetime.now(timezone.utc)
+        self.elections += 1
+        logger.info(f"{self.name}: elected leader")
+
+        task = asyncio.create_task(lead())
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self.check_interval)
+                if done:
+                    # ---- lead() 不应自行结束；结束即让位，由下一轮竞选重启 ----
+                    if task.exception():
+                        logger.error(f"{self.name}: leader task failed: {task.exception()}")
+                    return
+                await asyncio.wait_for(conn.scalar(text("SELECT 1")), timeout=self.check_interval)
+        finally:
+            # ---- 先停工作再释放锁，保证接管者启动时旧 leader 已停止 ----
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self.is_leader = False
+            self.leader_since = None
+            await self._release(conn)
+            logger.info(f"{self.name}: stepped down")
+
+    async def _release(self, conn: AsyncConnection):
+        try:
+            await conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": self.lock_id})
+        except Exception:
+            # ---- 连接状态未知时丢弃，不让可能仍持锁的连接回到池里 ----
+            await conn.invalidate()
+
+    def stats(self) -> dict:
+        return {
+            "is_leader": self.is_leader,
+            "leader_since": self.leader_since.isoformat() if self.leader_since else None,
+            "elections": self.elections,
+        }
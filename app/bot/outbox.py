@@ -0,0 +1,151 @@
+"""
+[INPUT]: 依赖 tweepy, app.config, app.services.twitter, app.services.x_scheduler, app.db.session, app.db.crud, app.db.models, app.bot.pipeline
+[OUTPUT]: 对外提供 ReplyDispatcher, get_reply_dispatcher, run_reply_dispatcher 主循环, is_transient_error
+[POS]: bot 模块的回复发件箱投递器：发送已落库的回复，记录 reply_tweet_id，临时失败只重试 Twitter 调用；
+       额度不足时延后到窗口重置之后 (不计入重试次数)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import random
+from functools import lru_cache
+
+import tweepy
+
+from app.config import get_settings
+from app.services.twitter import TwitterService
+from app.db.session import get_async_session
+from app.services.x_scheduler import WriteDelayed
+from app.db.crud import claim_due_replies, mark_reply_sent, mark_reply_retry, mark_reply_failed, defer_reply
+from app.db.models import ReplyOutbox
+from app.bot.pipeline import get_pipeline
+from app.utils.logger import logger
+
+
+def is_transient_error(error: Exception) -> bool:
+    """429 / 5xx / 网络错误可重试；其余 4xx (重复内容、原推已删除等) 重试无意义"""
+    if isinstance(error, (tweepy.errors.TooManyRequests, tweepy.errors.TwitterServerError)):
+        return True
+    if isinstance(error, tweepy.errors.HTTPException):
+        return False
+    return True
+
+
+class ReplyDispatcher:
+    """
+    认领到期的 outbox 条目并发送
+    投递语义为至少一次: 发送成功但写回前崩溃时，租约到期后会再次发送 (X 会以重复内容拒绝)
+    """
+
+    def __init__(
+        self,
+        twitter: TwitterService,
+        batch_size: int = 10,
+        lease_seconds: float = 120.0,
+        max_attempts: int = 5,
+        retry_base: float = 30.0,
+    ):
+        self.twitter = twitter
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+
+        self.sent = 0
+        self.deferred = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def dispatch_once(self) -> int:
+        """处理一批到期条目，返回本批条目数"""
+        async with get_async_session() as session:
+            entries = await claim_due_replies(session, self.batch_size, self.lease_seconds)
+
+        # ---- 一批内并发发送，并发度由 post 阶段限制 ----
+        await asyncio.gather(*(self._send(entry) for entry in entries))
+        return len(entries)
+
+    async def _send(self, entry: ReplyOutbox):
+        try:
+            async with get_pipeline().post.slot():
+                # ---- 等待额度不能超过租约，否则租约到期后会被重复认领 ----
+                result = await self.twitter.reply_to_tweet(
+                    entry.mention_tweet_id, entry.reply_text, max_wait=self.lease_seconds / 2
+                )
+        except WriteDelayed as e:
+            async with get_async_session() as session:
+                await defer_reply(session, entry, e.delay)
+            self.deferred += 1
+            logger.info(f"Reply for mention {entry.mention_tweet_id} deferred {e.delay:.0f}s until rate limit reset")
+            return
+        except Exception as e:
+            await self._handle_failure(entry, e)
+            return
+
+        async with get_async_session() as session:
+            await mark_reply_sent(session, entry, result["reply_tweet_id"])
+        self.sent += 1
+        logger.info(f"Reply sent for mention {entry.mention_tweet_id} (attempt {entry.attempts})")
+
+    async def _handle_failure(self, entry: ReplyOutbox, error: Exception):
+        message = f"{type(error).__name__}: {error}"
+
+        if is_transient_error(error) and entry.attempts < self.max_attempts:
+            # ---- 指数退避 + 抖动，attempts 在认领时已 +1 ----
+            delay = self.retry_base * (2 ** (entry.attempts - 1)) * random.uniform(0.8, 1.2)
+            async with get_async_session() as session:
+                await mark_reply_retry(session, entry, message, delay)
+            self.retried += 1
+            logger.warning(f"Reply for mention {entry.mention_tweet_id} failed, retrying in {delay:.0f}s: {message}")
+            return
+
+        async with get_async_session() as session:
+            await mark_reply_failed(session, entry, message)
+        self.failed += 1
+        logger.error(f"Reply for mention {entry.mention_tweet_id} failed permanently: {message}")
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "deferred": self.deferred,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+@lru_cache
+def get_reply_dispatcher() -> ReplyDispatcher:
+    settings = get_settings()
+    return ReplyDispatcher(
+        TwitterService(),
+        batch_size=settings.outbox_batch_size,
+        lease_seconds=settings.outbox_lease_seconds,
+        max_attempts=settings.outbox_max_attempts,
+        retry_base=settings.outbox_retry_base,
+    )
+
+
+# ============================================================
+#  主循环
+# ============================================================
+
+async def run_reply_dispatcher():
+    """轮询到期回复；一批满载时立即继续，否则休眠 poll 间隔"""
+    settings = get_settings()
+    dispatcher = get_reply_dispatcher()
+    interval = settings.outbox_poll_interval
+
+    logger.info(f"Reply dispatcher started (interval={interval}s, batch={dispatcher.batch_size})")
+
+    while True:
+        try:
+            claimed = await dispatcher.dispatch_once()
+            if claimed < dispatcher.batch_size:
+                await asyncio.sleep(interval)
+
+        except asyncio.CancelledError:
+            logger.info("Reply dispatcher task cancelled")
+            break
+        except Exception as e:
+            logger.error(f"Reply dispatcher error: {e}")
+            await asyncio.sleep(interval * 5)
@@ -0,0 +1,137 @@
+"""
+[INPUT]: 依赖 asyncio, app.config
+[OUTPUT]: 对外提供 Stage, StageFull, Pipeline, get_pipeline
+[POS]: bot 模块的分阶段处理管线：parse / classify / context / generate / post 各自独立限流并统计占用与延迟，
+       慢阶段 (上游生成) 饱和时不会拖住只需分类即可结束的 mention；被 stream / processor / worker / outbox 共用
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Optional
+
+from app.config import get_settings
+
+
+class StageFull(Exception):
+    """阶段并发已满且等待队列达到上限，调用方应把工作退回上游队列"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"stage {stage} is full")
+        self.stage = stage
+
+
+def _percentile(samples: deque, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Stage:
+    """
+    并发上限 limit 的处理阶段；queue_size 限制排队数量 (None 为不限)
+    延迟按最近 window 个样本统计: wait=排队时间, latency=阶段内处理时间
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: Optional[int] = None, window: int = 512):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self._semaphore = asyncio.Semaphore(limit)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._waits: deque[float] = deque(maxlen=window)
+
+    @property
+    def full(self) -> bool:
+        return self.in_flight >= self.limit and self.queue_size is not None and self.waiting >= self.queue_size
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个并发槽位；队列已满时立即抛 StageFull 而不是无界排队"""
+        if self.full:
+            self.rejected += 1
+            raise StageFull(self.name)
+
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.perf_counter()
+        self._waits.append(started - queued)
+        self.in_flight += 1
+        try:
+            yield
+        except Exception:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self._latencies.append(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "occupancy": round(self.in_flight / self.limit, 3),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_ms_p50": round(_percentile(self._waits, 0.5) * 1000, 2),
+            "wait_ms_p95": round(_percentile(self._waits, 0.95) * 1000, 2),
+            "latency_ms_p50": round(_percentile(self._latencies, 0.5) * 1000, 2),
+            "latency_ms_p95": round(_percentile(self._latencies, 0.95) * 1000, 2),
+        }
+
+
+class Pipeline:
+    """
+    parse:    stream 解析 + 入队 (stream 串行读取，limit 1)
+    classify: LLM 意图分类，UNKNOWN 在此结束
+    context:  C3 去重 + roast 上下文查询 (短 DB 查询)
+    generate: 上游生成，最慢；排队上限之外的 mention 退回数据库队列
+    post:     dispatcher 发送回复到 X
+    """
+
+    def __init__(self, classify: int, context: int, generate: int, generate_queue: int, post: int):
+        self.parse = Stage("parse", 1)
+        self.classify = Stage("classify", classify)
+        self.context = Stage("context", context)
+        self.generate = Stage("generate", generate, queue_size=generate_queue)
+        self.post = Stage("post", post)
+
+    @property
+    def stages(self) -> list[Stage]:
+        return [self.parse, self.classify, self.context, self.generate, self.post]
+
+    def stats(self) -> dict:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+
+@lru_cache
+def get_pipeline() -> Pipeline:
+    settings = get_settings()
+    return Pipeline(
+        classify=settings.stage_classify_limit,
+        context=settings.stage_context_limit,
+        generate=settings.stage_generate_limit,
+        generate_queue=settings.stage_generate_queue,
+        post=settings.stage_post_limit,
+    )
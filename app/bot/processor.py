@@ -1,8 +1,11 @@
 """
-[INPUT]: 依赖 app.services.twitter, app.services.upstream_api, app.services.intent_classifier,
-         app.bot.handlers.*, app.bot.response_builder, app.db.crud, app.db.models
-[OUTPUT]: 对外提供 process_mention 异步函数
-[POS]: bot 模块的单条 mention 处理核心，被 stream 监听消费
+[INPUT]: 依赖 app.services.twitter, app.services.upstream_api, app.services.limiter, app.services.intent_classifier,
+         app.bot.handlers.*, app.bot.response_builder, app.bot.admission, app.bot.pipeline, app.db.crud, app.db.models, app.db.session
+[OUTPUT]: 对外提供 process_claimed_mention 异步函数
+[POS]: bot 模块的单条 mention 处理核心，被 app.bot.worker 对认领到的记录调用；按 classify / context / generate 阶段分别限流；
+       分类与 X_ROAST 上下文预取并发执行，每个阶段按需借用短会话，网络等待期间不占连接；
+       同 thread 同请求者的 X_ROAST 由数据库占位 (C3 覆盖处理中的记录)，跨进程只生成一次；
+       生成的回复写入 reply_outbox，由 app.bot.outbox 发送
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
@@ -10,27 +13,27 @@ import asyncio
 import random
 import re
 
-from sqlalchemy.ext.asyncio import AsyncSession
-
 from app.services.twitter import TwitterService
 from app.services.upstream_api import UpstreamAPIClient
 from app.services.intent_classifier import IntentClassifier
+from app.services.limiter import LimiterRejected
 from app.db.models import TriggerType
 from app.bot.handlers.face_search import FaceSearchHandler
 from app.bot.handlers.x_roast import XRoastHandler
 from app.bot.response_builder import ResponseBuilder
+from app.bot.admission import mark_pair_completed
+from app.bot.pipeline import StageFull, get_pipeline
 from app.db.crud import (
-    is_mention_processed,
     is_thread_requester_processed,
-    create_mention_record,
+    claim_thread_requester,
+    set_mention_intent,
+    skip_mention,
     update_mention_status,
-    get_roast_profile,
-    get_revenge_context,
-    update_roast_profile_after_roast,
-    update_requester_after_roast,
-    record_revenge_relation,
+    enqueue_reply,
+    get_roast_context,
 )
 from app.db.models import ProcessingStatus
+from app.db.session import get_async_session
 from app.config import get_settings
 from app.utils.logger import logger
 
@@ -42,126 +45,199 @@ def _extract_target(text: str, bot_username: str, fallback: str | None) -> str |
     return mentions[0] if mentions else fallback
 
 
-async def process_mention(
-    session: AsyncSession,
+async def process_claimed_mention(
     twitter: TwitterService,
     mention: dict,
+    intent: tuple[TriggerType, str | None] | None = None,
 ):
-    """处理单条 mention (含幂等去重)"""
+    """
+    处理 worker 已认领 (记录已存在且为 PROCESSING) 的 mention，逐阶段占用各自的并发槽位
+    intent 为已持久化的分类结果 (被退回后重新认领)，此时跳过分类
+    generate 阶段已满 (StageFull) 或上游限流拒绝 (LimiterRejected) 时向上抛出，由 worker 把记录延后退回队列
+    """
     tweet_id = mention["tweet_id"]
-    author = mention["author_username"]
-    text = mention.get("text", "")
-
-    # ---- 幂等: Webhook 可能重复推送 ----
-    if await is_mention_processed(session, tweet_id):
-        logger.debug(f"Mention {tweet_id} already processed, skipping")
+    logger.info(f"Processing mention {tweet_id} from @{mention['author_username']}")
+
+    classified = intent is None
+    if classified:
+        trigger_type, target, context = await _classify_with_prefetch(mention)
+    else:
+        trigger_type, target = intent
+        context = await _load_context(mention, target) if trigger_type == TriggerType.X_ROAST else None
+
+    # ---- UNKNOWN 在分类后立即结束，不会进入后续阶段 (入队时已是 UNKNOWN，无需写回) ----
+    if trigger_type not in (TriggerType.FACE_SEARCH, TriggerType.X_ROAST):
+        logger.info(f"Unknown intent for mention {tweet_id}, ignoring")
+        await _complete(tweet_id, "[ignored - unknown intent]")
         return
 
-    logger.info(f"Processing mention {tweet_id} from @{author}")
+    roast_ctx = None
+    if trigger_type == TriggerType.X_ROAST:
+        thread_handled, roast_ctx = context
+        if thread_handled:
+            await _skip_thread_duplicate(mention)
+            return
 
-    settings = get_settings()
-    bot_username = settings.twitter_bot_username.lower()
-    reply_to_tweet_id = mention.get("reply_to_tweet_id")
+    # ---- 通过 C3 后才落库意图；generate 阶段被退回时重新认领可复用，跳过分类 ----
+    # ---- X_ROAST 在锁内复查 C3 后占位，并发的同对 mention (可能在其他 worker 进程) 只有一条能走到生成 ----
+    if classified:
+        async with get_async_session() as session:
+            if trigger_type == TriggerType.X_ROAST:
+                claimed = await claim_thread_requester(
+                    session, tweet_id, mention.get("reply_to_tweet_id"), mention["author_id"], target
+                )
+            else:
+                claimed = True
+                await set_mention_intent(session, tweet_id, trigger_type, target)
+        if not claimed:
+            await _skip_thread_duplicate(mention)
+            return
 
-    # ---- LLM 意图分类 ----
-    has_image = bool(mention.get("image_urls"))
-    classifier = IntentClassifier()
-    intent_result = await classifier.classify(text, has_image=has_image)
+    await _generate_and_enqueue(twitter, mention, trigger_type, target, roast_ctx)
 
-    logger.info(f"Intent: {intent_result.trigger_type.value}, confidence: {intent_result.confidence:.2f}")
 
-    # ---- 提取 target (X_ROAST 用) ----
-    target = None
-    author_id = mention["author_id"]
+# ============================================================
+#  处理阶段
+# ============================================================
 
-    if intent_result.trigger_type == TriggerType.X_ROAST:
-        target = _extract_target(text, settings.twitter_bot_username, mention.get("reply_to_user"))
+async def _complete(tweet_id: str, note: str):
+    async with get_async_session() as session:
+        await update_mention_status(session, tweet_id, ProcessingStatus.COMPLETED, reply_text=note)
 
-        # ---- C3 去重: 同 thread + 同请求者 只处理一次 ----
-        if await is_thread_requester_processed(session, reply_to_tweet_id, author_id):
-            logger.info(f"Thread {reply_to_tweet_id} + requester {author_id} already processed, skipping")
-            return
 
-    # ---- 创建数据库记录 ----
-    await create_mention_record(
-        session,
-        tweet_id=tweet_id,
-        author_id=mention["author_id"],
-        author_username=author,
-        tweet_text=text,
-        trigger_type=intent_result.trigger_type,
-        reply_to_tweet_id=reply_to_tweet_id,
-        target_handle=target,
+async def _skip_thread_duplicate(mention: dict):
+    mark_pair_completed(mention)
+    logger.info(
+        f"Thread {mention.get('reply_to_tweet_id')} + requester {mention['author_id']} "
+        f"already handled, skipping"
     )
+    async with get_async_session() as session:
+        await skip_mention(session, mention["tweet_id"], "[skipped - thread already handled]")
 
-    upstream_client = UpstreamAPIClient()
 
-    # ---- 根据意图分发 ----
+async def _classify_with_prefetch(mention: dict) -> tuple[TriggerType, str | None, tuple[bool, dict | None] | None]:
+    """
+    LLM 分类与 X_ROAST 所需的 DB 读取 (C3 去重 + roast 上下文) 并发执行
+    target 由正则提取，不依赖分类结果，因此可以投机预取；分类不是 X_ROAST 或分类失败时取消预取
+    预取先返回且 C3 命中 (同 thread 同请求者已有 X_ROAST 占位) 时取消分类，按重复触发处理，刷屏不再逐条消耗 LLM 调用
+    返回 (trigger_type, target, context)，context 仅 X_ROAST 时有值
+    """
+    settings = get_settings()
+    target = _extract_target(mention.get("text", ""), settings.twitter_bot_username, mention.get("reply_to_user"))
+
+    classify_task = asyncio.create_task(_classify(mention))
+    prefetch_task = asyncio.create_task(_load_context(mention, target))
     try:
-        if intent_result.trigger_type == TriggerType.FACE_SEARCH:
-            handler = FaceSearchHandler(twitter, upstream_client)
-            result = await handler.handle(mention)
-
-        elif intent_result.trigger_type == TriggerType.X_ROAST:
-            # ---- 查询历史数据和复仇上下文 ----
-            roast_history = await get_roast_profile(session, target) if target else None
-            revenge_ctx = await get_revenge_context(session, target, author) if target else None
-
-            handler = XRoastHandler(twitter, upstream_client)
-            result = await handler.handle(
-                mention,
-                target,
-                roast_count=roast_history.roast_count if roast_history else 0,
-                revenge_context=revenge_ctx,
-            )
+        await asyncio.wait({classify_task, prefetch_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not classify_task.done() and _thread_handled(prefetch_task):
+            await _cancel(classify_task)
+            return TriggerType.X_ROAST, target, prefetch_task.result()
+        trigger_type = await classify_task
+    except BaseException:
+        await _cancel(classify_task)
+        await _cancel(prefetch_task)
+        raise
+
+    if trigger_type != TriggerType.X_ROAST:
+        await _cancel(prefetch_task)
+        return trigger_type, None, None
+    return trigger_type, target, await prefetch_task
+
 
-            # ---- 喷人成功后更新记忆数据 ----
-            if result.get("success") and target:
-                await update_roast_profile_after_roast(session, target, author_id)
-                await update_requester_after_roast(session, author_id, author, target)
-                await record_revenge_relation(session, author, target)
+def _thread_handled(prefetch_task: asyncio.Task) -> bool:
+    return prefetch_task.done() and prefetch_task.exception() is None and prefetch_task.result()[0]
 
-        else:
-            logger.info(f"Unknown intent for mention {tweet_id}, ignoring")
-            await update_mention_status(
+
+async def _cancel(task: asyncio.Task):
+    """取消投机任务并等待其退出 (释放阶段槽位与连接)，忽略它的结果与异常"""
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def _classify(mention: dict) -> TriggerType:
+    """classify 阶段: LLM 意图分类 (不持有连接)"""
+    text = mention.get("text", "")
+    has_image = bool(mention.get("image_urls"))
+
+    async with get_pipeline().classify.slot():
+        intent_result = await IntentClassifier().classify(text, has_image=has_image)
+
+    logger.info(f"Intent: {intent_result.trigger_type.value}, confidence: {intent_result.confidence:.2f}")
+    return intent_result.trigger_type
+
+
+async def _load_context(mention: dict, target: str | None) -> tuple[bool, dict | None]:
+    """context 阶段: C3 去重 (同 thread + 同请求者只处理一次)；未命中时读取 roast 上下文"""
+    async with get_pipeline().context.slot():
+        async with get_async_session() as session:
+            if await is_thread_requester_processed(
+                session, mention["tweet_id"], mention.get("reply_to_tweet_id"), mention["author_id"]
+            ):
+                return True, None
+            if not target:
+                return False, None
+            return False, await get_roast_context(session, target, mention["author_username"])
+
+
+async def _generate_and_enqueue(
+    twitter: TwitterService,
+    mention: dict,
+    trigger_type: TriggerType,
+    target: str | None,
+    roast_ctx: dict | None,
+):
+    """generate: 调用上游生成回复并写入 outbox；发送由 dispatcher 在 post 阶段完成"""
+    settings = get_settings()
+    tweet_id = mention["tweet_id"]
+    upstream_client = UpstreamAPIClient()
+
+    try:
+        async with get_pipeline().generate.slot():
+            if trigger_type == TriggerType.FACE_SEARCH:
+                handler = FaceSearchHandler(twitter, upstream_client)
+                result = await handler.handle(mention)
+            else:
+                handler = XRoastHandler(twitter, upstream_client)
+                result = await handler.handle(
+                    mention,
+                    target,
+                    roast_count=roast_ctx["roast_count"] if roast_ctx else 0,
+                    revenge_context=roast_ctx["revenge_context"] if roast_ctx else None,
+                )
+                # ---- 记忆表由投影器从 COMPLETED 且无 error_message 的记录异步派生，回复路径不再写计数 ----
+
+        # ---- 回复落库到 outbox，随机延迟 (模拟人类行为) 由 not_before 表达，发送交给 dispatcher ----
+        delay = random.uniform(settings.reply_delay_min, settings.reply_delay_max)
+        async with get_async_session() as session:
+            await enqueue_reply(
                 session,
                 tweet_id,
-                ProcessingStatus.COMPLETED,
-                reply_text="[ignored - unknown intent]",
+                result["reply_text"],
+                delay_seconds=delay,
+                error_message=None if result.get("success") else "generation failed, error reply sent",
             )
-            return
-
-        # ---- 随机延迟 (模拟人类行为，避免被 X 标记) ----
-        delay = random.uniform(45, 60)
-        logger.info(f"Waiting {delay:.1f}s before replying...")
-        await asyncio.sleep(delay)
 
-        # ---- 发送回复 ----
-        reply_text = result["reply_text"]
-        reply_result = twitter.reply_to_tweet(tweet_id, reply_text)
+        if trigger_type == TriggerType.X_ROAST:
+            mark_pair_completed(mention)
 
-        await update_mention_status(
-            session,
-            tweet_id,
-            ProcessingStatus.COMPLETED,
-            reply_tweet_id=reply_result["reply_tweet_id"],
-            reply_text=reply_text,
-        )
-
-        logger.info(f"Successfully replied to mention {tweet_id}")
+        logger.info(f"Reply for mention {tweet_id} queued (send in {delay:.1f}s)")
 
+    except (StageFull, LimiterRejected):
+        raise
     except Exception as e:
         logger.error(f"Failed to process mention {tweet_id}: {e}")
 
-        await update_mention_status(
-            session,
-            tweet_id,
-            ProcessingStatus.FAILED,
-            error_message=str(e),
-        )
-
+        # ---- 错误提示同样走 outbox，mention 立即标记 FAILED ----
         try:
-            error_reply = ResponseBuilder.error()
-            twitter.reply_to_tweet(tweet_id, error_reply)
-        except Exception as reply_error:
-            logger.error(f"Failed to send error reply: {reply_error}")
+            async with get_async_session() as session:
+                await enqueue_reply(
+                    session,
+                    tweet_id,
+                    ResponseBuilder.error(),
+                    delay_seconds=0,
+                    status=ProcessingStatus.FAILED,
+                    final_status=ProcessingStatus.FAILED,
+                    error_message=str(e),
+                )
+        except Exception as queue_error:
+            logger.error(f"Failed to queue error reply: {queue_error}")
@@ -0,0 +1,101 @@
+"""
+[INPUT]: 依赖 app.config, app.db.session, app.db.projections, app.db.crud
+[OUTPUT]: 对外提供 MemoryProjector, get_memory_projector, run_memory_projector 主循环
+[POS]: bot 模块的记忆表异步投影器，与 stream.py 并行运行，在 main.py lifespan 中启动；回复路径不再写计数表
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import time
+from functools import lru_cache
+
+from app.config import get_settings
+from app.db.session import get_engine
+from app.db.projections import ProjectionBatch, project_roast_memory
+from app.db.crud import (
+    invalidate_roast_context,
+    invalidate_requester_summaries,
+    publish_requester_summary_invalidation,
+)
+from app.utils.logger import logger
+
+
+class MemoryProjector:
+    """把已完成的 X_ROAST 记录批量投影到 roast_profiles / requester_profiles / revenge_relations"""
+
+    def __init__(self, lag_seconds: float = 10.0):
+        self.lag_seconds = lag_seconds
+        self.batches = 0
+        self.events = 0
+        self.skipped = 0
+        self.failures = 0
+        self.high_water_mark = None
+        self.last_duration_ms = 0.0
+
+    async def run_once(self) -> ProjectionBatch:
+        """执行一轮投影 (单事务)，提交后失效受影响的上下文缓存，画像摘要经 NOTIFY 通知其他进程"""
+        started = time.perf_counter()
+
+        async with get_engine("bot").begin() as conn:
+            batch = await project_roast_memory(conn, lag_seconds=self.lag_seconds)
+            if batch.requesters:
+                # ---- 画像摘要缓存在 api 进程: 同事务 NOTIFY，提交后才送达 ----
+                await publish_requester_summary_invalidation(conn, batch.requesters)
+
+        self.last_duration_ms = (time.perf_counter() - started) * 1000
+        if not batch.applied:
+            self.skipped += 1
+            return batch
+
+        self.batches += 1
+        self.events += batch.events
+        self.high_water_mark = batch.high
+        if batch.events:
+            invalidate_roast_context(batch.targets, batch.pairs)
+            invalidate_requester_summaries(batch.requesters)
+            logger.info(
+                f"Memory projector applied {batch.events} roasts "
+                f"({len(batch.targets)} targets) in {self.last_duration_ms:.1f}ms"
+            )
+        return batch
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "events": self.events,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "high_water_mark": self.high_water_mark.isoformat() if self.high_water_mark else None,
+            "last_duration_ms": round(self.last_duration_ms, 2),
+        }
+
+
+@lru_cache
+def get_memory_projector() -> MemoryProjector:
+    return MemoryProjector(lag_seconds=get_settings().memory_projector_lag)
+
+
+# ============================================================
+#  主循环
+# ============================================================
+
+async def run_memory_projector():
+    """按固定间隔推进投影，失败后下一轮重放同一窗口"""
+    settings = get_settings()
+    projector = get_memory_projector()
+    interval = settings.memory_projector_interval
+
+    logger.info(f"Memory projector started (interval={interval}s, lag={projector.lag_seconds}s)")
+
+    while True:
+        try:
+            await projector.run_once()
+            await asyncio.sleep(interval)
+
+        except asyncio.CancelledError:
+            logger.info("Memory projector task cancelled")
+            break
+        except Exception as e:
+            projector.failures += 1
+            logger.error(f"Memory projector error: {e}")
+            await asyncio.sleep(interval * 6)
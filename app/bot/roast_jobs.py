@@ -0,0 +1,242 @@
+"""
+[INPUT]: 依赖 asyncio, app.config, app.services.twitter, app.services.upstream_api, app.services.limiter, app.services.retry,
+         app.services.x_scheduler, app.db.session, app.db.crud, app.db.models
+[OUTPUT]: 对外提供 RoastJobRunner, get_roast_job_runner, run_roast_jobs 主循环, build_roast_tweet
+[POS]: bot 模块的网页端 roast 任务执行器 (worker 角色)：认领 /auth/roast 落库的任务，生成 → 发推 → 写回结果，
+       API 进程只负责入队，请求延迟与上游生成速度无关
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from functools import lru_cache
+
+from app.config import get_settings
+from app.services.twitter import TwitterService
+from app.services.upstream_api import UpstreamAPIClient
+from app.services.limiter import LimiterRejected
+from app.services.retry import deadline, status_of
+from app.services.x_scheduler import WritePriority, WriteDelayed
+from app.db.session import get_async_session
+from app.db.crud import (
+    claim_roast_jobs,
+    update_roast_job,
+    defer_roast_job,
+    fail_roast_job,
+    complete_roast_job,
+    get_roast_context,
+)
+from app.db.models import RoastJob, RoastJobStatus
+from app.utils.logger import logger
+
+
+def build_roast_tweet(username: str, target: str, roast: str, roast_ctx: dict) -> str:
+    """我 @自己 要喷你 @受害者，按历史加前缀，截断到 280 字符"""
+    prefix = ""
+    revenge_ctx = roast_ctx.get("revenge_context")
+    roast_count = roast_ctx.get("roast_count", 0)
+    if revenge_ctx and revenge_ctx.get("revenge_mode"):
+        attack_count = revenge_ctx.get("attack_count", 1)
+        prefix = f"[复仇模式] @{target} 曾喷过你{attack_count}次\n\n"
+    elif roast_count >= 5:
+        prefix = f"[老朋友警报] 第{roast_count + 1}次被喷\n\n"
+    elif roast_count >= 2:
+        prefix = f"[回头客] 第{roast_count + 1}次\n\n"
+
+    tweet_text = f"{prefix}我 @{username} 要喷你 @{target}：{roast}"
+    if len(tweet_text) > 280:
+        tweet_text = tweet_text[:277] + "..."
+    return tweet_text
+
+
+class RoastJobRunner:
+    """
+    按空闲槽位认领，最多 concurrency 个任务并行；每个任务的出站调用共享 deadline_seconds 总时限 (小于租约)
+    - 上游限流拒绝 / 发推额度不足: 回到 QUEUED 延后重试，不计入 attempts
+    - 其他失败: 租约到期后重新认领，认领次数超过 max_attempts 标记 FAILED
+    - 生成结果在发推前落库，重新认领时不再重复生成
+    - 发推至多一次: 发推前标记 POSTING，X 明确拒绝时退回 QUEUED；结果未知时保持 POSTING，
+      重新认领到 POSTING 的任务直接标记 FAILED，不会重复发推
+    """
+
+    def __init__(
+        self,
+        twitter: TwitterService,
+        concurrency: int = 10,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        deadline_seconds: float = 120.0,
+        defer_seconds: float = 15.0,
+    ):
+        self.twitter = twitter
+        self.upstream = UpstreamAPIClient()
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.deadline_seconds = deadline_seconds
+        self.defer_seconds = defer_seconds
+        self._tasks: set[asyncio.Task] = set()
+
+        self.succeeded = 0
+        self.failed = 0
+        self.deferred = 0
+        self.errors = 0
+
+    @property
+    def saturated(self) -> bool:
+        return len(self._tasks) >= self.concurrency
+
+    async def claim_once(self) -> bool:
+        """按空闲槽位认领并派生任务；返回是否可能还有更多"""
+        capacity = self.concurrency - len(self._tasks)
+        if capacity <= 0:
+            return True
+
+        async with get_async_session() as session:
+            jobs = await claim_roast_jobs(session, capacity, self.lease_seconds)
+
+        for job in jobs:
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(jobs) == capacity
+
+    async def wait_any(self):
+        if self._tasks:
+            await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _run(self, job: RoastJob):
+        if job.attempts > self.max_attempts:
+            await self._fail(job, f"gave up after {job.attempts - 1} attempts")
+            return
+
+        try:
+            with deadline(self.deadline_seconds):
+                await self._execute(job)
+        except LimiterRejected as e:
+            await self._defer(job, self.defer_seconds, f"upstream busy: {e.reason}")
+        except WriteDelayed as e:
+            await self._defer(job, e.delay, f"rate limited, posting in ~{e.delay:.0f}s")
+        except Exception as e:
+            # ---- 保持当前状态，租约到期后重新认领 ----
+            self.errors += 1
+            logger.error(f"Roast job {job.id} attempt {job.attempts} failed: {e}")
+
+    async def _execute(self, job: RoastJob):
+        if job.status == RoastJobStatus.POSTING:
+            # ---- 上次在发推途中中断 (崩溃 / 结果未知)，推文可能已发出: 不再重发，宁可少发不重复发 ----
+            await self._fail(job, "发推结果未知，为避免重复发推不再重试")
+            return
+
+        tweet_text = job.roast_text
+        if not tweet_text:
+            async with get_async_session() as session:
+                await update_roast_job(session, job.id, status=RoastJobStatus.GENERATING)
+
+            result = await self.upstream.x_roast(job.target_handle)
+            if not result.get("success"):
+                error = result.get("error", "")
+                if "not found" in error.lower() or "404" in error:
+                    await self._fail(job, "用户不存在")
+                    return
+                raise RuntimeError(f"x-roast failed: {error}")
+            if not result.get("roast"):
+                await self._fail(job, "生成失败")
+                return
+
+            async with get_async_session() as session:
+                roast_ctx = await get_roast_context(session, job.target_handle, job.requester_username)
+            tweet_text = build_roast_tweet(job.requester_username, job.target_handle, result["roast"], roast_ctx)
+
+        async with get_async_session() as session:
+            await update_roast_job(session, job.id, status=RoastJobStatus.POSTING, roast_text=tweet_text, error=None)
+
+        try:
+            tweet = await self.twitter.post_tweet(
+                tweet_text, priority=WritePriority.INTERACTIVE, max_wait=self.lease_seconds / 2
+            )
+        except WriteDelayed:
+            raise
+        except Exception as e:
+            status = status_of(e)
+            if status is not None and status < 500:
+                # ---- X 明确拒绝 (未发出): 回到 QUEUED，租约到期后按 attempts 重试 ----
+                async with get_async_session() as session:
+                    await update_roast_job(session, job.id, status=RoastJobStatus.QUEUED, error=f"HTTP {status}")
+            # ---- 其他错误 (超时 / 5xx / 连接中断) 可能已发出，保持 POSTING，重新认领时不再重发 ----
+            raise
+
+        async with get_async_session() as session:
+            await complete_roast_job(session, job, tweet["tweet_id"], tweet_text)
+        self.succeeded += 1
+        logger.info(f"Roast job {job.id} posted tweet {tweet['tweet_id']}")
+
+    async def _defer(self, job: RoastJob, delay: float, note: str):
+        self.deferred += 1
+        async with get_async_session() as session:
+            await defer_roast_job(session, job.id, delay, note)
+        logger.info(f"Roast job {job.id} deferred {delay:.0f}s: {note}")
+
+    async def _fail(self, job: RoastJob, error: str):
+        self.failed += 1
+        async with get_async_session() as session:
+            await fail_roast_job(session, job.id, error)
+        logger.warning(f"Roast job {job.id} failed: {error}")
+
+    async def shutdown(self):
+        """取消在途任务；记录保持当前状态，租约到期后由其他 worker 接手"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "deferred": self.deferred,
+            "errors": self.errors,
+        }
+
+
+@lru_cache
+def get_roast_job_runner() -> RoastJobRunner:
+    settings = get_settings()
+    return RoastJobRunner(
+        TwitterService(),
+        concurrency=settings.roast_job_concurrency,
+        lease_seconds=settings.roast_job_lease_seconds,
+        max_attempts=settings.roast_job_max_attempts,
+        deadline_seconds=settings.roast_job_deadline,
+        defer_seconds=settings.stage_generate_defer,
+    )
+
+
+# ============================================================
+#  主循环
+# ============================================================
+
+async def run_roast_jobs():
+    """槽位满时等待任一任务结束；一批认满时立即继续，否则休眠 poll 间隔"""
+    settings = get_settings()
+    runner = get_roast_job_runner()
+    interval = settings.roast_job_poll_interval
+
+    logger.info(f"Roast job runner started (concurrency={runner.concurrency}, interval={interval}s)")
+
+    try:
+        while True:
+            try:
+                more = await runner.claim_once()
+                if runner.saturated:
+                    await runner.wait_any()
+                elif not more:
+                    await asyncio.sleep(interval)
+
+            except asyncio.CancelledError:
+                logger.info("Roast job runner task cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"Roast job runner error: {e}")
+                await asyncio.sleep(interval * 5)
+    finally:
+        await runner.shutdown()
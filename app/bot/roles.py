@@ -0,0 +1,108 @@
+"""
+[INPUT]: 依赖 app.config, app.bot.leader, app.bot.stream, app.bot.active_roast, app.bot.dedup, app.bot.worker, app.bot.outbox, app.bot.projector, app.bot.roast_jobs, app.db.invalidation
+[OUTPUT]: 对外提供 get_ingest_elector, runs_api, runs_ingest, runs_worker, start_role_tasks, stop_role_tasks
+[POS]: bot 模块的进程角色装配：按 APP_ROLE 启停后台任务，被 main.py lifespan 调用
+       - api:    只监听画像摘要缓存的失效通知 (/auth/roast 只入队)，可按核数开多 worker
+       - ingest: 参与 leader 选举，当选者持有唯一的 Filtered Stream 连接并运行 Active Roast
+       - worker: mention 队列消费 + 回复发件箱投递 + 记忆表投影 + 网页端 roast 任务，可任意扩展副本
+       - all:    单进程运行 ingest + worker (本地开发 / 单机部署)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.config import get_settings
+from app.bot.leader import INGEST_LEADER_LOCK_ID, LeaderElector
+from app.bot.stream import setup_stream_rules, run_stream
+from app.bot.active_roast import run_active_roast
+from app.bot.dedup import warm_mention_filter
+from app.bot.worker import run_mention_worker, drain_and_checkpoint
+from app.bot.outbox import run_reply_dispatcher
+from app.bot.projector import run_memory_projector
+from app.bot.roast_jobs import run_roast_jobs
+from app.db.invalidation import run_requester_summary_listener
+from app.utils.logger import logger
+
+
+@dataclass
+class RoleTasks:
+    ingest: list[asyncio.Task] = field(default_factory=list)
+    worker: asyncio.Task | None = None
+    background: list[asyncio.Task] = field(default_factory=list)
+
+
+@lru_cache
+def get_ingest_elector() -> LeaderElector:
+    settings = get_settings()
+    return LeaderElector(
+        "ingest",
+        INGEST_LEADER_LOCK_ID,
+        retry_interval=settings.leader_retry_interval,
+        check_interval=settings.leader_check_interval,
+    )
+
+
+async def _lead_ingest():
+    """当选 leader 后: 预热过滤器、配置规则、保持 stream 连接；失去 leader 时整体被取消"""
+    settings = get_settings()
+    await warm_mention_filter()
+    await setup_stream_rules()
+
+    leader_tasks = [run_stream()]
+    if settings.active_roast_enabled:
+        leader_tasks.append(run_active_roast())
+    else:
+        logger.info("Active Roast disabled")
+    await asyncio.gather(*leader_tasks)
+
+
+def runs_api(role: str) -> bool:
+    return role in ("all", "api")
+
+
+def runs_ingest(role: str) -> bool:
+    return role in ("all", "ingest")
+
+
+def runs_worker(role: str) -> bool:
+    return role in ("all", "worker")
+
+
+def start_role_tasks(role: str) -> RoleTasks:
+    tasks = RoleTasks()
+
+    if runs_api(role):
+        tasks.background.append(asyncio.create_task(run_requester_summary_listener()))
+        logger.info("Requester summary invalidation listener launched")
+
+    if runs_ingest(role):
+        tasks.ingest.append(asyncio.create_task(get_ingest_elector().run(_lead_ingest)))
+        logger.info("Ingest leader election launched")
+
+    if runs_worker(role):
+        tasks.worker = asyncio.create_task(run_mention_worker())
+        tasks.background.append(asyncio.create_task(run_reply_dispatcher()))
+        tasks.background.append(asyncio.create_task(run_memory_projector()))
+        tasks.background.append(asyncio.create_task(run_roast_jobs()))
+        logger.info("Mention worker, reply dispatcher, memory projector and roast job runner launched")
+
+    return tasks
+
+
+async def stop_role_tasks(tasks: RoleTasks):
+    """先停止入队与认领，再排空在途处理 (未完成的释放回 PENDING)，最后停后台任务"""
+    for task in tasks.ingest:
+        task.cancel()
+
+    if tasks.worker:
+        tasks.worker.cancel()
+        await drain_and_checkpoint()
+
+    for task in tasks.background:
+        task.cancel()
+
+    # ---- 等 leader 任务走完 finally (停 stream 后 unlock)，备用进程才能立即接管 ----
+    everything = tasks.ingest + tasks.background + ([tasks.worker] if tasks.worker else [])
+    await asyncio.gather(*everything, return_exceptions=True)
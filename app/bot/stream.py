@@ -1,8 +1,8 @@
 """
-[INPUT]: 依赖 httpx, asyncio, app.config, app.bot.event_parser, app.bot.processor,
-         app.services.twitter, app.db.session
+[INPUT]: 依赖 httpx, asyncio, app.config, app.bot.event_parser, app.bot.admission, app.bot.ingest, app.bot.pipeline, app.services.retry
 [OUTPUT]: 对外提供 setup_stream_rules, run_stream 异步函数
-[POS]: bot 模块的 Filtered Stream 监听核心，被 main.py lifespan 启动
+[POS]: bot 模块的 Filtered Stream 监听核心，被 main.py lifespan 启动；只负责解析、准入与入队，处理由 app.bot.worker 完成；
+       断线重连按 decorrelated jitter 退避，避免多副本同时重连
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
@@ -13,9 +13,10 @@ import httpx
 
 from app.config import get_settings
 from app.bot.event_parser import parse_stream_tweet
-from app.bot.processor import process_mention
-from app.services.twitter import TwitterService
-from app.db.session import get_async_session
+from app.bot.admission import get_admission_controller
+from app.bot.ingest import admit_and_ingest
+from app.bot.pipeline import get_pipeline
+from app.services.retry import DecorrelatedJitter
 from app.utils.logger import logger
 
 # ---- X API v2 Filtered Stream 端点 ----
@@ -72,10 +73,11 @@ async def setup_stream_rules():
 # ============================================================
 
 async def run_stream():
-    """连接 Filtered Stream，持续接收并处理匹配推文"""
+    """连接 Filtered Stream，持续接收匹配推文并写入工作队列"""
     settings = get_settings()
     headers = _bearer_headers()
-    semaphore = asyncio.Semaphore(settings.max_concurrent_processing)
+    admission = get_admission_controller()
+    pipeline = get_pipeline()
 
     params = {
         "tweet.fields": "created_at,author_id,in_reply_to_user_id,referenced_tweets,attachments,entities",
@@ -84,7 +86,7 @@ async def run_stream():
         "media.fields": "url,type,preview_image_url",
     }
 
-    backoff = 5
+    backoff = DecorrelatedJitter(base=5, cap=60)
 
     while True:
         try:
@@ -102,26 +104,25 @@ async def run_stream():
                             f"Stream connect failed: {response.status_code} "
                             f"{body.decode(errors='replace')}"
                         )
-                        await asyncio.sleep(backoff)
-                        backoff = min(backoff * 2, 60)
+                        await asyncio.sleep(backoff.next())
                         continue
 
                     logger.info("Filtered stream connected — listening for mentions")
-                    backoff = 5
+                    backoff.reset()
 
                     async for line in response.aiter_lines():
                         if not line:
                             continue  # keep-alive blank line
 
                         try:
-                            data = json.loads(line)
-                            mention = parse_stream_tweet(
-                                data, settings.twitter_bot_user_id,
-                            )
-                            if mention:
-                                asyncio.create_task(
-                                    _process_one(mention, semaphore),
+                            async with pipeline.parse.slot():
+                                data = json.loads(line)
+                                mention = parse_stream_tweet(
+                                    data, settings.twitter_bot_user_id,
                                 )
+                                if mention:
+                                    # ---- 入队只是一次 INSERT，内联执行即可对数据库形成自然背压 ----
+                                    await admit_and_ingest(mention, admission)
                         except json.JSONDecodeError:
                             continue
                         except Exception as e:
@@ -130,22 +131,7 @@ async def run_stream():
         except Exception as e:
             logger.error(f"Stream disconnected: {e}")
 
-        logger.info(f"Reconnecting in {backoff}s...")
-        await asyncio.sleep(backoff)
-        backoff = min(backoff * 2, 60)
+        delay = backoff.next()
+        logger.info(f"Reconnecting in {delay:.1f}s...")
+        await asyncio.sleep(delay)
 
-
-# ============================================================
-#  单条处理 (并发受限于 Semaphore)
-# ============================================================
-
-async def _process_one(mention: dict, semaphore: asyncio.Semaphore):
-    async with semaphore:
-        twitter = TwitterService()
-        async with get_async_session() as session:
-            try:
-                await process_mention(session, twitter, mention)
-            except Exception as e:
-                logger.error(
-                    f"Error processing mention {mention.get('tweet_id')}: {e}",
-                )
@@ -0,0 +1,68 @@
+"""
+[INPUT]: 依赖 asyncio
+[OUTPUT]: 对外提供 TaskRegistry, get_task_registry
+[POS]: bot 模块的在途处理任务登记表，worker 通过它派生任务、按在途 tweet_id 续期租约，关闭时据此排空并找出未完成的 mention
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import Coroutine
+
+
+class TaskRegistry:
+    """按 tweet_id 登记在途任务；任务结束自动注销"""
+
+    def __init__(self):
+        self._tasks: dict[asyncio.Task, dict] = {}
+        self.accepting = True
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def tweet_ids(self) -> list[str]:
+        return [mention["tweet_id"] for mention in self._tasks.values()]
+
+    def spawn(self, mention: dict, coro: Coroutine) -> asyncio.Task | None:
+        """派生处理任务；排空开始后拒绝新任务 (返回 None，调用方负责关闭 coro)"""
+        if not self.accepting:
+            coro.close()
+            return None
+        task = asyncio.create_task(coro)
+        self._tasks[task] = mention
+        task.add_done_callback(self._tasks.pop)
+        return task
+
+    async def wait_any(self):
+        """等待任一在途任务结束 (登记表先于等待方注销它)"""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), return_when=asyncio.FIRST_COMPLETED)
+
+    async def drain(self, timeout: float) -> list[dict]:
+        """
+        停止接收新任务，等待在途任务至多 timeout 秒
+        超时后取消剩余任务，返回它们的 mention 供调用方做检查点
+        """
+        self.accepting = False
+        pending = set(self._tasks)
+        if not pending:
+            return []
+
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        unfinished = [self._tasks[task] for task in still_running if task in self._tasks]
+
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+        return unfinished
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "accepting": self.accepting,
+        }
+
+
+@lru_cache
+def get_task_registry() -> TaskRegistry:
+    return TaskRegistry()
@@ -0,0 +1,224 @@
+"""
+[INPUT]: 依赖 app.config, app.services.twitter, app.db.session, app.db.crud, app.db.models, app.bot.processor, app.bot.pipeline, app.services.limiter, app.services.retry, app.bot.tasks
+[OUTPUT]: 对外提供 MentionWorker, get_mention_worker, run_mention_worker 主循环, drain_and_checkpoint
+[POS]: bot 模块的 mention 工作队列消费者：从 processed_mentions 以 SKIP LOCKED 认领 PENDING / 租约过期的记录并处理，
+       可在任意多个进程 / 主机上并行运行；在途期间心跳续期租约，关闭时排空并把未完成的记录释放回 PENDING
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import os
+import socket
+from functools import lru_cache
+
+from app.config import get_settings
+from app.services.twitter import TwitterService
+from app.db.session import get_async_session
+from app.db.crud import claim_mentions, extend_mention_leases, release_mentions, update_mention_status
+from app.db.models import ProcessingStatus, TriggerType
+from app.bot.processor import process_claimed_mention
+from app.bot.pipeline import StageFull
+from app.services.limiter import LimiterRejected
+from app.services.retry import deadline
+from app.bot.tasks import get_task_registry
+from app.utils.logger import logger
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"[:64]
+
+
+class MentionWorker:
+    """
+    按空闲槽位认领，在途数永不超过 concurrency；各阶段的并发由 app.bot.pipeline 单独限制
+    认领在作者间轮转，且每个作者全局在途不超过 author_cap (见 claim_mentions)
+    已分类的记录 (被退回后重新认领) 带着意图继续，不再重复调用 LLM
+    每条 mention 的出站调用共享 deadline_seconds 的总时限 (见 app.services.retry)
+    租约语义: 进程崩溃后心跳停止，租约到期后记录对其他 worker 重新可见；
+    认领次数超过 max_attempts 的记录直接标记 FAILED
+    """
+
+    def __init__(
+        self,
+        twitter: TwitterService,
+        worker_id: str,
+        concurrency: int = 10,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        defer_seconds: float = 15.0,
+        author_cap: int = 3,
+        fair_window: int = 2000,
+        deadline_seconds: float = 120.0,
+    ):
+        self.twitter = twitter
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.defer_seconds = defer_seconds
+        self.author_cap = author_cap
+        self.fair_window = fair_window
+        self.deadline_seconds = deadline_seconds
+        self.registry = get_task_registry()
+
+        self.claimed = 0
+        self.processed = 0
+        self.errors = 0
+        self.deferred = 0
+        self.gave_up = 0
+
+    @property
+    def saturated(self) -> bool:
+        return len(self.registry) >= self.concurrency
+
+    async def claim_once(self) -> bool:
+        """按空闲槽位认领一批并派生处理任务；返回队列中是否可能还有更多"""
+        capacity = self.concurrency - len(self.registry)
+        if capacity <= 0:
+            return True
+
+        async with get_async_session() as session:
+            claimed = await claim_mentions(
+                session,
+                self.worker_id,
+                capacity,
+                self.lease_seconds,
+                author_cap=self.author_cap,
+                window=self.fair_window,
+            )
+
+        for mention, attempts, trigger_type, target in claimed:
+            self.claimed += 1
+            if attempts > self.max_attempts:
+                await self._give_up(mention, attempts)
+                continue
+            intent = None if trigger_type == TriggerType.UNKNOWN else (trigger_type, target)
+            if self.registry.spawn(mention, self._process(mention, intent)) is None:
+                await self.checkpoint([mention])
+        return len(claimed) == capacity
+
+    async def _process(self, mention: dict, intent: tuple[TriggerType, str | None] | None):
+        try:
+            # ---- 总时限经 contextvars 传给所有出站调用，到点不再发起重试 ----
+            with deadline(self.deadline_seconds):
+                await process_claimed_mention(self.twitter, mention, intent)
+            self.processed += 1
+        except (StageFull, LimiterRejected) as e:
+            # ---- 生成阶段排队已满 / 上游限流拒绝: 分类结果已落库，延后退回队列，不占本进程槽位 ----
+            self.deferred += 1
+            await self.checkpoint([mention], defer_seconds=self.defer_seconds)
+            logger.info(f"Mention {mention.get('tweet_id')} deferred {self.defer_seconds:.0f}s: {e}")
+        except Exception as e:
+            # ---- 记录保持 PROCESSING，租约不再续期，到期后由任一 worker 重试 ----
+            self.errors += 1
+            logger.error(f"Error processing mention {mention.get('tweet_id')}: {e}")
+
+    async def _give_up(self, mention: dict, attempts: int):
+        self.gave_up += 1
+        tweet_id = mention["tweet_id"]
+        async with get_async_session() as session:
+            await update_mention_status(
+                session,
+                tweet_id,
+                ProcessingStatus.FAILED,
+                error_message=f"gave up after {attempts - 1} attempts",
+            )
+        logger.error(f"Mention {tweet_id} exceeded {self.max_attempts} attempts, marked failed")
+
+    async def heartbeat(self):
+        """每 1/3 租约续期一次在途记录"""
+        interval = self.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with get_async_session() as session:
+                    await extend_mention_leases(session, self.worker_id, self.registry.tweet_ids(), self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Lease heartbeat failed: {e}")
+
+    async def checkpoint(self, mentions: list[dict], defer_seconds: float = 0) -> int:
+        """把未完成的记录释放回 PENDING，返回释放数量"""
+        try:
+            async with get_async_session() as session:
+                return await release_mentions(
+                    session, self.worker_id, [m["tweet_id"] for m in mentions], defer_seconds
+                )
+        except Exception as e:
+            logger.error(f"Failed to release {len(mentions)} mentions: {e}")
+            return 0
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "claimed": self.claimed,
+            "processed": self.processed,
+            "errors": self.errors,
+            "deferred": self.deferred,
+            "gave_up": self.gave_up,
+        }
+
+
+@lru_cache
+def get_mention_worker() -> MentionWorker:
+    settings = get_settings()
+    return MentionWorker(
+        TwitterService(),
+        worker_id=_default_worker_id(),
+        concurrency=settings.max_concurrent_processing,
+        lease_seconds=settings.worker_lease_seconds,
+        max_attempts=settings.worker_max_attempts,
+        defer_seconds=settings.stage_generate_defer,
+        author_cap=settings.worker_author_max_in_flight,
+        fair_window=settings.worker_fair_window,
+        deadline_seconds=settings.mention_deadline,
+    )
+
+
+# ============================================================
+#  主循环
+# ============================================================
+
+async def run_mention_worker():
+    """槽位满时等待任务结束；一批认满时立即继续，否则休眠 poll 间隔"""
+    settings = get_settings()
+    worker = get_mention_worker()
+    interval = settings.worker_poll_interval
+
+    logger.info(
+        f"Mention worker {worker.worker_id} started "
+        f"(concurrency={worker.concurrency}, lease={worker.lease_seconds}s)"
+    )
+    heartbeat_task = asyncio.create_task(worker.heartbeat())
+
+    try:
+        while worker.registry.accepting:
+            try:
+                more = await worker.claim_once()
+                if worker.saturated:
+                    await worker.registry.wait_any()
+                elif not more:
+                    await asyncio.sleep(interval)
+
+            except asyncio.CancelledError:
+                logger.info("Mention worker task cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Mention worker error: {e}")
+                await asyncio.sleep(interval * 5)
+    finally:
+        heartbeat_task.cancel()
+
+
+async def drain_and_checkpoint():
+    """关闭流程: 排空在途任务，超时未完成的释放回 PENDING"""
+    settings = get_settings()
+    worker = get_mention_worker()
+
+    in_flight = len(worker.registry)
+    unfinished = await worker.registry.drain(settings.shutdown_drain_timeout)
+    released = await worker.checkpoint(unfinished) if unfinished else 0
+
+    logger.info(
+        f"Drained {in_flight - len(unfinished)}/{in_flight} in-flight mentions, "
+        f"released {released} back to pending"
+    )
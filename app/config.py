@@ -5,6 +5,8 @@
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -23,19 +25,117 @@ class Settings(BaseSettings):
     upstream_api_base_url: str = "https://wtf.nuwa.world/api/v1"
     upstream_api_key: str
 
+    # ---- 上游自适应并发 (AIMD，每个端点独立) ----
+    upstream_limit_initial: int = 8
+    upstream_limit_min: int = 1
+    upstream_limit_max: int = 64
+    upstream_latency_ratio: float = 0.5    # 延迟超过 客户端超时 × ratio 视为上游拥塞
+    upstream_queue_size: int = 50          # 超出即拒绝 (shed)
+    upstream_queue_timeout: float = 30.0
+
+    # ---- 出站重试 (decorrelated jitter + 重试预算，每个出站目标独立) ----
+    retry_max_attempts: int = 3
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 10.0
+    retry_budget_ratio: float = 0.2        # 窗口内重试数上限 = 请求数 × ratio + min
+    retry_budget_min: int = 5
+    retry_budget_window: float = 10.0
+    mention_deadline: float = 120.0        # 单条 mention 处理的出站调用总时限
+
+    # ---- X 写调用调度 (按 x-rate-limit-* 响应头) ----
+    x_write_concurrency: int = 2
+    x_write_pace_below: float = 0.25       # 剩余额度低于 limit × 该比例后按剩余时间均匀配速
+    x_write_reserve_ratio: float = 0.1     # Active Roast 不使用的预留额度
+
+    # ---- 网页端 roast 任务 (POST /auth/roast 返回 202，worker 角色执行) ----
+    roast_job_concurrency: int = 10
+    roast_job_poll_interval: float = 1.0
+    roast_job_lease_seconds: float = 300.0
+    roast_job_deadline: float = 120.0      # 单个任务出站调用的总时限，须小于租约
+    roast_job_max_attempts: int = 3
+    roast_job_max_active_per_user: int = 3
+
+    # ---- x-roast 生成合并 / 短期缓存 (按 handle) ----
+    roast_cache_ttl: float = 120.0
+    roast_cache_size: int = 256
+    roast_cache_flight_deadline: float = 120.0   # 合并生成的出站总时限 (独立于发起它的请求)
+
     # ---- OpenAI ----
     openai_api_key: str
 
     # ---- Database ----
     database_url: str
+    database_read_url: str = ""            # 可选只读副本，供公开 API 使用
+
+    # ---- 连接池 (按负载隔离) ----
+    db_bot_pool_size: int = 5
+    db_bot_max_overflow: int = 5
+    db_api_pool_size: int = 5
+    db_api_max_overflow: int = 5
+    db_read_pool_size: int = 5
+    db_read_max_overflow: int = 5
+    db_pool_timeout: float = 10.0
+    db_compiled_cache_size: int = 1200     # SQLAlchemy 编译缓存条目数
+    db_prepared_statement_cache_size: int = 500  # asyncpg 每连接预编译语句缓存
+
+    # ---- processed_mentions 保留策略 ----
+    mention_retention_days: int = 90       # 超过该天数的分区大文本移入冷归档
+    mention_drop_days: int = 365           # 超过该天数的分区归档后整体删除 (连同去重键)；0 表示永久保留
+    mention_partition_months_ahead: int = 3
+
+    # ---- 进程角色 (api=只提供 HTTP, ingest=Filtered Stream 入队 (leader 选举), worker=队列消费, all=全部) ----
+    app_role: Literal["all", "api", "ingest", "worker"] = "all"
+    leader_retry_interval: float = 2.0     # 备用 ingest 进程抢锁间隔，决定故障接管速度
+    leader_check_interval: float = 5.0     # leader 探测锁连接存活的间隔，连接断开即让位
 
     # ---- Bot 配置 ----
-    max_concurrent_processing: int = 10
+    max_concurrent_processing: int = 50   # 单个 worker 进程跨阶段的在途 mention 上限
+
+    # ---- 分阶段并发上限 (见 app.bot.pipeline) ----
+    stage_classify_limit: int = 20
+    stage_context_limit: int = 20
+    stage_generate_limit: int = 10         # 上游生成并发
+    stage_generate_queue: int = 20         # 生成阶段排队上限，超出的 mention 延后退回数据库队列
+    stage_generate_defer: float = 15.0     # 退回后多少秒内不再被认领
+    stage_post_limit: int = 5              # 回复发送并发
+
+    # ---- 进程内幂等过滤器 ----
+    dedup_recent_size: int = 10_000        # 最近 tweet_id LRU 集合大小
+    dedup_bloom_capacity: int = 1_000_000  # Bloom Filter 设计容量
+    dedup_bloom_error_rate: float = 0.001
+    dedup_warm_limit: int = 100_000        # 启动预热读取的最近记录数
+
+    # ---- 准入控制 (分类前) ----
+    admission_pair_ttl: int = 600          # thread + 请求者 合并窗口秒数
+    admission_author_rate: float = 0.2     # 每个作者每秒补充令牌数
+    admission_author_burst: int = 5        # 每个作者突发上限
+
+    # ---- mention 工作队列 (ingest 写 PENDING，worker 进程 SKIP LOCKED 认领) ----
+    worker_poll_interval: float = 1.0      # 队列为空时的轮询间隔
+    worker_lease_seconds: float = 300.0    # 认领租约，存活期间心跳续期；进程崩溃后到期自动重新可见
+    worker_max_attempts: int = 3           # 认领次数超过后标记 FAILED，避免毒消息反复拖垮 worker
+    worker_author_max_in_flight: int = 3   # 单个作者全局在途上限，刷屏账号无法占满所有 worker
+    worker_fair_window: int = 2000         # 每次认领最多考虑最早等待的 N 个作者 (在途已满的作者不占名额)
+    shutdown_drain_timeout: float = 20.0   # 关闭时等待在途 mention 的秒数，超时的释放回 PENDING
+
+    # ---- 回复发件箱 ----
+    reply_delay_min: float = 45.0          # 入队后最早发送时间 (反检测随机延迟)
+    reply_delay_max: float = 60.0
+    outbox_poll_interval: float = 2.0
+    outbox_batch_size: int = 10
+    outbox_lease_seconds: float = 120.0    # 认领后的可见性超时，进程崩溃后条目自动重新可见
+    outbox_max_attempts: int = 5
+    outbox_retry_base: float = 30.0        # 临时失败的退避基数秒 (指数增长)
+
+    # ---- 记忆表投影器 ----
+    memory_projector_interval: float = 5.0   # 投影轮询间隔秒数
+    memory_projector_lag: float = 10.0       # 只投影早于 now - lag 的记录，覆盖未提交的事务
 
     # ---- Active Roast 配置 ----
     active_roast_enabled: bool = True
     active_roast_interval: int = 600       # 基础间隔秒数 (10分钟)
     active_roast_jitter: int = 60          # 随机抖动 ±秒
+    active_roast_max_wait: float = 60.0    # 发推额度预计等待超过该值则跳过本轮
 
     # ---- CORS ----
     cors_origins: list[str] = [
@@ -52,6 +152,11 @@ class Settings(BaseSettings):
     x_callback_url: str = "http://localhost:8000/api/v1/auth/callback"
     frontend_url: str = "http://localhost:5173"
     jwt_secret: str = "change-me-in-production"
+    auth_principal_cache_ttl: float = 300.0   # 已验证 token 的缓存秒数 (不超过 token 自身 exp)
+    auth_principal_cache_size: int = 10_000
+    oauth_state_backend: Literal["memory", "postgres"] = "postgres"   # 多 API 进程时必须为 postgres
+    oauth_state_ttl: float = 600.0
+    oauth_state_max_size: int = 10_000     # 仅 memory 后端
 
     # ---- 日志 ----
     log_level: str = "INFO"
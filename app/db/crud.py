@@ -1,53 +1,208 @@
 """
-[INPUT]: 依赖 app.db.models 的 ProcessedMention, ProcessingStatus, TriggerType, ActiveRoastRecord, RoastProfile, RequesterProfile, RevengeRelation
-[OUTPUT]: 对外提供 mention CRUD, active_roast CRUD, profile CRUD, leaderboard/stats 查询
+[INPUT]: 依赖 app.db.models 的 ProcessedMention, ProcessedMentionKey, ProcessingStatus, TriggerType, ReplyOutbox, OutboxStatus, RoastJob, RoastJobStatus, OAuthState, ActiveRoastRecord, RoastProfile, RequesterProfile, RevengeRelation,
+         app.utils.cache 的 TTLCache
+[OUTPUT]: 对外提供 mention CRUD (含同 thread 同请求者的 X_ROAST 加锁占位), 工作队列 (enqueue / 按作者公平 claim / 租约续期 / 释放 / 队列深度), reply outbox CRUD, roast 任务 CRUD (创建 / SKIP LOCKED 认领 / 推进 / 完成), active_roast CRUD, profile 查询 (登录用户摘要带缓存，失效经 NOTIFY 跨进程广播), roast 上下文预取与缓存失效, leaderboard/stats 查询, OAuth PKCE state 存取
+         (记忆表计数由 app.db.projections 批量投影，不在此逐条更新)
 [POS]: db 模块的 CRUD 操作层，被 processor 和 API 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import json
+import uuid
 from typing import Optional
-from datetime import datetime
+from datetime import timedelta
 
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, update, delete, func, desc, and_, true, null, bindparam, text, String, Text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.db.models import (
     ProcessedMention,
+    ProcessedMentionKey,
     ProcessingStatus,
     TriggerType,
+    ReplyOutbox,
+    OutboxStatus,
+    RoastJob,
+    RoastJobStatus,
+    OAuthState,
     ActiveRoastRecord,
     RoastProfile,
     RequesterProfile,
     RevengeRelation,
 )
+from app.utils.cache import TTLCache
+
+# ---- 热点目标的 roast 上下文缓存 (key: (target, requester)) ----
+ROAST_CONTEXT_CACHE_SIZE = 512
+ROAST_CONTEXT_CACHE_TTL = 30.0
+
+_roast_context_cache = TTLCache(maxsize=ROAST_CONTEXT_CACHE_SIZE, ttl=ROAST_CONTEXT_CACHE_TTL)
+
+# ---- 登录用户画像摘要缓存 (key: user_id)；跨进程失效经 NOTIFY 广播 (app.db.invalidation)，监听断开时最多陈旧一个 TTL ----
+REQUESTER_SUMMARY_CACHE_SIZE = 4096
+REQUESTER_SUMMARY_CACHE_TTL = 30.0
+REQUESTER_SUMMARY_CHANNEL = "requester_summaries"
+REQUESTER_SUMMARY_NOTIFY_BATCH = 100   # NOTIFY payload 上限 8000 字节
+
+_requester_summary_cache = TTLCache(maxsize=REQUESTER_SUMMARY_CACHE_SIZE, ttl=REQUESTER_SUMMARY_CACHE_TTL)
+
+
+# ============================================================
+#  按 tweet_id 定位分区
+#  processed_mentions 按 created_at 分区，tweet_id 索引不含分区键；只按 tweet_id 过滤会探测每个分区的索引
+#  从去重键表 (tweet_id 主键，created_at 与行一致) 取 created_at 作为附加条件，执行期裁剪到单个分区
+# ============================================================
+
+def _key_created_at(tweet_id):
+    return select(ProcessedMentionKey.created_at).where(ProcessedMentionKey.tweet_id == tweet_id).scalar_subquery()
+
+
+def _mention_by_tweet_id(tweet_id):
+    return and_(ProcessedMention.tweet_id == tweet_id, ProcessedMention.created_at == _key_created_at(tweet_id))
+
+
+def _mentions_by_tweet_ids(tweet_ids: list[str]):
+    """一组在途记录: created_at 限制在这些键的 [最早, 最晚] 之间，通常只落在一两个分区"""
+    def bound(agg):
+        return select(agg(ProcessedMentionKey.created_at)).where(ProcessedMentionKey.tweet_id.in_(tweet_ids))
+
+    return and_(
+        ProcessedMention.tweet_id.in_(tweet_ids),
+        ProcessedMention.created_at.between(bound(func.min).scalar_subquery(), bound(func.max).scalar_subquery()),
+    )
+
+
+# ============================================================
+#  热点语句 (模块级预构建)
+#  - 语句对象只构建一次，SQLAlchemy cache key 被记忆化，编译结果命中 compiled cache
+#  - SQL 文本恒定，asyncpg 的 prepared statement 缓存保持命中
+# ============================================================
+
+# ---- 幂等检查走不分区的去重键表，单次主键查找 ----
+_MENTION_EXISTS_STMT = select(ProcessedMentionKey.tweet_id).where(
+    ProcessedMentionKey.tweet_id == bindparam("tweet_id")
+)
+
+# ---- C3: 同 thread 同请求者的其他 X_ROAST 记录，生成中 / 待重新认领 / 已入 outbox / 已完成都算占位，FAILED 不算 ----
+_THREAD_REQUESTER_EXISTS_STMT = (
+    select(ProcessedMention.id)
+    .where(
+        ProcessedMention.reply_to_tweet_id == bindparam("reply_to_tweet_id"),
+        ProcessedMention.author_id == bindparam("author_id"),
+        ProcessedMention.tweet_id != bindparam("tweet_id"),
+        ProcessedMention.trigger_type == TriggerType.X_ROAST,
+        ProcessedMention.status != ProcessingStatus.FAILED,
+    )
+    .limit(1)
+)
+
+# ---- 双参数 advisory lock 的命名空间，第二个参数为 hashtext(reply_to_tweet_id:author_id) ----
+THREAD_REQUESTER_LOCK_NS = 0x7472  # "tr"
+
+# ---- 可选字段用 COALESCE 保留旧值，保证语句形状恒定 ----
+_UPDATE_MENTION_STATUS_STMT = (
+    update(ProcessedMention)
+    .where(_mention_by_tweet_id(bindparam("p_tweet_id")))
+    .values(
+        status=bindparam("p_status", type_=ProcessedMention.__table__.c.status.type),
+        # ---- 服务端时间: 投影器水位取自 DB now()，应用侧时钟 (时区 / 偏差) 不能参与比较 ----
+        processed_at=func.now(),
+        reply_tweet_id=func.coalesce(bindparam("p_reply_tweet_id", type_=String), ProcessedMention.reply_tweet_id),
+        reply_text=func.coalesce(bindparam("p_reply_text", type_=Text), ProcessedMention.reply_text),
+        error_message=func.coalesce(bindparam("p_error_message", type_=Text), ProcessedMention.error_message),
+        # ---- 调用方都是终态或 outbox 接手，不会再重跑；SQL NULL (None 会写成 JSON null) ----
+        payload=null(),
+    )
+    .execution_options(synchronize_session=False)
+)
+
+_ROAST_PROFILE_BY_HANDLE_STMT = select(RoastProfile).where(
+    RoastProfile.target_handle == bindparam("handle")
+)
+
+_REVENGE_BY_PAIR_STMT = select(RevengeRelation).where(
+    RevengeRelation.attacker_handle == bindparam("attacker"),
+    RevengeRelation.victim_handle == bindparam("victim"),
+)
+
+# ---- 以 target 为锚点 LEFT JOIN 两张表，单次往返 ----
+_roast_context_anchor = select(bindparam("target", type_=String).label("handle")).subquery("anchor")
+_ROAST_CONTEXT_STMT = (
+    select(
+        RoastProfile.roast_count,
+        RevengeRelation.attack_count,
+        RevengeRelation.last_attack_at,
+    )
+    .select_from(_roast_context_anchor)
+    .outerjoin(RoastProfile, RoastProfile.target_handle == _roast_context_anchor.c.handle)
+    .outerjoin(
+        RevengeRelation,
+        and_(
+            RevengeRelation.attacker_handle == _roast_context_anchor.c.handle,
+            RevengeRelation.victim_handle == bindparam("requester"),
+        ),
+    )
+)
 
 
 async def is_mention_processed(session: AsyncSession, tweet_id: str) -> bool:
     """检查 mention 是否已处理"""
+    result = await session.execute(_MENTION_EXISTS_STMT, {"tweet_id": tweet_id})
+    return result.first() is not None
+
+
+async def get_recent_mention_ids(session: AsyncSession, limit: int = 100_000) -> list[str]:
+    """获取最近的 mention tweet_id (新 → 旧)，用于预热进程内幂等过滤器"""
     result = await session.execute(
-        select(ProcessedMention).where(ProcessedMention.tweet_id == tweet_id)
+        select(ProcessedMentionKey.tweet_id)
+        .order_by(desc(ProcessedMentionKey.created_at))
+        .limit(limit)
     )
-    return result.scalar_one_or_none() is not None
+    return list(result.scalars().all())
 
 
 async def is_thread_requester_processed(
     session: AsyncSession,
+    tweet_id: str,
     reply_to_tweet_id: Optional[str],
     author_id: str,
 ) -> bool:
-    """检查同一 thread 下的同一请求者是否已触发过 (C3 去重)"""
+    """检查同一 thread 下的同一请求者是否已有其他 X_ROAST 在处理或已处理 (C3 去重)"""
     if not reply_to_tweet_id:
         return False
 
     result = await session.execute(
-        select(ProcessedMention).where(
-            ProcessedMention.reply_to_tweet_id == reply_to_tweet_id,
-            ProcessedMention.author_id == author_id,
-            ProcessedMention.trigger_type == TriggerType.X_ROAST,
-            ProcessedMention.status == ProcessingStatus.COMPLETED,
-        )
+        _THREAD_REQUESTER_EXISTS_STMT,
+        {"reply_to_tweet_id": reply_to_tweet_id, "author_id": author_id, "tweet_id": tweet_id},
     )
-    return result.scalar_one_or_none() is not None
+    return result.first() is not None
+
+
+async def claim_thread_requester(
+    session: AsyncSession,
+    tweet_id: str,
+    reply_to_tweet_id: Optional[str],
+    author_id: str,
+    target_handle: Optional[str],
+) -> bool:
+    """
+    X_ROAST 占位: C3 复查与写入意图在同一事务内、按 (thread, 请求者) 持有事务级 advisory lock，
+    并发处理同一对的多条 mention (可能在不同 worker 进程) 只有一条能写入 X_ROAST；返回 False 表示已被占位
+    """
+    if reply_to_tweet_id:
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:ns, hashtext(:pair))"),
+            {"ns": THREAD_REQUESTER_LOCK_NS, "pair": f"{reply_to_tweet_id}:{author_id}"},
+        )
+        if await is_thread_requester_processed(session, tweet_id, reply_to_tweet_id, author_id):
+            await session.rollback()
+            return False
+
+    await set_mention_intent(session, tweet_id, TriggerType.X_ROAST, target_handle)
+    return True
 
 
 async def create_mention_record(
@@ -59,6 +214,8 @@ async def create_mention_record(
     trigger_type: TriggerType,
     reply_to_tweet_id: Optional[str] = None,
     target_handle: Optional[str] = None,
+    payload: Optional[dict] = None,
+    status: ProcessingStatus = ProcessingStatus.PROCESSING,
 ) -> ProcessedMention:
     """创建 mention 处理记录"""
     record = ProcessedMention(
@@ -67,9 +224,10 @@ async def create_mention_record(
         author_username=author_username,
         tweet_text=tweet_text,
         trigger_type=trigger_type,
-        status=ProcessingStatus.PROCESSING,
+        status=status,
         reply_to_tweet_id=reply_to_tweet_id,
         target_handle=target_handle.lower() if target_handle else None,
+        payload=payload,
     )
     session.add(record)
     await session.commit()
@@ -77,6 +235,43 @@ async def create_mention_record(
     return record
 
 
+async def set_mention_intent(
+    session: AsyncSession,
+    tweet_id: str,
+    trigger_type: TriggerType,
+    target_handle: Optional[str],
+):
+    """重新分类后写回意图与目标"""
+    await session.execute(
+        update(ProcessedMention)
+        .where(_mention_by_tweet_id(tweet_id))
+        .values(trigger_type=trigger_type, target_handle=target_handle.lower() if target_handle else None)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+async def skip_mention(session: AsyncSession, tweet_id: str, note: str):
+    """
+    C3 命中 (同 thread 同请求者已处理) 的重复触发: 标记完成并清除意图
+    意图回到 UNKNOWN，投影器 / 重建 / 历史 / 全局统计都按 X_ROAST 过滤，跳过的记录不会被计为一次 roast
+    """
+    await session.execute(
+        update(ProcessedMention)
+        .where(_mention_by_tweet_id(tweet_id))
+        .values(
+            trigger_type=TriggerType.UNKNOWN,
+            target_handle=None,
+            status=ProcessingStatus.COMPLETED,
+            reply_text=note,
+            processed_at=func.now(),
+            payload=null(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
 async def update_mention_status(
     session: AsyncSession,
     tweet_id: str,
@@ -85,24 +280,511 @@ async def update_mention_status(
     reply_text: Optional[str] = None,
     error_message: Optional[str] = None,
 ):
-    """更新 mention 处理状态"""
+    """更新 mention 处理状态 (单条 UPDATE，无需先 SELECT)；只用于终态，同时清空 payload"""
+    await session.execute(
+        _UPDATE_MENTION_STATUS_STMT,
+        _mention_status_params(tweet_id, status, reply_tweet_id, reply_text, error_message),
+    )
+    await session.commit()
+
+
+def _mention_status_params(
+    tweet_id: str,
+    status: ProcessingStatus,
+    reply_tweet_id: Optional[str] = None,
+    reply_text: Optional[str] = None,
+    error_message: Optional[str] = None,
+) -> dict:
+    return {
+        "p_tweet_id": tweet_id,
+        "p_status": status,
+        "p_reply_tweet_id": reply_tweet_id or None,
+        "p_reply_text": reply_text or None,
+        "p_error_message": error_message or None,
+    }
+
+
+# ============================================================
+#  mention 工作队列 (ingest 写 PENDING，worker 以 SKIP LOCKED + 租约认领)
+# ============================================================
+
+# ---- 已有 outbox 条目的记录由 dispatcher 负责，不参与重跑 ----
+_HAS_OUTBOX = select(ReplyOutbox.id).where(ReplyOutbox.mention_tweet_id == ProcessedMention.tweet_id).exists()
+
+
+async def enqueue_mention(session: AsyncSession, mention: dict) -> bool:
+    """
+    ingest: 以 UNKNOWN 意图插入 PENDING 记录，分类交给 worker
+    tweet_id 唯一约束兜底并发重复，返回 False 表示已存在
+    """
+    try:
+        await create_mention_record(
+            session,
+            tweet_id=mention["tweet_id"],
+            author_id=mention["author_id"],
+            author_username=mention["author_username"],
+            tweet_text=mention.get("text", ""),
+            trigger_type=TriggerType.UNKNOWN,
+            reply_to_tweet_id=mention.get("reply_to_tweet_id"),
+            payload=mention,
+            status=ProcessingStatus.PENDING,
+        )
+    except IntegrityError:
+        await session.rollback()
+        return False
+    return True
+
+
+def _claimable(pm, lease: timedelta):
+    """可认领谓词: PENDING (延后期已过)，或租约已过期的 PROCESSING；已入 outbox 的除外"""
+    has_outbox = select(ReplyOutbox.id).where(ReplyOutbox.mention_tweet_id == pm.tweet_id).exists()
+    return and_(
+        pm.payload.is_not(None),
+        # ---- 与部分索引 ix_processed_mentions_claimable 的谓词一致，保证走索引 ----
+        pm.status.in_([ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]),
+        (
+            (pm.status == ProcessingStatus.PENDING)
+            # ---- PENDING 行的 lease_expires_at 表示延后到期时间 (阶段满被退回) ----
+            & (func.coalesce(pm.lease_expires_at, pm.created_at) <= func.now())
+        )
+        | (
+            (pm.status == ProcessingStatus.PROCESSING)
+            # ---- 无租约的 PROCESSING 为升级前遗留，按创建时间 + 租约判定 ----
+            & (func.coalesce(pm.lease_expires_at, pm.created_at + lease) < func.now())
+        ),
+        ~has_outbox,
+    )
+
+
+def _in_flight_by_author(pm):
+    """各作者租约有效且尚未入 outbox 的在途数量 (全部 worker 合计)"""
+    has_outbox = select(ReplyOutbox.id).where(ReplyOutbox.mention_tweet_id == pm.tweet_id).exists()
+    return (
+        select(pm.author_id, func.count().label("cnt"))
+        .where(
+            pm.status == ProcessingStatus.PROCESSING,
+            pm.lease_expires_at > func.now(),
+            ~has_outbox,
+        )
+        .group_by(pm.author_id)
+    )
+
+
+async def claim_mentions(
+    session: AsyncSession,
+    worker_id: str,
+    limit: int,
+    lease_seconds: float,
+    author_cap: int = 3,
+    window: int = 2000,
+) -> list[tuple[dict, int, TriggerType, Optional[str]]]:
+    """
+    公平认领 (SKIP LOCKED，多个 worker 互不阻塞)
+    - 先按作者取候选: 在途已达 author_cap 的作者直接排除，其余作者按最早等待时间取前 window 个，
+      每个作者只取最早的 author_cap 条 (LATERAL)；刷屏账号的积压再多也只占它自己的几条候选
+    - 候选内按作者轮转: 每个作者的第 1 条先于任何作者的第 2 条，且每个作者全局在途不超过 author_cap
+    认领即写入 claimed_by / lease_expires_at 并 attempts + 1
+    返回 (payload, attempts, trigger_type, target_handle) 列表；trigger_type 非 UNKNOWN 表示已分类过
+    """
+    lease = timedelta(seconds=lease_seconds)
+    queued = aliased(ProcessedMention)
+    head = aliased(ProcessedMention)
+    running = aliased(ProcessedMention)
+
+    in_flight = _in_flight_by_author(running).subquery("in_flight")
+    capped = select(in_flight.c.author_id).where(in_flight.c.cnt >= author_cap)
+
+    # ---- 作者列表走部分索引 ix_processed_mentions_author_claimable (author_id, created_at)，不回表 ----
+    authors = (
+        select(queued.author_id)
+        .where(
+            queued.status.in_([ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]),
+            queued.author_id.not_in(capped),
+        )
+        .group_by(queued.author_id)
+        .order_by(func.min(queued.created_at))
+        .limit(window)
+        .subquery("authors")
+    )
+    heads = (
+        select(head.id, head.created_at, head.author_id)
+        .where(head.author_id == authors.c.author_id, _claimable(head, lease))
+        .order_by(head.created_at)
+        .limit(author_cap)
+        .lateral("heads")
+    )
+    # ---- 候选集不加锁 (窗口函数不能与 FOR UPDATE 同层)，锁在外层按主键逐行 SKIP LOCKED ----
+    ranked = (
+        select(
+            heads.c.id,
+            heads.c.created_at,
+            (
+                func.row_number().over(partition_by=heads.c.author_id, order_by=heads.c.created_at)
+                + func.coalesce(in_flight.c.cnt, 0)
+            ).label("pos"),
+        )
+        .select_from(authors)
+        .join(heads, true())
+        .outerjoin(in_flight, in_flight.c.author_id == heads.c.author_id)
+        .subquery("ranked")
+    )
+    fair = (
+        select(ProcessedMention.id)
+        .join(
+            ranked,
+            and_(ranked.c.id == ProcessedMention.id, ranked.c.created_at == ProcessedMention.created_at),
+        )
+        # ---- 外层重复可认领谓词: 加锁后按最新行版本复核，被并发认领的行自动剔除 ----
+        .where(ranked.c.pos <= author_cap, _claimable(ProcessedMention, lease))
+        .order_by(ranked.c.pos, ranked.c.created_at)
+        .limit(limit)
+        .with_for_update(of=ProcessedMention, skip_locked=True)
+    )
     result = await session.execute(
-        select(ProcessedMention).where(ProcessedMention.tweet_id == tweet_id)
+        update(ProcessedMention)
+        .where(ProcessedMention.id.in_(fair.scalar_subquery()))
+        .values(
+            status=ProcessingStatus.PROCESSING,
+            claimed_by=worker_id,
+            lease_expires_at=func.now() + lease,
+            attempts=ProcessedMention.attempts + 1,
+        )
+        .returning(
+            ProcessedMention.payload,
+            ProcessedMention.attempts,
+            ProcessedMention.trigger_type,
+            ProcessedMention.target_handle,
+        )
+        .execution_options(synchronize_session=False)
     )
-    record = result.scalar_one_or_none()
+    claimed = [tuple(row) for row in result.all()]
+    await session.commit()
+    return claimed
 
-    if record:
-        record.status = status
-        record.processed_at = datetime.utcnow()
 
-        if reply_tweet_id:
-            record.reply_tweet_id = reply_tweet_id
-        if reply_text:
-            record.reply_text = reply_text
-        if error_message:
-            record.error_message = error_message
+async def get_queue_depth_by_author(session: AsyncSession, limit: int = 20) -> list[dict]:
+    """按作者统计排队 (PENDING) 与在途 (PROCESSING 未入 outbox) 数量，排队最多的在前"""
+    pm = aliased(ProcessedMention)
+    has_outbox = select(ReplyOutbox.id).where(ReplyOutbox.mention_tweet_id == pm.tweet_id).exists()
+    pending = func.count().filter(pm.status == ProcessingStatus.PENDING)
+    in_flight = func.count().filter(pm.status == ProcessingStatus.PROCESSING)
+    result = await session.execute(
+        select(
+            pm.author_id,
+            func.max(pm.author_username).label("author_username"),
+            pending.label("pending"),
+            in_flight.label("in_flight"),
+        )
+        .where(pm.status.in_([ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]), ~has_outbox)
+        .group_by(pm.author_id)
+        .order_by(desc(pending), desc(in_flight))
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in result.all()]
 
-        await session.commit()
+
+async def extend_mention_leases(
+    session: AsyncSession,
+    worker_id: str,
+    tweet_ids: list[str],
+    lease_seconds: float,
+) -> int:
+    """心跳: 一条 UPDATE 续期本 worker 在途的全部租约，返回续期行数"""
+    if not tweet_ids:
+        return 0
+    result = await session.execute(
+        update(ProcessedMention)
+        .where(
+            _mentions_by_tweet_ids(tweet_ids),
+            ProcessedMention.claimed_by == worker_id,
+            ProcessedMention.status == ProcessingStatus.PROCESSING,
+        )
+        .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def release_mentions(
+    session: AsyncSession,
+    worker_id: str,
+    tweet_ids: list[str],
+    defer_seconds: float = 0,
+) -> int:
+    """
+    本 worker 未入 outbox 的在途记录改回 PENDING (关闭检查点 / 阶段满退回)
+    defer_seconds > 0 时延后到期前不会被再次认领；这次不计入 attempts，返回释放行数
+    """
+    if not tweet_ids:
+        return 0
+    result = await session.execute(
+        update(ProcessedMention)
+        .where(
+            _mentions_by_tweet_ids(tweet_ids),
+            ProcessedMention.claimed_by == worker_id,
+            ProcessedMention.status == ProcessingStatus.PROCESSING,
+            ~_HAS_OUTBOX,
+        )
+        .values(
+            status=ProcessingStatus.PENDING,
+            claimed_by=None,
+            lease_expires_at=func.now() + timedelta(seconds=defer_seconds) if defer_seconds else None,
+            attempts=func.greatest(ProcessedMention.attempts - 1, 0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+# ============================================================
+#  Reply Outbox CRUD
+# ============================================================
+
+async def enqueue_reply(
+    session: AsyncSession,
+    tweet_id: str,
+    reply_text: str,
+    delay_seconds: float,
+    status: ProcessingStatus = ProcessingStatus.PROCESSING,
+    final_status: ProcessingStatus = ProcessingStatus.COMPLETED,
+    error_message: Optional[str] = None,
+) -> bool:
+    """
+    回复文本与 mention 状态在同一事务内落库，之后由 dispatcher 发送
+    返回 False 表示该 mention 已有待发回复 (重复入队被忽略)
+    """
+    result = await session.execute(
+        pg_insert(ReplyOutbox)
+        .values(
+            mention_tweet_id=tweet_id,
+            reply_text=reply_text,
+            final_status=final_status,
+            status=OutboxStatus.PENDING,
+            attempts=0,
+            not_before=func.now() + timedelta(seconds=delay_seconds),
+        )
+        .on_conflict_do_nothing(index_elements=[ReplyOutbox.mention_tweet_id])
+    )
+    await session.execute(
+        _UPDATE_MENTION_STATUS_STMT,
+        _mention_status_params(tweet_id, status, reply_text=reply_text, error_message=error_message),
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
+async def claim_due_replies(session: AsyncSession, limit: int, lease_seconds: float) -> list[ReplyOutbox]:
+    """认领到期回复 (SKIP LOCKED，多个 dispatcher 互不阻塞)；not_before 推后 lease 作为可见性超时"""
+    due = (
+        select(ReplyOutbox.id)
+        .where(ReplyOutbox.status == OutboxStatus.PENDING, ReplyOutbox.not_before <= func.now())
+        .order_by(ReplyOutbox.not_before)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.scalars(
+        update(ReplyOutbox)
+        .where(ReplyOutbox.id.in_(due.scalar_subquery()))
+        .values(
+            attempts=ReplyOutbox.attempts + 1,
+            not_before=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(ReplyOutbox)
+        .execution_options(synchronize_session=False)
+    )
+    entries = list(result.all())
+    await session.commit()
+    return entries
+
+
+async def mark_reply_sent(session: AsyncSession, entry: ReplyOutbox, reply_tweet_id: str):
+    """发送成功: outbox 标记 SENT，mention 写回最终状态与 reply_tweet_id"""
+    await session.execute(
+        update(ReplyOutbox)
+        .where(ReplyOutbox.id == entry.id)
+        .values(status=OutboxStatus.SENT, reply_tweet_id=reply_tweet_id, sent_at=func.now(), last_error=None)
+    )
+    await session.execute(
+        _UPDATE_MENTION_STATUS_STMT,
+        _mention_status_params(entry.mention_tweet_id, entry.final_status, reply_tweet_id=reply_tweet_id),
+    )
+    await session.commit()
+
+
+async def mark_reply_retry(session: AsyncSession, entry: ReplyOutbox, error: str, delay_seconds: float):
+    """临时失败: 保留文本，退避后重试"""
+    await session.execute(
+        update(ReplyOutbox)
+        .where(ReplyOutbox.id == entry.id)
+        .values(
+            last_error=error,
+            not_before=func.now() + timedelta(seconds=delay_seconds),
+        )
+    )
+    await session.commit()
+
+
+async def defer_reply(session: AsyncSession, entry: ReplyOutbox, delay_seconds: float):
+    """额度不足未发送: 延后到窗口重置之后，这次不计入 attempts"""
+    await session.execute(
+        update(ReplyOutbox)
+        .where(ReplyOutbox.id == entry.id)
+        .values(
+            attempts=func.greatest(ReplyOutbox.attempts - 1, 0),
+            not_before=func.now() + timedelta(seconds=delay_seconds),
+        )
+    )
+    await session.commit()
+
+
+async def mark_reply_failed(session: AsyncSession, entry: ReplyOutbox, error: str):
+    """永久失败或重试耗尽: outbox 与 mention 均标记 FAILED"""
+    await session.execute(
+        update(ReplyOutbox)
+        .where(ReplyOutbox.id == entry.id)
+        .values(status=OutboxStatus.FAILED, last_error=error)
+    )
+    await session.execute(
+        _UPDATE_MENTION_STATUS_STMT,
+        _mention_status_params(entry.mention_tweet_id, ProcessingStatus.FAILED, error_message=error),
+    )
+    await session.commit()
+
+
+# ============================================================
+#  Roast 任务 CRUD (网页端异步 roast)
+# ============================================================
+
+_ACTIVE_ROAST_JOB_STATUSES = (RoastJobStatus.QUEUED, RoastJobStatus.GENERATING, RoastJobStatus.POSTING)
+
+# ---- 双参数 advisory lock 的命名空间 (与单参数锁互不冲突)，第二个参数为 hashtext(requester_id) ----
+ROAST_JOB_LOCK_NS = 0x726A  # "rj"
+
+
+async def create_roast_job(
+    session: AsyncSession,
+    requester_id: str,
+    requester_username: str,
+    target_handle: str,
+    max_active: Optional[int] = None,
+) -> Optional[RoastJob]:
+    """
+    创建任务；max_active 为同一请求者进行中任务的上限，超出时返回 None
+    计数与插入在同一事务内、按请求者持有事务级 advisory lock，并发提交串行执行，不会超过上限
+    """
+    if max_active is not None:
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:ns, hashtext(:requester_id))"),
+            {"ns": ROAST_JOB_LOCK_NS, "requester_id": requester_id},
+        )
+        if await count_active_roast_jobs(session, requester_id) >= max_active:
+            await session.rollback()
+            return None
+
+    job = RoastJob(
+        requester_id=requester_id,
+        requester_username=requester_username,
+        target_handle=target_handle.lower(),
+        status=RoastJobStatus.QUEUED,
+    )
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    return job
+
+
+async def count_active_roast_jobs(session: AsyncSession, requester_id: str) -> int:
+    result = await session.scalar(
+        select(func.count())
+        .select_from(RoastJob)
+        .where(RoastJob.requester_id == requester_id, RoastJob.status.in_(_ACTIVE_ROAST_JOB_STATUSES))
+    )
+    return result or 0
+
+
+async def get_roast_job(session: AsyncSession, job_id: uuid.UUID) -> Optional[RoastJob]:
+    return await session.get(RoastJob, job_id)
+
+
+async def claim_roast_jobs(session: AsyncSession, limit: int, lease_seconds: float) -> list[RoastJob]:
+    """认领到期的未完成任务 (含租约过期的 GENERATING / POSTING)；not_before 推后 lease 作为可见性超时"""
+    due = (
+        select(RoastJob.id)
+        .where(RoastJob.status.in_(_ACTIVE_ROAST_JOB_STATUSES), RoastJob.not_before <= func.now())
+        .order_by(RoastJob.not_before)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.scalars(
+        update(RoastJob)
+        .where(RoastJob.id.in_(due.scalar_subquery()))
+        .values(
+            attempts=RoastJob.attempts + 1,
+            not_before=func.now() + timedelta(seconds=lease_seconds),
+            updated_at=func.now(),
+        )
+        .returning(RoastJob)
+        .execution_options(synchronize_session=False)
+    )
+    jobs = list(result.all())
+    await session.commit()
+    return jobs
+
+
+async def update_roast_job(session: AsyncSession, job_id: uuid.UUID, **values):
+    """推进任务进度 (status / roast_text / error ...)"""
+    await session.execute(update(RoastJob).where(RoastJob.id == job_id).values(updated_at=func.now(), **values))
+    await session.commit()
+
+
+async def defer_roast_job(session: AsyncSession, job_id: uuid.UUID, delay_seconds: float, note: str):
+    """发推额度不足: 回到 QUEUED 并延后，这次不计入 attempts (已生成的 roast_text 保留)"""
+    await update_roast_job(
+        session,
+        job_id,
+        status=RoastJobStatus.QUEUED,
+        error=note,
+        attempts=func.greatest(RoastJob.attempts - 1, 0),
+        not_before=func.now() + timedelta(seconds=delay_seconds),
+    )
+
+
+async def fail_roast_job(session: AsyncSession, job_id: uuid.UUID, error: str):
+    await update_roast_job(session, job_id, status=RoastJobStatus.FAILED, error=error, finished_at=func.now())
+
+
+async def complete_roast_job(session: AsyncSession, job: RoastJob, tweet_id: str, tweet_text: str):
+    """
+    发推成功: 任务标记 SUCCEEDED，同一事务写入已完成的 processed_mentions 记录，
+    与 mention 触发的 roast 一起由投影器计入记忆表
+    """
+    session.add(ProcessedMention(
+        tweet_id=tweet_id,
+        author_id=job.requester_id,
+        author_username=job.requester_username,
+        tweet_text=tweet_text,
+        trigger_type=TriggerType.X_ROAST,
+        status=ProcessingStatus.COMPLETED,
+        target_handle=job.target_handle,
+        reply_tweet_id=tweet_id,
+        reply_text=tweet_text,
+        processed_at=func.now(),
+    ))
+    await session.execute(
+        update(RoastJob)
+        .where(RoastJob.id == job.id)
+        .values(
+            status=RoastJobStatus.SUCCEEDED,
+            roast_text=tweet_text,
+            tweet_id=tweet_id,
+            error=None,
+            updated_at=func.now(),
+            finished_at=func.now(),
+        )
+    )
+    await session.commit()
 
 
 # ============================================================
@@ -167,54 +849,10 @@ async def get_roast_leaderboard(
 
 async def get_roast_profile(session: AsyncSession, handle: str) -> Optional[RoastProfile]:
     """获取单个用户的被喷档案"""
-    result = await session.execute(
-        select(RoastProfile).where(RoastProfile.target_handle == handle.lower())
-    )
+    result = await session.execute(_ROAST_PROFILE_BY_HANDLE_STMT, {"handle": handle.lower()})
     return result.scalar_one_or_none()
 
 
-async def get_or_create_roast_profile(session: AsyncSession, handle: str) -> RoastProfile:
-    """获取或创建被喷者档案"""
-    profile = await get_roast_profile(session, handle)
-    if not profile:
-        profile = RoastProfile(target_handle=handle.lower())
-        session.add(profile)
-        await session.commit()
-        await session.refresh(profile)
-    return profile
-
-
-async def update_roast_profile_after_roast(
-    session: AsyncSession,
-    target_handle: str,
-    requester_id: str,
-) -> RoastProfile:
-    """喷人后更新被喷者档案"""
-    profile = await get_or_create_roast_profile(session, target_handle)
-
-    # 更新统计
-    profile.roast_count += 1
-    profile.last_roasted_at = datetime.utcnow()
-
-    if not profile.first_roasted_at:
-        profile.first_roasted_at = datetime.utcnow()
-
-    # 检查是否是新的喷人者
-    existing_roasters = await session.execute(
-        select(func.count(func.distinct(ProcessedMention.author_id)))
-        .where(
-            ProcessedMention.target_handle == target_handle.lower(),
-            ProcessedMention.trigger_type == TriggerType.X_ROAST,
-            ProcessedMention.status == ProcessingStatus.COMPLETED,
-        )
-    )
-    profile.unique_roasters = existing_roasters.scalar() or 0
-
-    await session.commit()
-    await session.refresh(profile)
-    return profile
-
-
 async def get_recent_roasts_for_target(
     session: AsyncSession,
     handle: str,
@@ -267,70 +905,10 @@ async def get_or_create_requester_profile(
     return profile
 
 
-async def update_requester_after_roast(
-    session: AsyncSession,
-    user_id: str,
-    username: str,
-    target_handle: str,
-) -> RequesterProfile:
-    """喷人后更新请求者画像"""
-    profile = await get_or_create_requester_profile(session, user_id, username)
-
-    profile.request_count += 1
-
-    # 更新 favorite_targets
-    targets = profile.favorite_targets or []
-    found = False
-    for t in targets:
-        if t.get("handle") == target_handle.lower():
-            t["count"] = t.get("count", 0) + 1
-            found = True
-            break
-    if not found:
-        targets.append({"handle": target_handle.lower(), "count": 1})
-
-    # 按 count 排序，保留前 10 个
-    targets.sort(key=lambda x: x.get("count", 0), reverse=True)
-    profile.favorite_targets = targets[:10]
-
-    await session.commit()
-    await session.refresh(profile)
-    return profile
-
-
 # ============================================================
 #  RevengeRelation CRUD (复仇关系)
 # ============================================================
 
-async def record_revenge_relation(
-    session: AsyncSession,
-    attacker_handle: str,
-    victim_handle: str,
-) -> RevengeRelation:
-    """记录复仇关系（attacker 喷了 victim）"""
-    result = await session.execute(
-        select(RevengeRelation).where(
-            RevengeRelation.attacker_handle == attacker_handle.lower(),
-            RevengeRelation.victim_handle == victim_handle.lower(),
-        )
-    )
-    relation = result.scalar_one_or_none()
-
-    if relation:
-        relation.attack_count += 1
-        relation.last_attack_at = datetime.utcnow()
-    else:
-        relation = RevengeRelation(
-            attacker_handle=attacker_handle.lower(),
-            victim_handle=victim_handle.lower(),
-        )
-        session.add(relation)
-
-    await session.commit()
-    await session.refresh(relation)
-    return relation
-
-
 async def get_revenge_context(
     session: AsyncSession,
     target_handle: str,
@@ -338,10 +916,8 @@ async def get_revenge_context(
 ) -> Optional[dict]:
     """检查 target 是否曾经喷过 requester（复仇模式）"""
     result = await session.execute(
-        select(RevengeRelation).where(
-            RevengeRelation.attacker_handle == target_handle.lower(),
-            RevengeRelation.victim_handle == requester_handle.lower(),
-        )
+        _REVENGE_BY_PAIR_STMT,
+        {"attacker": target_handle.lower(), "victim": requester_handle.lower()},
     )
     relation = result.scalar_one_or_none()
 
@@ -354,6 +930,56 @@ async def get_revenge_context(
     return None
 
 
+# ============================================================
+#  Roast Context (喷人前的上下文预取)
+# ============================================================
+
+async def get_roast_context(
+    session: AsyncSession,
+    target_handle: str,
+    requester_handle: str,
+) -> dict:
+    """
+    一次查询取回 target 的被喷次数 + 复仇关系
+    返回: {"roast_count": int, "revenge_context": Optional[dict]}
+    """
+    target = target_handle.lower()
+    requester = requester_handle.lower()
+    cache_key = (target, requester)
+
+    cached = _roast_context_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = await session.execute(
+        _ROAST_CONTEXT_STMT,
+        {"target": target, "requester": requester},
+    )
+    row = result.one()
+
+    revenge_ctx = None
+    if row.attack_count is not None:
+        revenge_ctx = {
+            "revenge_mode": True,
+            "attack_count": row.attack_count,
+            "last_attack_at": row.last_attack_at.isoformat() if row.last_attack_at else None,
+        }
+
+    context = {
+        "roast_count": row.roast_count or 0,
+        "revenge_context": revenge_ctx,
+    }
+    _roast_context_cache.set(cache_key, context)
+    return context
+
+
+def invalidate_roast_context(targets: list[str], pairs: list[tuple[str, str]]):
+    """记忆表投影后失效缓存: targets 的被喷次数、(attacker, victim) 的复仇关系"""
+    targets = set(targets)
+    pairs = set(pairs)
+    _roast_context_cache.invalidate_where(lambda key: key[0] in targets or key in pairs)
+
+
 # ============================================================
 #  Global Stats
 # ============================================================
@@ -419,6 +1045,63 @@ async def get_requester_profile_by_id(
     return result.scalar_one_or_none()
 
 
+async def get_requester_summary(session: AsyncSession, user_id: str) -> Optional[dict]:
+    """
+    登录用户的画像摘要 (仪表盘轮询热点)，命中缓存时不查库；不存在时返回 None 且不缓存
+    返回: {"user_id", "username", "request_count", "favorite_targets"}
+    """
+    cached = _requester_summary_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    profile = await get_requester_profile_by_id(session, user_id)
+    if not profile:
+        return None
+
+    summary = {
+        "user_id": profile.user_id,
+        "username": profile.username,
+        "request_count": profile.request_count,
+        "favorite_targets": profile.favorite_targets or [],
+    }
+    _requester_summary_cache.set(user_id, summary)
+    return summary
+
+
+def get_cached_requester_summary(user_id: str) -> Optional[dict]:
+    """只查缓存，不需要会话；命中时调用方不必借连接"""
+    return _requester_summary_cache.get(user_id)
+
+
+def invalidate_requester_summaries(user_ids: list[str]):
+    """失效本进程的缓存；其他进程由 publish_requester_summary_invalidation 广播"""
+    for user_id in user_ids:
+        _requester_summary_cache.invalidate(user_id)
+
+
+def invalidate_all_requester_summaries():
+    _requester_summary_cache.clear()
+
+
+async def publish_requester_summary_invalidation(conn, user_ids: Optional[list[str]]):
+    """
+    requester_profiles 变更后，在调用方事务内 NOTIFY (会话或连接均可)；提交后送达所有监听进程，回滚则不发送
+    user_ids 为 None 表示全部失效 (全量重建)
+    """
+    if user_ids is None:
+        batches = ["*"]
+    else:
+        batches = [
+            json.dumps(user_ids[i:i + REQUESTER_SUMMARY_NOTIFY_BATCH])
+            for i in range(0, len(user_ids), REQUESTER_SUMMARY_NOTIFY_BATCH)
+        ]
+    for payload in batches:
+        await conn.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": REQUESTER_SUMMARY_CHANNEL, "payload": payload},
+        )
+
+
 async def get_roasts_by_requester(
     session: AsyncSession,
     user_id: str,
@@ -451,3 +1134,25 @@ async def get_roasts_by_requester(
     roasts = result.scalars().all()
 
     return list(roasts), total
+
+
+async def put_oauth_state(session: AsyncSession, state: str, code_verifier: str, ttl_seconds: float):
+    """写入 PKCE state，并顺带清理已过期的行 (走 expires_at 索引，行数很少)"""
+    await session.execute(delete(OAuthState).where(OAuthState.expires_at <= func.now()))
+    session.add(OAuthState(
+        state=state,
+        code_verifier=code_verifier,
+        expires_at=func.now() + timedelta(seconds=ttl_seconds),
+    ))
+    await session.commit()
+
+
+async def pop_oauth_state(session: AsyncSession, state: str) -> Optional[str]:
+    """一次性取出未过期 state 的 code_verifier；并发回调只有一个能拿到"""
+    code_verifier = await session.scalar(
+        delete(OAuthState)
+        .where(OAuthState.state == state, OAuthState.expires_at > func.now())
+        .returning(OAuthState.code_verifier)
+    )
+    await session.commit()
+    return code_verifier
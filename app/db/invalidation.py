@@ -0,0 +1,93 @@
+"""
+[INPUT]: 依赖 asyncio, json, sqlalchemy, app.db.session, app.db.crud
+[OUTPUT]: 对外提供 RequesterSummaryListener, get_requester_summary_listener, run_requester_summary_listener 主循环
+[POS]: db 模块的跨进程缓存失效：api 进程 LISTEN 画像摘要失效通道，投影器 (worker 进程) / 登录回调 / 全量重建
+       在各自事务内 NOTIFY；被 app.bot.roles 在 api / all 角色启动
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import json
+from functools import lru_cache
+
+from sqlalchemy import text
+
+from app.db.session import get_engine
+from app.db import crud
+from app.utils.logger import logger
+
+
+class RequesterSummaryListener:
+    """
+    专用 AUTOCOMMIT 连接上 LISTEN，收到通知即失效本进程的画像摘要缓存
+    - 每次 (重新) 连上都清空整个缓存: 断开期间的通知已丢失，不能假定缓存仍然有效
+    - 每 check_interval 秒探测连接，断开后 retry_interval 秒重连；连接用完即丢弃，不回到池里
+    与 leader 锁相同，必须直连 Postgres (PgBouncer 事务池模式下 LISTEN 无效)
+    """
+
+    def __init__(self, retry_interval: float = 5.0, check_interval: float = 30.0):
+        self.retry_interval = retry_interval
+        self.check_interval = check_interval
+
+        self.listening = False
+        self.notifications = 0
+        self.reconnects = 0
+
+    def on_notify(self, connection, pid: int, channel: str, payload: str):
+        """asyncpg 回调，在事件循环线程中执行"""
+        self.notifications += 1
+        if payload == "*":
+            crud.invalidate_all_requester_summaries()
+            return
+        try:
+            crud.invalidate_requester_summaries(json.loads(payload))
+        except (ValueError, TypeError):
+            logger.warning(f"Malformed {channel} notification, clearing all summaries: {payload[:100]}")
+            crud.invalidate_all_requester_summaries()
+
+    async def run(self):
+        while True:
+            try:
+                async with get_engine("api").connect() as conn:
+                    await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    try:
+                        await self._listen(conn)
+                    finally:
+                        self.listening = False
+                        await conn.invalidate()
+
+            except asyncio.CancelledError:
+                logger.info("Requester summary listener cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"Requester summary listener disconnected: {e}")
+
+            await asyncio.sleep(self.retry_interval)
+
+    async def _listen(self, conn):
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.add_listener(crud.REQUESTER_SUMMARY_CHANNEL, self.on_notify)
+        crud.invalidate_all_requester_summaries()
+        self.listening = True
+        self.reconnects += 1
+        logger.info(f"Listening on {crud.REQUESTER_SUMMARY_CHANNEL}")
+
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await asyncio.wait_for(conn.scalar(text("SELECT 1")), timeout=self.check_interval)
+
+    def stats(self) -> dict:
+        return {
+            "listening": self.listening,
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+        }
+
+
+@lru_cache
+def get_requester_summary_listener() -> RequesterSummaryListener:
+    return RequesterSummaryListener()
+
+
+async def run_requester_summary_listener():
+    await get_requester_summary_listener().run()
@@ -1,6 +1,6 @@
 """
 [INPUT]: 依赖 app.db.base 的 Base
-[OUTPUT]: 对外提供 ProcessedMention, BotState, ActiveRoastRecord, RoastProfile, RequesterProfile, RevengeRelation 模型, ProcessingStatus, TriggerType 枚举
+[OUTPUT]: 对外提供 ProcessedMention, ProcessedMentionKey, ProcessedMentionArchive, ReplyOutbox, RoastJob, OAuthState, BotState, ActiveRoastRecord, RoastProfile, RequesterProfile, RevengeRelation 模型, ProcessingStatus, TriggerType, OutboxStatus, RoastJobStatus 枚举
 [POS]: db 模块的 ORM 模型定义，被 crud.py 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
@@ -11,7 +11,7 @@ from datetime import datetime
 
 from sqlalchemy import Column, String, DateTime, Text, Enum as SQLEnum, Index, Integer, Boolean, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 from app.db.base import Base
 
@@ -33,21 +33,40 @@ class TriggerType(enum.Enum):
     UNKNOWN = "unknown"
 
 
+class OutboxStatus(enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class RoastJobStatus(enum.Enum):
+    QUEUED = "queued"
+    GENERATING = "generating"
+    POSTING = "posting"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 # ============================================================
-#  已处理的 mention 记录
+#  已处理的 mention 记录 (按 created_at 月度分区)
 # ============================================================
 
 class ProcessedMention(Base):
+    """
+    分区表: 主键必须包含分区键，因此 DB 主键为 (id, created_at)，ORM 仍以 id 作为标识
+    tweet_id 的全局唯一性由 processed_mention_keys + INSERT 触发器保证
+    """
     __tablename__ = "processed_mentions"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     # ---- Twitter 推文信息 ----
-    tweet_id = Column(String(64), unique=True, nullable=False)
+    tweet_id = Column(String(64), nullable=False)
     author_id = Column(String(64), nullable=False)
     author_username = Column(String(64), nullable=False)
-    tweet_text = Column(Text, nullable=False)
+    tweet_text = Column(Text, nullable=False)  # 归档后清空，原文移入 processed_mentions_archive
     reply_to_tweet_id = Column(String(64), nullable=True)  # 所属 thread 的原推 ID
+    payload = Column(JSONB, nullable=True)  # 解析后的完整 mention，重启恢复 / 重新入队时据此重跑；终态或入 outbox 后清空
 
     # ---- 处理信息 ----
     trigger_type = Column(SQLEnum(TriggerType), nullable=False)
@@ -61,16 +80,157 @@ class ProcessedMention(Base):
     # ---- 错误信息 ----
     error_message = Column(Text, nullable=True)
 
-    # ---- 时间戳 ----
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # ---- 时间戳 (分区键) ----
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     processed_at = Column(DateTime(timezone=True), nullable=True)
+    # ---- 业务列变更时由 BEFORE UPDATE 触发器推进 (租约 / payload / 归档不算)，增量导出的水位列 ----
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # ---- 工作队列租约 (worker 认领时写入，心跳续期；到期后其他 worker 可重新认领) ----
+    claimed_by = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
 
     __table_args__ = (
         Index("ix_processed_mentions_tweet_id", "tweet_id"),
         Index("ix_processed_mentions_status", "status"),
         Index("ix_processed_mentions_created_at", "created_at"),
+        Index("ix_processed_mentions_processed_at", "processed_at"),  # 记忆表投影按完成时间扫描窗口
+        Index("ix_processed_mentions_updated_at", "updated_at"),  # 增量导出按最后变更时间扫描
         Index("ix_processed_mentions_thread_target", "reply_to_tweet_id", "target_handle"),
         Index("ix_processed_mentions_thread_requester", "reply_to_tweet_id", "author_id"),
+        # ---- 认领扫描只看未完成的行，部分索引保持很小 ----
+        Index(
+            "ix_processed_mentions_claimable", "created_at",
+            postgresql_where=text("status IN ('PENDING', 'PROCESSING')"),
+        ),
+        # ---- 公平认领按作者取候选 (每个作者最早的几条) ----
+        Index(
+            "ix_processed_mentions_author_claimable", "author_id", "created_at",
+            postgresql_where=text("status IN ('PENDING', 'PROCESSING')"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# ============================================================
+#  mention 去重键 (不分区，tweet_id 全局唯一)
+# ============================================================
+
+class ProcessedMentionKey(Base):
+    """紧凑的幂等键表，由 processed_mentions 的 BEFORE INSERT 触发器写入；按 tweet_id 定位分区时提供 created_at，随分区一起删除"""
+    __tablename__ = "processed_mention_keys"
+
+    tweet_id = Column(String(64), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_processed_mention_keys_created_at", "created_at"),
+    )
+
+
+# ============================================================
+#  mention 冷归档 (旧分区的大文本)
+# ============================================================
+
+class ProcessedMentionArchive(Base):
+    """旧分区的 tweet_text / reply_text / error_message 压缩后存放于此"""
+    __tablename__ = "processed_mentions_archive"
+
+    tweet_id = Column(String(64), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    payload = Column(JSONB, nullable=False)  # {"tweet_text", "reply_text", "error_message"}
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# ============================================================
+#  回复发件箱 (生成结果先落库，再由 dispatcher 发送)
+# ============================================================
+
+class ReplyOutbox(Base):
+    """
+    每条 mention 至多一条待发回复；发送失败按 not_before 退避重试，重试只调用 Twitter
+    not_before 同时承担反检测延迟与认领租约 (认领时推后 lease 秒，进程崩溃后自动重新可见)
+    """
+    __tablename__ = "reply_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # ---- 回复目标 ----
+    mention_tweet_id = Column(String(64), unique=True, nullable=False)
+    reply_text = Column(Text, nullable=False)
+    final_status = Column(SQLEnum(ProcessingStatus), nullable=False)  # 发送成功后写回 processed_mentions 的状态
+
+    # ---- 投递状态 ----
+    status = Column(SQLEnum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    not_before = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    reply_tweet_id = Column(String(64), nullable=True)
+
+    # ---- 时间戳 ----
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_reply_outbox_due", "status", "not_before"),
+    )
+
+
+# ============================================================
+#  网页端 roast 任务
+# ============================================================
+
+class RoastJob(Base):
+    """
+    /auth/roast 提交的异步任务: API 只落库并返回 202，由 worker 角色生成并发推
+    not_before 同 ReplyOutbox: 既是延后时间 (额度不足) 也是认领租约，进程崩溃后到期重新可见
+    roast_text 生成后立即保存，重新认领时跳过生成直接发推；租约到期时仍为 POSTING 的任务结果未知，标记 FAILED 不重发
+    """
+    __tablename__ = "roast_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # ---- 请求 ----
+    requester_id = Column(String(64), nullable=False)
+    requester_username = Column(String(64), nullable=False)
+    target_handle = Column(String(64), nullable=False)
+
+    # ---- 进度 ----
+    status = Column(SQLEnum(RoastJobStatus), default=RoastJobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    not_before = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    roast_text = Column(Text, nullable=True)
+    tweet_id = Column(String(64), nullable=True)
+    error = Column(Text, nullable=True)
+
+    # ---- 时间戳 ----
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_roast_jobs_due", "not_before", postgresql_where=text("status IN ('QUEUED', 'GENERATING', 'POSTING')")),
+        Index("ix_roast_jobs_requester", "requester_id", "created_at"),
+    )
+
+
+# ============================================================
+#  OAuth PKCE state (多 API 进程共享)
+# ============================================================
+
+class OAuthState(Base):
+    """登录发起时写入，回调时 DELETE ... RETURNING 一次性取出；过期行在写入时顺带清理"""
+    __tablename__ = "oauth_states"
+
+    state = Column(String(64), primary_key=True)
+    code_verifier = Column(String(128), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_oauth_states_expires_at", "expires_at"),
     )
 
 
@@ -205,9 +365,11 @@ class RevengeRelation(Base):
 
     # ---- 时间戳 ----
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
     __table_args__ = (
         UniqueConstraint("attacker_handle", "victim_handle", name="uq_revenge_attacker_victim"),
         Index("ix_revenge_attacker", "attacker_handle"),
         Index("ix_revenge_victim", "victim_handle"),
+        Index("ix_revenge_relations_updated_at", "updated_at"),
     )
@@ -0,0 +1,191 @@
+"""
+[INPUT]: 依赖 sqlalchemy (同步 Connection)
+[OUTPUT]: 对外提供 processed_mentions 分区维护: partition_name, next_month, month_range, install_claim_trigger,
+          ensure_monthly_partitions, list_monthly_partitions, archive_partition, drop_partition
+[POS]: db 模块的分区/归档 DDL 工具，被 app.db.schema 与 app.jobs.retention 使用 (异步调用方走 run_sync)；
+       alembic 历史迁移内联自己的 DDL，不依赖本模块，本模块的后续修改不会改变已发布的迁移
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARENT_TABLE = "processed_mentions"
+DEFAULT_PARTITION = "processed_mentions_default"
+_PARTITION_PATTERN = re.compile(r"^processed_mentions_p(\d{4})(\d{2})$")
+
+
+# ============================================================
+#  命名 & 日期
+# ============================================================
+
+def partition_name(month_start: date) -> str:
+    return f"{PARENT_TABLE}_p{month_start:%Y%m}"
+
+
+def next_month(month_start: date) -> date:
+    if month_start.month == 12:
+        return date(month_start.year + 1, 1, 1)
+    return date(month_start.year, month_start.month + 1, 1)
+
+
+def month_range(start: date, end: date) -> list[date]:
+    """[start 所在月, end 所在月] 的月初列表"""
+    current = date(start.year, start.month, 1)
+    last = date(end.year, end.month, 1)
+    months = []
+    while current <= last:
+        months.append(current)
+        current = next_month(current)
+    return months
+
+
+# ============================================================
+#  DDL
+# ============================================================
+
+def install_claim_trigger(conn: Connection):
+    """INSERT 时先占用 processed_mention_keys，重复 tweet_id 触发唯一约束冲突"""
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION processed_mentions_claim_key() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO processed_mention_keys (tweet_id, created_at)
+            VALUES (NEW.tweet_id, NEW.created_at);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    conn.execute(text(f"DROP TRIGGER IF EXISTS trg_processed_mentions_claim_key ON {PARENT_TABLE}"))
+    conn.execute(text(f"""
+        CREATE TRIGGER trg_processed_mentions_claim_key
+        BEFORE INSERT ON {PARENT_TABLE}
+        FOR EACH ROW EXECUTE FUNCTION processed_mentions_claim_key()
+    """))
+
+
+def ensure_monthly_partitions(conn: Connection, start: date, end: date) -> list[str]:
+    """
+    创建 [start, end] 覆盖的月度分区及 DEFAULT 分区，返回新建的分区名
+    DEFAULT 分区里已有该月的行时 (分区没有及时预建)，直接 PARTITION OF 会因 DEFAULT 约束冲突失败，
+    此时先建独立表、把这些行从 DEFAULT 搬过去，再 ATTACH
+    """
+    existing = {name for name, _ in list_monthly_partitions(conn)}
+    has_default = conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is not None
+    created = []
+
+    for month_start in month_range(start, end):
+        name = partition_name(month_start)
+        if name in existing:
+            continue
+        bounds = f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{next_month(month_start).isoformat()}')"
+        if has_default and _default_rows_in(conn, month_start):
+            _create_from_default(conn, name, month_start, bounds)
+        else:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        created.append(name)
+
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+    return created
+
+
+def _month_predicate(month_start: date) -> str:
+    return f"created_at >= '{month_start.isoformat()}' AND created_at < '{next_month(month_start).isoformat()}'"
+
+
+def _default_rows_in(conn: Connection, month_start: date) -> bool:
+    return conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {_month_predicate(month_start)})"
+    )).scalar()
+
+
+def _create_from_default(conn: Connection, name: str, month_start: date, bounds: str) -> int:
+    """
+    独立表不触发父表的占键触发器，搬运不会与 processed_mention_keys 冲突
+    ATTACH 时按父表自动补建索引与主键；整个过程在调用方事务内，失败即整体回滚
+    """
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    moved = conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE {_month_predicate(month_start)} RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """)).rowcount
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {bounds}"))
+    return moved
+
+
+def list_monthly_partitions(conn: Connection) -> list[tuple[str, date]]:
+    """列出月度分区 (名称, 月初)，按时间升序，不含 DEFAULT 分区"""
+    rows = conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {"parent": PARENT_TABLE}).scalars().all()
+
+    partitions = []
+    for name in rows:
+        match = _PARTITION_PATTERN.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+# ============================================================
+#  冷归档
+# ============================================================
+
+def archive_partition(conn: Connection, name: str, keep_reply_chars: int = 200) -> int:
+    """
+    将分区内的大文本移入 processed_mentions_archive，热行只保留去重/统计字段
+    reply_text 保留前 keep_reply_chars 个字符 (与历史列表展示长度一致)
+    error_message 置为空串而非 NULL，保留 "出过错" 标记供记忆表投影过滤
+    已结束行的 payload (解析后 mention 的完整副本，原文已在归档里) 置为 NULL；未结束的行仍需据此重跑，保留
+    幂等: 已归档的行 tweet_text 为空串、payload 为 NULL，不会重复处理
+    """
+    if not _PARTITION_PATTERN.match(name):
+        raise ValueError(f"Not a monthly partition: {name}")
+
+    finished = "status IN ('COMPLETED', 'FAILED')"
+    pending = f"tweet_text <> '' OR error_message <> '' OR (payload IS NOT NULL AND {finished})"
+
+    conn.execute(text(f"""
+        INSERT INTO processed_mentions_archive (tweet_id, created_at, payload)
+        SELECT tweet_id, created_at, jsonb_build_object(
+            'tweet_text', tweet_text,
+            'reply_text', reply_text,
+            'error_message', error_message
+        )
+        FROM {name}
+        WHERE {pending}
+        ON CONFLICT (tweet_id) DO NOTHING
+    """))
+
+    result = conn.execute(text(f"""
+        UPDATE {name}
+        SET tweet_text = '',
+            reply_text = left(reply_text, :keep_reply_chars),
+            error_message = CASE WHEN error_message IS NULL THEN NULL ELSE '' END,
+            payload = CASE WHEN {finished} THEN NULL ELSE payload END
+        WHERE {pending}
+    """), {"keep_reply_chars": keep_reply_chars})
+    return result.rowcount
+
+
+def drop_partition(conn: Connection, name: str) -> int:
+    """
+    整体删除一个已归档的月度分区，连同该月的去重键，返回删除的去重键数
+    DETACH 后 DROP，不扫描分区内的行；去重键表按 created_at 索引删除，两张表覆盖的时间窗口保持一致
+    该月的 tweet 即使被重新投递也会再次入队 (早已超出 Filtered Stream 的回放窗口)
+    """
+    match = _PARTITION_PATTERN.match(name)
+    if not match:
+        raise ValueError(f"Not a monthly partition: {name}")
+    month_start = date(int(match.group(1)), int(match.group(2)), 1)
+
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
+    return conn.execute(text(f"DELETE FROM processed_mention_keys WHERE {_month_predicate(month_start)}")).rowcount
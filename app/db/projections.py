@@ -0,0 +1,440 @@
+"""
+[INPUT]: 依赖 sqlalchemy (AsyncConnection), app.db.models 的 TriggerType, ProcessingStatus
+[OUTPUT]: 对外提供 ROAST_MEMORY_HWM_KEY, ROAST_MEMORY_LOCK_ID, ProjectionBatch, project_roast_memory,
+          MEMORY_TABLES, TableDiff, rebuild_roast_memory
+[POS]: db 模块的记忆表投影: 从已完成的 X_ROAST processed_mentions 批量派生 roast_profiles / requester_profiles / revenge_relations
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+
+投影规则 (与旧的逐条更新语义一致):
+- roast_profiles: target 的 roast_count += 窗口内次数, unique_roasters 按全量重算, first/last_roasted_at 取极值
+- requester_profiles: request_count += 窗口内次数, favorite_targets 合并后保留前 10
+- revenge_relations: (requester_username, target) 的 attack_count += 窗口内次数
+事件 = trigger_type=X_ROAST, status=COMPLETED, target_handle 非空, error_message 为 NULL (生成失败只回了错误提示的不计)
+
+高水位 (bot_state[ROAST_MEMORY_HWM_KEY]) 之后、now() - lag 之前的事件为一个窗口；
+整批在同一事务内写入计数并推进水位，失败回滚后下一轮重放同一窗口。
+水位缺失时从头重放；全量修复走 rebuild_roast_memory (一次性集合式重算 + 同事务替换)。
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.models import TriggerType, ProcessingStatus
+
+ROAST_MEMORY_HWM_KEY = "projector:roast_memory:hwm"
+
+# ---- pg_advisory_xact_lock 键，多副本同时运行时只有一个执行投影 ----
+ROAST_MEMORY_LOCK_ID = 0x726F6173  # "roas"
+
+_EVENT_FILTER = {
+    "x_roast": TriggerType.X_ROAST.name,
+    "completed": ProcessingStatus.COMPLETED.name,
+}
+
+# ---- 窗口内的事件，按 (作者, 目标) 预聚合 ----
+_WINDOW_EVENTS = """
+    SELECT author_id,
+           max(author_username) AS author_username,
+           lower(max(author_username)) AS attacker,
+           target_handle AS target,
+           count(*) AS cnt,
+           min(processed_at) AS first_at,
+           max(processed_at) AS last_at
+    FROM processed_mentions
+    WHERE trigger_type = :x_roast
+      AND status = :completed
+      AND target_handle IS NOT NULL
+      AND error_message IS NULL
+      AND processed_at > :lo
+      AND processed_at <= :hi
+    GROUP BY author_id, target_handle
+"""
+
+
+@dataclass
+class ProjectionBatch:
+    """一次投影的结果"""
+    applied: bool = False                  # False: 另一个副本持有锁，本轮跳过
+    low: Optional[datetime] = None
+    high: Optional[datetime] = None
+    events: int = 0
+    targets: list[str] = field(default_factory=list)
+    pairs: list[tuple[str, str]] = field(default_factory=list)   # (attacker, victim)
+    requesters: list[str] = field(default_factory=list)          # requester_profiles 受影响的 user_id
+
+
+async def project_roast_memory(conn: AsyncConnection, lag_seconds: float = 10.0) -> ProjectionBatch:
+    """在调用方的事务内执行一轮投影 (调用方负责 begin/commit)"""
+    batch = ProjectionBatch()
+
+    locked = await conn.scalar(text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": ROAST_MEMORY_LOCK_ID})
+    if not locked:
+        return batch
+    batch.applied = True
+
+    # ---- 1. 确定窗口 (hwm, now - lag] ----
+    low = await conn.scalar(
+        text("SELECT CAST(value AS timestamptz) FROM bot_state WHERE key = :key"),
+        {"key": ROAST_MEMORY_HWM_KEY},
+    )
+    high = await conn.scalar(text("SELECT now() - make_interval(secs => :lag)"), {"lag": lag_seconds})
+    low = low or datetime(1970, 1, 1, tzinfo=high.tzinfo)
+    batch.low, batch.high = low, high
+    if high <= low:
+        return batch
+
+    batch.events = await _load_events(conn, low, high)
+    if batch.events:
+        await _apply_roast_profiles(conn)
+        await _apply_requester_profiles(conn)
+        await _apply_revenge_relations(conn)
+
+        batch.targets = list((await conn.execute(text("SELECT DISTINCT target FROM _roast_events"))).scalars())
+        batch.pairs = [
+            (row.attacker, row.target)
+            for row in await conn.execute(text("SELECT DISTINCT attacker, target FROM _roast_events"))
+        ]
+        batch.requesters = list((await conn.execute(text("SELECT DISTINCT author_id FROM _roast_events"))).scalars())
+
+    # ---- 2. 推进水位 (与计数写入同一事务) ----
+    await _set_high_water_mark(conn, high)
+    return batch
+
+
+async def _load_events(conn: AsyncConnection, low: datetime, high: datetime) -> int:
+    """把窗口事件聚合进事务级临时表 _roast_events，返回事件数"""
+    # ---- CREATE TABLE AS 不接受绑定参数，先建表再 INSERT ... SELECT ----
+    await conn.execute(text("""
+        CREATE TEMP TABLE _roast_events (
+            author_id varchar(64), author_username varchar(64), attacker varchar(64), target varchar(64),
+            cnt bigint, first_at timestamptz, last_at timestamptz
+        ) ON COMMIT DROP
+    """))
+    await conn.execute(text(f"INSERT INTO _roast_events {_WINDOW_EVENTS}"), {**_EVENT_FILTER, "lo": low, "hi": high})
+    return await conn.scalar(text("SELECT coalesce(sum(cnt), 0) FROM _roast_events"))
+
+
+async def _set_high_water_mark(conn: AsyncConnection, high: datetime):
+    await conn.execute(
+        text("""
+            INSERT INTO bot_state (id, key, value, updated_at)
+            VALUES (gen_random_uuid(), :key, :value, now())
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = now()
+        """),
+        {"key": ROAST_MEMORY_HWM_KEY, "value": high.isoformat()},
+    )
+
+
+# ============================================================
+#  增量: 各表的集合式更新
+# ============================================================
+
+async def _apply_roast_profiles(conn: AsyncConnection):
+    await conn.execute(text("""
+        INSERT INTO roast_profiles (id, target_handle, roast_count, unique_roasters,
+                                    first_roasted_at, last_roasted_at, roast_themes, created_at, updated_at)
+        SELECT gen_random_uuid(), target, sum(cnt), 0, min(first_at), max(last_at), '[]'::jsonb, now(), now()
+        FROM _roast_events
+        GROUP BY target
+        ON CONFLICT (target_handle) DO UPDATE SET
+            roast_count = roast_profiles.roast_count + EXCLUDED.roast_count,
+            first_roasted_at = LEAST(roast_profiles.first_roasted_at, EXCLUDED.first_roasted_at),
+            last_roasted_at = GREATEST(roast_profiles.last_roasted_at, EXCLUDED.last_roasted_at),
+            updated_at = now()
+    """))
+
+    # ---- 去重人数不可增量累加，只对本批涉及的 target 按全量重算 ----
+    await conn.execute(
+        text("""
+            UPDATE roast_profiles rp
+            SET unique_roasters = agg.roasters
+            FROM (
+                SELECT pm.target_handle, count(DISTINCT pm.author_id) AS roasters
+                FROM processed_mentions pm
+                WHERE pm.target_handle IN (SELECT DISTINCT target FROM _roast_events)
+                  AND pm.trigger_type = :x_roast
+                  AND pm.status = :completed
+                  AND pm.error_message IS NULL
+                GROUP BY pm.target_handle
+            ) agg
+            WHERE rp.target_handle = agg.target_handle
+        """),
+        _EVENT_FILTER,
+    )
+
+
+async def _apply_requester_profiles(conn: AsyncConnection):
+    await conn.execute(text("""
+        INSERT INTO requester_profiles (id, user_id, username, request_count, favorite_targets,
+                                        is_registered, created_at, updated_at)
+        SELECT gen_random_uuid(), author_id, max(author_username), sum(cnt), '[]'::jsonb, false, now(), now()
+        FROM _roast_events
+        GROUP BY author_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            username = EXCLUDED.username,
+            request_count = requester_profiles.request_count + EXCLUDED.request_count,
+            updated_at = now()
+    """))
+
+    # ---- favorite_targets: 旧列表 + 本批增量按 handle 合并，按次数保留前 10 ----
+    await conn.execute(text("""
+        UPDATE requester_profiles rp
+        SET favorite_targets = (
+            SELECT coalesce(jsonb_agg(jsonb_build_object('handle', merged.handle, 'count', merged.cnt)
+                                      ORDER BY merged.cnt DESC, merged.handle), '[]'::jsonb)
+            FROM (
+                SELECT handle, sum(cnt) AS cnt
+                FROM (
+                    SELECT elem->>'handle' AS handle, (elem->>'count')::int AS cnt
+                    FROM jsonb_array_elements(coalesce(rp.favorite_targets, '[]'::jsonb)) elem
+                    UNION ALL
+                    SELECT ev.target, ev.cnt FROM _roast_events ev WHERE ev.author_id = rp.user_id
+                ) combined
+                GROUP BY handle
+                ORDER BY cnt DESC, handle
+                LIMIT 10
+            ) merged
+        )
+        WHERE rp.user_id IN (SELECT DISTINCT author_id FROM _roast_events)
+    """))
+
+
+async def _apply_revenge_relations(conn: AsyncConnection):
+    await conn.execute(text("""
+        INSERT INTO revenge_relations (id, attacker_handle, victim_handle, attack_count, last_attack_at,
+                                       created_at, updated_at)
+        SELECT gen_random_uuid(), attacker, target, sum(cnt), max(last_at), now(), now()
+        FROM _roast_events
+        GROUP BY attacker, target
+        ON CONFLICT (attacker_handle, victim_handle) DO UPDATE SET
+            attack_count = revenge_relations.attack_count + EXCLUDED.attack_count,
+            last_attack_at = GREATEST(revenge_relations.last_attack_at, EXCLUDED.last_attack_at),
+            updated_at = now()
+    """))
+
+
+# ============================================================
+#  全量重建: 临时表重算 → diff → 同事务替换
+# ============================================================
+
+MEMORY_TABLES = ("roast_profiles", "requester_profiles", "revenge_relations")
+
+
+@dataclass
+class TableDiff:
+    """重建结果与现有表的差异 (按业务键对齐)"""
+    table: str
+    current: int = 0
+    rebuilt: int = 0
+    added: int = 0       # 重建后新增的键
+    removed: int = 0     # 现有表中多出的键
+    changed: int = 0      # 键相同但计数不同
+    count_delta: int = 0  # 主计数列 (roast_count / request_count / attack_count) 总和的变化
+
+
+# ---- (业务键列, 主计数列, 参与比较的列)；时间戳与 favorite_targets 顺序不参与比较，避免并列排序造成噪音 ----
+_REBUILD_SPECS = {
+    "roast_profiles": (("target_handle",), "roast_count", ("roast_count", "unique_roasters")),
+    "requester_profiles": (("user_id",), "request_count", ("request_count",)),
+    "revenge_relations": (("attacker_handle", "victim_handle"), "attack_count", ("attack_count",)),
+}
+
+
+async def rebuild_roast_memory(
+    conn: AsyncConnection,
+    apply: bool = True,
+    lag_seconds: float = 10.0,
+    on_step=None,
+) -> list[TableDiff]:
+    """
+    在调用方的事务内从 processed_mentions 全量重算三张记忆表
+    apply=False 只计算 diff (调用方应回滚)；apply=True 同事务内替换并把投影水位置为重算上界
+    on_step(name, seconds): 每个阶段结束时回调，用于打印耗时
+    """
+    step = _StepTimer(on_step)
+
+    # ---- 阻塞等待投影器释放锁，重建期间投影器本轮跳过 ----
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": ROAST_MEMORY_LOCK_ID})
+    high = await conn.scalar(text("SELECT now() - make_interval(secs => :lag)"), {"lag": lag_seconds})
+    step("lock")
+
+    await _load_events(conn, datetime(1970, 1, 1, tzinfo=high.tzinfo), high)
+    step("aggregate events")
+
+    await _build_rebuilt_tables(conn)
+    step("build temp tables")
+
+    diffs = [await _diff_table(conn, table) for table in MEMORY_TABLES]
+    step("diff")
+
+    if apply:
+        await _swap_roast_profiles(conn)
+        await _swap_requester_profiles(conn)
+        await _swap_revenge_relations(conn)
+        await _set_high_water_mark(conn, high)
+        step("swap")
+
+    return diffs
+
+
+class _StepTimer:
+    def __init__(self, on_step):
+        self._on_step = on_step
+        self._last = time.perf_counter()
+
+    def __call__(self, name: str):
+        now = time.perf_counter()
+        if self._on_step:
+            self._on_step(name, now - self._last)
+        self._last = now
+
+
+async def _build_rebuilt_tables(conn: AsyncConnection):
+    # ---- _roast_events 已按 (author_id, target) 聚合，每行即一个 (作者, 目标) 对 ----
+    await conn.execute(text("""
+        CREATE TEMP TABLE _rebuilt_roast_profiles ON COMMIT DROP AS
+        SELECT target AS target_handle,
+               sum(cnt)::int AS roast_count,
+               count(DISTINCT author_id)::int AS unique_roasters,
+               min(first_at) AS first_roasted_at,
+               max(last_at) AS last_roasted_at
+        FROM _roast_events
+        GROUP BY target
+    """))
+
+    await conn.execute(text("""
+        CREATE TEMP TABLE _rebuilt_requester_profiles ON COMMIT DROP AS
+        SELECT totals.user_id, totals.username, totals.request_count,
+               coalesce(top.favorite_targets, '[]'::jsonb) AS favorite_targets
+        FROM (
+            SELECT author_id AS user_id, max(author_username) AS username, sum(cnt)::int AS request_count
+            FROM _roast_events
+            GROUP BY author_id
+        ) totals
+        LEFT JOIN (
+            SELECT author_id,
+                   jsonb_agg(jsonb_build_object('handle', target, 'count', cnt) ORDER BY cnt DESC, target) AS favorite_targets
+            FROM (
+                SELECT author_id, target, sum(cnt) AS cnt,
+                       row_number() OVER (PARTITION BY author_id ORDER BY sum(cnt) DESC, target) AS pos
+                FROM _roast_events
+                GROUP BY author_id, target
+            ) ranked
+            WHERE pos <= 10
+            GROUP BY author_id
+        ) top ON top.author_id = totals.user_id
+    """))
+
+    await conn.execute(text("""
+        CREATE TEMP TABLE _rebuilt_revenge_relations ON COMMIT DROP AS
+        SELECT attacker AS attacker_handle, target AS victim_handle,
+               sum(cnt)::int AS attack_count, max(last_at) AS last_attack_at
+        FROM _roast_events
+        GROUP BY attacker, target
+    """))
+
+
+async def _diff_table(conn: AsyncConnection, table: str) -> TableDiff:
+    key_columns, count_column, compared = _REBUILD_SPECS[table]
+    join = " AND ".join(f"cur.{column} = reb.{column}" for column in key_columns)
+    first_key = key_columns[0]
+    cur_values = ", ".join(f"cur.{column}" for column in compared)
+    new_values = ", ".join(f"reb.{column}" for column in compared)
+
+    row = (await conn.execute(text(f"""
+        SELECT count(cur.{first_key}) AS current,
+               count(reb.{first_key}) AS rebuilt,
+               count(*) FILTER (WHERE cur.{first_key} IS NULL) AS added,
+               count(*) FILTER (WHERE reb.{first_key} IS NULL) AS removed,
+               count(*) FILTER (
+                   WHERE cur.{first_key} IS NOT NULL AND reb.{first_key} IS NOT NULL
+                     AND ({cur_values}) IS DISTINCT FROM ({new_values})
+               ) AS changed,
+               coalesce(sum(reb.{count_column}), 0) - coalesce(sum(cur.{count_column}), 0) AS count_delta
+        FROM {table} cur
+        FULL OUTER JOIN _rebuilt_{table} reb ON {join}
+    """))).one()
+
+    return TableDiff(
+        table=table,
+        current=row.current,
+        rebuilt=row.rebuilt,
+        added=row.added,
+        removed=row.removed,
+        changed=row.changed,
+        count_delta=int(row.count_delta),
+    )
+
+
+async def _swap_roast_profiles(conn: AsyncConnection):
+    # ---- upsert 保留 id / roast_themes / target_user_id，再删除无事件支撑的档案 ----
+    await conn.execute(text("""
+        INSERT INTO roast_profiles (id, target_handle, roast_count, unique_roasters,
+                                    first_roasted_at, last_roasted_at, roast_themes, created_at, updated_at)
+        SELECT gen_random_uuid(), target_handle, roast_count, unique_roasters,
+               first_roasted_at, last_roasted_at, '[]'::jsonb, now(), now()
+        FROM _rebuilt_roast_profiles
+        ON CONFLICT (target_handle) DO UPDATE SET
+            roast_count = EXCLUDED.roast_count,
+            unique_roasters = EXCLUDED.unique_roasters,
+            first_roasted_at = EXCLUDED.first_roasted_at,
+            last_roasted_at = EXCLUDED.last_roasted_at,
+            updated_at = now()
+    """))
+    await conn.execute(text("""
+        DELETE FROM roast_profiles rp
+        WHERE NOT EXISTS (SELECT 1 FROM _rebuilt_roast_profiles reb WHERE reb.target_handle = rp.target_handle)
+    """))
+
+
+async def _swap_requester_profiles(conn: AsyncConnection):
+    # ---- 登录 / OAuth 字段不由事件派生，只覆盖计数列 ----
+    await conn.execute(text("""
+        INSERT INTO requester_profiles (id, user_id, username, request_count, favorite_targets,
+                                        is_registered, created_at, updated_at)
+        SELECT gen_random_uuid(), user_id, username, request_count, favorite_targets, false, now(), now()
+        FROM _rebuilt_requester_profiles
+        ON CONFLICT (user_id) DO UPDATE SET
+            request_count = EXCLUDED.request_count,
+            favorite_targets = EXCLUDED.favorite_targets,
+            updated_at = now()
+    """))
+
+    # ---- 无事件的注册用户清零保留，未注册的直接删除 ----
+    await conn.execute(text("""
+        UPDATE requester_profiles rp
+        SET request_count = 0, favorite_targets = '[]'::jsonb, updated_at = now()
+        WHERE rp.is_registered
+          AND NOT EXISTS (SELECT 1 FROM _rebuilt_requester_profiles reb WHERE reb.user_id = rp.user_id)
+          AND (rp.request_count <> 0 OR rp.favorite_targets IS DISTINCT FROM '[]'::jsonb)
+    """))
+    await conn.execute(text("""
+        DELETE FROM requester_profiles rp
+        WHERE NOT coalesce(rp.is_registered, false)
+          AND NOT EXISTS (SELECT 1 FROM _rebuilt_requester_profiles reb WHERE reb.user_id = rp.user_id)
+    """))
+
+
+async def _swap_revenge_relations(conn: AsyncConnection):
+    await conn.execute(text("""
+        INSERT INTO revenge_relations (id, attacker_handle, victim_handle, attack_count, last_attack_at,
+                                       created_at, updated_at)
+        SELECT gen_random_uuid(), attacker_handle, victim_handle, attack_count, last_attack_at, now(), now()
+        FROM _rebuilt_revenge_relations
+        ON CONFLICT (attacker_handle, victim_handle) DO UPDATE SET
+            attack_count = EXCLUDED.attack_count,
+            last_attack_at = EXCLUDED.last_attack_at,
+            updated_at = now()
+    """))
+    await conn.execute(text("""
+        DELETE FROM revenge_relations rr
+        WHERE NOT EXISTS (
+            SELECT 1 FROM _rebuilt_revenge_relations reb
+            WHERE reb.attacker_handle = rr.attacker_handle AND reb.victim_handle = rr.victim_handle
+        )
+    """))
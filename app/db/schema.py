@@ -0,0 +1,84 @@
+"""
+[INPUT]: 依赖 alembic (Config / ScriptDirectory), sqlalchemy, app.db.base, app.db.models, app.db.partitions, app.db.session
+[OUTPUT]: 对外提供 alembic_config, head_revision, current_revision, verify_schema, bootstrap_schema, is_empty_database
+[POS]: db 模块的 schema 版本管理：启动时只读校验 alembic 版本，建表/迁移由 app.jobs.migrate 显式执行
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.base import Base
+from app.db import models  # noqa: F401  (注册全部模型到 Base.metadata)
+from app.db.partitions import ensure_monthly_partitions, install_claim_trigger
+from app.db.session import get_engine
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def alembic_config() -> Config:
+    """不依赖当前工作目录的 alembic 配置"""
+    config = Config(str(_PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(_PROJECT_ROOT / "alembic"))
+    return config
+
+
+@lru_cache
+def head_revision() -> str:
+    """代码中的迁移 head (只读迁移脚本，不连数据库)"""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(conn: AsyncConnection) -> Optional[str]:
+    """数据库当前的 alembic 版本；未纳入 alembic 管理时返回 None"""
+    exists = await conn.scalar(text("SELECT to_regclass('alembic_version') IS NOT NULL"))
+    if not exists:
+        return None
+    return await conn.scalar(text("SELECT version_num FROM alembic_version"))
+
+
+async def verify_schema():
+    """
+    启动校验: 单次只读查询，不取 DDL 锁
+    版本不一致时拒绝启动，提示先执行 python -m app.jobs.migrate
+    """
+    expected = head_revision()
+    async with get_engine("bot").connect() as conn:
+        actual = await current_revision(conn)
+
+    if actual != expected:
+        raise RuntimeError(
+            f"Database schema revision is {actual or 'missing'}, expected {expected}. "
+            f"Run `python -m app.jobs.migrate` before starting the app."
+        )
+
+
+# ============================================================
+#  空库初始化 (由 app.jobs.migrate 调用)
+# ============================================================
+
+def bootstrap_schema(conn: Connection, months_ahead: int = 3):
+    """
+    空库建表: 迁移链的起点假设基础表已存在，空库直接按当前模型建到 head
+    建表后由调用方 stamp head
+    """
+    Base.metadata.create_all(conn)
+
+    today = date.today()
+    ensure_monthly_partitions(conn, today, today + timedelta(days=31 * months_ahead))
+    install_claim_trigger(conn)
+    conn.execute(text("ALTER TABLE processed_mentions_archive SET (toast_tuple_target = 128)"))
+
+
+def is_empty_database(conn: Connection) -> bool:
+    """既没有 alembic_version 也没有任何业务表"""
+    tables = set(inspect(conn).get_table_names())
+    return "alembic_version" not in tables and not tables & set(Base.metadata.tables)
@@ -1,48 +1,148 @@
 """
-[INPUT]: 依赖 app.config 的 get_settings, app.db.base 的 Base
-[OUTPUT]: 对外提供 init_db, get_async_session
-[POS]: db 模块的会话管理层，被 stream/processor 消费
+[INPUT]: 依赖 app.config 的 get_settings
+[OUTPUT]: 对外提供 get_engine, get_async_session, get_pool_stats, dispose_engines
+[POS]: db 模块的会话管理层，按负载隔离连接池 (bot / api / read)，被 stream/processor/API 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 
 from app.config import get_settings
-from app.db.base import Base
 
-settings = get_settings()
+# ---- 负载类型: bot=Stream 处理, api=HTTP 读写, read=公开只读 (可走副本) ----
+WORKLOADS = ("bot", "api", "read")
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
 
-async_session_factory = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+@dataclass
+class PoolMetrics:
+    """单个连接池的借出等待统计"""
+    checkouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    timeouts: int = 0
 
+    def observe(self, wait: float):
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
 
-async def init_db():
-    """初始化数据库表"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+
+_engines: dict[str, AsyncEngine] = {}
+_session_factories: dict[str, async_sessionmaker] = {}
+_metrics: dict[str, PoolMetrics] = {}
+
+
+def _pool_config(workload: str) -> tuple[str, int, int]:
+    """返回 (url, pool_size, max_overflow)"""
+    settings = get_settings()
+    if workload == "bot":
+        return settings.database_url, settings.db_bot_pool_size, settings.db_bot_max_overflow
+    if workload == "api":
+        return settings.database_url, settings.db_api_pool_size, settings.db_api_max_overflow
+    return settings.database_read_url, settings.db_read_pool_size, settings.db_read_max_overflow
+
+
+def _with_statement_cache(url: str) -> str:
+    """为 asyncpg 连接串补上 prepared statement 缓存大小 (URL 已显式配置时不覆盖)"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql" or parsed.get_driver_name() != "asyncpg":
+        return url
+    if "prepared_statement_cache_size" in parsed.query:
+        return url
+    size = get_settings().db_prepared_statement_cache_size
+    return parsed.update_query_dict({"prepared_statement_cache_size": str(size)}).render_as_string(hide_password=False)
+
+
+def _resolve_workload(workload: str) -> str:
+    """未配置只读副本时，read 负载复用 api 连接池"""
+    if workload not in WORKLOADS:
+        raise ValueError(f"Unknown DB workload: {workload}")
+    if workload == "read" and not get_settings().database_read_url:
+        return "api"
+    return workload
+
+
+def get_engine(workload: str = "bot") -> AsyncEngine:
+    """按负载懒加载 engine (首次使用时才建立连接池)"""
+    workload = _resolve_workload(workload)
+
+    if workload not in _engines:
+        settings = get_settings()
+        url, pool_size, max_overflow = _pool_config(workload)
+        _engines[workload] = create_async_engine(
+            _with_statement_cache(url),
+            echo=False,
+            query_cache_size=settings.db_compiled_cache_size,
+            pool_pre_ping=True,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+        _session_factories[workload] = async_sessionmaker(
+            _engines[workload],
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+        _metrics[workload] = PoolMetrics()
+
+    return _engines[workload]
 
 
 @asynccontextmanager
-async def get_async_session():
-    """获取异步数据库会话"""
-    async with async_session_factory() as session:
+async def get_async_session(workload: str = "bot"):
+    """获取异步数据库会话 (默认 bot 负载)"""
+    workload = _resolve_workload(workload)
+    get_engine(workload)
+    metrics = _metrics[workload]
+
+    async with _session_factories[workload]() as session:
         try:
+            # ---- 立即借出连接，记录排队等待时间 ----
+            start = time.perf_counter()
+            try:
+                await session.connection()
+            except PoolTimeoutError:
+                metrics.timeouts += 1
+                raise
+            metrics.observe(time.perf_counter() - start)
+
             yield session
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+
+
+def get_pool_stats() -> dict:
+    """各负载连接池的实时状态 + 借出等待统计"""
+    stats = {}
+    for workload, engine in _engines.items():
+        pool = engine.sync_engine.pool
+        metrics = _metrics[workload]
+        stats[workload] = {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": metrics.checkouts,
+            "wait_avg_ms": round(metrics.wait_total / metrics.checkouts * 1000, 2) if metrics.checkouts else 0.0,
+            "wait_max_ms": round(metrics.wait_max * 1000, 2),
+            "timeouts": metrics.timeouts,
+        }
+    return stats
+
+
+async def dispose_engines():
+    """关闭所有连接池"""
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _session_factories.clear()
+    _metrics.clear()
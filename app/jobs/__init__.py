@@ -0,0 +1,6 @@
+"""
+[INPUT]: 无
+[OUTPUT]: 运维任务包 (python -m app.jobs.<name> 运行)
+[POS]: app 的离线运维任务集合，不参与 Web/Bot 启动流程
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
@@ -0,0 +1,265 @@
+"""
+[INPUT]: 依赖 sqlalchemy, app.db.session, app.db.models, app.utils.logger, pyarrow (可选，缺失时退回 NDJSON)
+[OUTPUT]: 对外提供 EXPORT_TABLES, WatermarkStore, ChunkWriter, export_table, run_export 及命令行入口
+[POS]: jobs 模块的增量导出任务：按表 keyset 分页流式导出到压缩分块文件，水位文件支持断点续跑
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+
+用法 (建议每晚 cron):
+    python -m app.jobs.export --out ./exports [--format auto|parquet|ndjson] [--chunk-rows 50000] [--full]
+
+输出布局:
+    <out>/<table>/<run_ts>_part0001.parquet (或 .ndjson.gz)
+    <out>/_watermarks.json      每个分块落盘后更新，中断后从最后一个完整分块继续
+
+增量语义: 每张表按 (水位列, id) 单调推进，只导出 now - settle 之前的行；
+水位列都是每次业务变更都会推进的 updated_at，晚到的状态更新 / 投影累加 / 全量重建替换都会被再次导出，
+下游按主键去重取最新版本即可得到快照。--full 忽略水位重新全量导出。
+"""
+
+import argparse
+import asyncio
+import enum
+import gzip
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, date, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select, tuple_, literal
+from sqlalchemy.sql.schema import Column
+
+from app.db.session import get_engine, dispose_engines
+from app.db.models import ProcessedMention, RoastProfile, RequesterProfile, RevengeRelation
+from app.utils.logger import logger, setup_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - 取决于部署环境
+    pa = None
+    pq = None
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """导出规格: 水位列 + 唯一 tie-breaker 组成 keyset，exclude 中的列永不导出"""
+    name: str
+    model: type
+    watermark: str
+    exclude: tuple[str, ...] = ()
+
+    @property
+    def columns(self) -> list[Column]:
+        return [c for c in self.model.__table__.columns if c.name not in self.exclude]
+
+
+EXPORT_TABLES = {
+    # ---- mention 的状态 / 回复在创建后仍会更新，按触发器维护的 updated_at 导出 ----
+    "processed_mentions": ExportTable("processed_mentions", ProcessedMention, "updated_at"),
+    "roast_profiles": ExportTable("roast_profiles", RoastProfile, "updated_at"),
+    # ---- OAuth 凭证不出库 ----
+    "requester_profiles": ExportTable(
+        "requester_profiles", RequesterProfile, "updated_at",
+        exclude=("oauth_access_token", "oauth_refresh_token"),
+    ),
+    "revenge_relations": ExportTable("revenge_relations", RevengeRelation, "updated_at"),
+}
+
+
+# ============================================================
+#  水位文件
+# ============================================================
+
+class WatermarkStore:
+    """{table: {"value": iso 时间, "id": 最后一行 id}}，写临时文件后原子替换"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._data: dict[str, dict] = json.loads(path.read_text()) if path.exists() else {}
+
+    def get(self, table: str) -> Optional[tuple[datetime, str]]:
+        entry = self._data.get(table)
+        if not entry:
+            return None
+        return datetime.fromisoformat(entry["value"]), entry["id"]
+
+    def set(self, table: str, value: datetime, row_id: str):
+        self._data[table] = {"value": value.isoformat(), "id": row_id}
+        self._save()
+
+    def reset(self, table: str):
+        if self._data.pop(table, None) is not None:
+            self._save()
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._data, indent=2, sort_keys=True))
+        os.replace(tmp, self.path)
+
+
+# ============================================================
+#  分块写入
+# ============================================================
+
+def _to_json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+class ChunkWriter:
+    """把一批行写成一个分块文件 (parquet 或 ndjson.gz)，返回文件路径"""
+
+    def __init__(self, directory: Path, run_ts: str, fmt: str):
+        self.directory = directory
+        self.run_ts = run_ts
+        self.fmt = fmt
+        self.parts = 0
+
+    def write(self, column_names: list[str], rows: list[tuple]) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.parts += 1
+        stem = f"{self.run_ts}_part{self.parts:04d}"
+        records = [{name: _to_json_value(value) for name, value in zip(column_names, row)} for row in rows]
+
+        if self.fmt == "parquet":
+            path = self.directory / f"{stem}.parquet"
+            # ---- JSONB 列以 JSON 字符串存储，保持列类型稳定 ----
+            for record in records:
+                for key, value in record.items():
+                    if isinstance(value, (dict, list)):
+                        record[key] = json.dumps(value, ensure_ascii=False)
+            pq.write_table(pa.Table.from_pylist(records), path, compression="zstd")
+        else:
+            path = self.directory / f"{stem}.ndjson.gz"
+            with gzip.open(path, "wt", encoding="utf-8") as fp:
+                for record in records:
+                    fp.write(json.dumps(record, ensure_ascii=False))
+                    fp.write("\n")
+        return path
+
+
+# ============================================================
+#  导出
+# ============================================================
+
+async def export_table(
+    spec: ExportTable,
+    writer: ChunkWriter,
+    watermarks: WatermarkStore,
+    chunk_rows: int,
+    until: datetime,
+) -> int:
+    """按 (水位列, id) keyset 分页导出到 until 为止，返回导出行数；内存占用上限为一个分块"""
+    table = spec.model.__table__
+    watermark_col = table.c[spec.watermark]
+    id_col = table.c.id
+    columns = spec.columns
+    column_names = [c.name for c in columns]
+    wm_index = column_names.index(spec.watermark)
+    id_index = column_names.index("id")
+
+    # ---- 水位列都有 server_default；直接比较原列，不包 coalesce ----
+    base = select(*columns).where(watermark_col < until).order_by(watermark_col, id_col).limit(chunk_rows)
+
+    exported = 0
+    engine = get_engine("read")
+
+    while True:
+        stmt = base
+        position = watermarks.get(spec.name)
+        if position:
+            last_value, last_id = position
+            stmt = stmt.where(
+                tuple_(watermark_col, id_col) > tuple_(literal(last_value), literal(uuid.UUID(last_id)))
+            )
+
+        async with engine.connect() as conn:
+            rows = (await conn.execute(stmt)).all()
+
+        if not rows:
+            return exported
+
+        path = writer.write(column_names, rows)
+        last = rows[-1]
+        watermarks.set(spec.name, last[wm_index], str(last[id_index]))
+
+        exported += len(rows)
+        logger.info(f"Exported {len(rows)} rows from {spec.name} -> {path.name}")
+
+        if len(rows) < chunk_rows:
+            return exported
+
+
+def resolve_format(fmt: str) -> str:
+    if fmt == "auto":
+        return "parquet" if pq is not None else "ndjson"
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("pyarrow is not installed; use --format ndjson")
+    return fmt
+
+
+async def run_export(
+    out_dir: Path,
+    tables: list[str],
+    fmt: str = "auto",
+    chunk_rows: int = 50_000,
+    settle_minutes: int = 60,
+    full: bool = False,
+) -> dict[str, int]:
+    """导出指定表，返回 {table: 行数}"""
+    fmt = resolve_format(fmt)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    watermarks = WatermarkStore(out_dir / "_watermarks.json")
+    run_ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    until = datetime.now(timezone.utc) - timedelta(minutes=settle_minutes)
+
+    results = {}
+    for name in tables:
+        if full:
+            watermarks.reset(name)
+        writer = ChunkWriter(out_dir / name, run_ts, fmt)
+        results[name] = await export_table(EXPORT_TABLES[name], writer, watermarks, chunk_rows, until)
+    return results
+
+
+async def _main(args: argparse.Namespace):
+    try:
+        results = await run_export(
+            Path(args.out),
+            args.tables or list(EXPORT_TABLES),
+            fmt=args.format,
+            chunk_rows=args.chunk_rows,
+            settle_minutes=args.settle_minutes,
+            full=args.full,
+        )
+    finally:
+        await dispose_engines()
+
+    for name, rows in results.items():
+        logger.info(f"{name}: {rows} rows exported")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental export of bot tables")
+    parser.add_argument("--out", default="./exports")
+    parser.add_argument("--table", dest="tables", action="append", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", default="auto", choices=["auto", "parquet", "ndjson"])
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--settle-minutes", type=int, default=60, help="skip rows newer than this")
+    parser.add_argument("--full", action="store_true", help="ignore watermarks and export everything")
+    args = parser.parse_args()
+
+    setup_logger()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+[INPUT]: 依赖 alembic.command, app.config, app.db.session, app.db.schema, app.utils.logger
+[OUTPUT]: 对外提供 run_migrate 及命令行入口
+[POS]: jobs 模块的 schema 迁移任务：部署时执行一次，应用启动只做版本校验
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+
+用法 (部署流水线中、启动新版本之前):
+    python -m app.jobs.migrate            # 空库: 按模型建表 + stamp head；已有库: alembic upgrade head
+    python -m app.jobs.migrate --check    # 只打印当前版本与 head，不一致时退出码 1
+"""
+
+import argparse
+import asyncio
+import sys
+
+from alembic import command
+
+from app.config import get_settings
+from app.db.session import get_engine, dispose_engines
+from app.db.schema import alembic_config, head_revision, current_revision, bootstrap_schema, is_empty_database
+from app.utils.logger import logger, setup_logger
+
+
+async def _inspect() -> tuple[bool, str | None]:
+    try:
+        async with get_engine("bot").connect() as conn:
+            empty = await conn.run_sync(is_empty_database)
+            revision = await current_revision(conn)
+        return empty, revision
+    finally:
+        await dispose_engines()
+
+
+async def _bootstrap():
+    try:
+        async with get_engine("bot").begin() as conn:
+            await conn.run_sync(
+                lambda sync_conn: bootstrap_schema(sync_conn, get_settings().mention_partition_months_ahead)
+            )
+    finally:
+        await dispose_engines()
+
+
+def run_migrate() -> str:
+    """把数据库迁移到 head，返回迁移后的版本"""
+    config = alembic_config()
+    empty, revision = asyncio.run(_inspect())
+
+    if empty:
+        logger.info("Empty database, creating schema from models")
+        asyncio.run(_bootstrap())
+        command.stamp(config, "head")
+    elif revision is None:
+        # ---- 有业务表但未纳入 alembic：无法判断起点，交给人工 stamp ----
+        raise RuntimeError(
+            "Tables exist but alembic_version is missing; run `alembic stamp <revision>` "
+            "matching the current schema, then re-run this command."
+        )
+    else:
+        logger.info(f"Upgrading schema from {revision} to {head_revision()}")
+        command.upgrade(config, "head")
+
+    return head_revision()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--check", action="store_true", help="only compare the database revision with head")
+    args = parser.parse_args()
+
+    setup_logger()
+
+    if args.check:
+        _, revision = asyncio.run(_inspect())
+        logger.info(f"Database revision: {revision or 'missing'}, head: {head_revision()}")
+        sys.exit(0 if revision == head_revision() else 1)
+
+    logger.info(f"Schema at {run_migrate()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+[INPUT]: 依赖 app.db.session, app.db.projections, app.db.crud, app.utils.logger
+[OUTPUT]: 对外提供 run_rebuild 及命令行入口
+[POS]: jobs 模块的记忆表全量重建任务：从 processed_mentions 集合式重算 roast_profiles / requester_profiles / revenge_relations
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+
+用法:
+    python -m app.jobs.rebuild_memory --dry-run    # 只打印差异，事务回滚
+    python -m app.jobs.rebuild_memory              # 单事务内重算并替换，投影水位同步重置
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.db.session import get_engine, dispose_engines
+from app.db.projections import TableDiff, rebuild_roast_memory
+from app.db.crud import publish_requester_summary_invalidation
+from app.utils.logger import logger, setup_logger
+
+
+async def run_rebuild(dry_run: bool = False) -> list[TableDiff]:
+    """执行一次全量重建；dry_run 时回滚事务，只返回差异"""
+    engine = get_engine("bot")
+
+    def on_step(name: str, seconds: float):
+        logger.info(f"  {name:<18} {seconds * 1000:9.1f} ms")
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            diffs = await rebuild_roast_memory(conn, apply=not dry_run, on_step=on_step)
+        except Exception:
+            await transaction.rollback()
+            raise
+
+        if dry_run:
+            await transaction.rollback()
+        else:
+            # ---- requester_profiles 整表替换: 通知所有 api 进程清空画像摘要缓存 ----
+            await publish_requester_summary_invalidation(conn, None)
+            await transaction.commit()
+
+    return diffs
+
+
+def _format_diff(diff: TableDiff) -> str:
+    return (
+        f"{diff.table:<20} current={diff.current:<8} rebuilt={diff.rebuilt:<8} "
+        f"+{diff.added:<6} -{diff.removed:<6} ~{diff.changed:<6} count_delta={diff.count_delta:+d}"
+    )
+
+
+async def _main(args: argparse.Namespace):
+    started = time.perf_counter()
+    try:
+        diffs = await run_rebuild(dry_run=args.dry_run)
+    finally:
+        await dispose_engines()
+
+    prefix = "[dry-run] " if args.dry_run else ""
+    for diff in diffs:
+        logger.info(f"{prefix}{_format_diff(diff)}")
+    logger.info(f"{prefix}Memory rebuild {'planned' if args.dry_run else 'applied'} in {time.perf_counter() - started:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild memory tables from processed_mentions")
+    parser.add_argument("--dry-run", action="store_true", help="compute and print the diff, then roll back")
+    args = parser.parse_args()
+
+    setup_logger()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+[INPUT]: 依赖 app.config, app.db.session, app.db.partitions, app.utils.logger
+[OUTPUT]: 对外提供 run_retention 及命令行入口
+[POS]: jobs 模块的 processed_mentions 保留策略任务：预建未来分区、把过期分区的大文本移入冷归档表、
+       删除超过 drop_days 的分区及其去重键 (热索引与去重键表只覆盖保留窗口)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+
+用法 (建议每日 cron):
+    python -m app.jobs.retention [--retention-days 90] [--drop-days 365] [--months-ahead 3] [--dry-run]
+"""
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.db.session import get_engine, dispose_engines
+from app.db.partitions import (
+    partition_name,
+    next_month,
+    month_range,
+    ensure_monthly_partitions,
+    list_monthly_partitions,
+    archive_partition,
+    drop_partition,
+)
+from app.utils.logger import logger, setup_logger
+
+
+async def run_retention(retention_days: int, months_ahead: int, drop_days: int = 0, dry_run: bool = False) -> dict:
+    """
+    执行一次保留策略，返回 {"created": [...], "archived": {partition: rows}, "dropped": {partition: keys}}
+    drop_days 为 0 时不删除分区
+    """
+    engine = get_engine("bot")
+    today = date.today()
+    cutoff = today - timedelta(days=retention_days)
+
+    horizon = today + timedelta(days=31 * months_ahead)
+
+    # ---- 1. 预建未来分区，保证 DEFAULT 分区保持为空 ----
+    async with engine.begin() as conn:
+        partitions = await conn.run_sync(list_monthly_partitions)
+        if dry_run:
+            existing = {name for name, _ in partitions}
+            created = [partition_name(m) for m in month_range(today, horizon) if partition_name(m) not in existing]
+        else:
+            created = await conn.run_sync(
+                lambda sync_conn: ensure_monthly_partitions(sync_conn, today, horizon)
+            )
+
+    # ---- 2. 整月早于 drop 截止日的分区: 先归档 (幂等) 再删除，连同该月去重键，每个分区独立事务 ----
+    drop_cutoff = today - timedelta(days=drop_days) if drop_days > 0 else None
+    doomed = [name for name, month_start in partitions if drop_cutoff and next_month(month_start) <= drop_cutoff]
+    dropped = {}
+
+    for name in doomed:
+        if dry_run:
+            dropped[name] = 0
+            continue
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: archive_partition(sync_conn, name))
+            dropped[name] = await conn.run_sync(lambda sync_conn: drop_partition(sync_conn, name))
+        logger.info(f"Dropped {name} and {dropped[name]} dedup keys")
+
+    # ---- 3. 整月早于 cutoff 的分区做冷归档 (每个分区独立事务) ----
+    expired = [
+        name for name, month_start in partitions if next_month(month_start) <= cutoff and name not in dropped
+    ]
+    archived = {}
+
+    for name in expired:
+        if dry_run:
+            archived[name] = 0
+            continue
+        async with engine.begin() as conn:
+            archived[name] = await conn.run_sync(lambda sync_conn: archive_partition(sync_conn, name))
+        logger.info(f"Archived {archived[name]} rows from {name}")
+
+    # ---- 4. 回收归档后的空间 (VACUUM 不能在事务中执行) ----
+    touched = [name for name, rows in archived.items() if rows]
+    if touched:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for name in touched:
+                await conn.execute(text(f"VACUUM (ANALYZE) {name}"))
+
+    return {"created": created, "archived": archived, "dropped": dropped}
+
+
+async def _main(args: argparse.Namespace):
+    try:
+        result = await run_retention(
+            args.retention_days, args.months_ahead, drop_days=args.drop_days, dry_run=args.dry_run
+        )
+    finally:
+        await dispose_engines()
+
+    prefix = "[dry-run] " if args.dry_run else ""
+    logger.info(f"{prefix}Partitions created: {result['created'] or 'none'}")
+    logger.info(f"{prefix}Partitions archived: {result['archived'] or 'none'}")
+    logger.info(f"{prefix}Partitions dropped: {result['dropped'] or 'none'}")
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="processed_mentions partition retention")
+    parser.add_argument("--retention-days", type=int, default=settings.mention_retention_days)
+    parser.add_argument("--drop-days", type=int, default=settings.mention_drop_days, help="0 keeps partitions forever")
+    parser.add_argument("--months-ahead", type=int, default=settings.mention_partition_months_ahead)
+    parser.add_argument("--dry-run", action="store_true", help="only print the plan")
+    args = parser.parse_args()
+
+    setup_logger()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
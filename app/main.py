@@ -1,11 +1,11 @@
 """
-[INPUT]: 依赖 app.api.router, app.db.session, app.bot.stream, app.bot.active_roast, app.config, app.utils.logger
+[INPUT]: 依赖 app.api.router, app.db.session, app.db.schema, app.bot.roles, app.config, app.utils.logger
 [OUTPUT]: 对外提供 FastAPI app 实例
-[POS]: 整个应用的入口，初始化数据库、启动 Filtered Stream 监听、启动 Active Roast 调度器、挂载路由、配置 CORS
+[POS]: 整个应用的入口，校验数据库 schema 版本、按 APP_ROLE 启动后台任务 (见 app.bot.roles)、挂载路由、配置 CORS；
+       关闭时排空在途处理并释放未完成的认领；各角色的启动命令见 app.run
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -13,9 +13,9 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
 from app.config import get_settings
-from app.db.session import init_db
-from app.bot.stream import setup_stream_rules, run_stream
-from app.bot.active_roast import run_active_roast
+from app.db.session import dispose_engines
+from app.db.schema import verify_schema
+from app.bot.roles import start_role_tasks, stop_role_tasks
 from app.utils.logger import setup_logger, logger
 
 
@@ -23,31 +23,22 @@ from app.utils.logger import setup_logger, logger
 async def lifespan(app: FastAPI):
     # ---- Startup ----
     setup_logger()
-    logger.info("Starting Skyeye Bot (Filtered Stream mode)...")
-
     settings = get_settings()
+    role = settings.app_role
+    logger.info(f"Starting Skyeye Bot (role={role})...")
 
-    await init_db()
-    logger.info("Database initialized")
-
-    await setup_stream_rules()
-    stream_task = asyncio.create_task(run_stream())
-    logger.info("Filtered stream listener launched")
+    # ---- 只读校验 alembic 版本，建表/迁移由 python -m app.jobs.migrate 负责 ----
+    await verify_schema()
+    logger.info("Database schema verified")
 
-    # ---- Active Roast (主动出击) ----
-    active_roast_task = None
-    if settings.active_roast_enabled:
-        active_roast_task = asyncio.create_task(run_active_roast())
-        logger.info("Active Roast scheduler launched")
-    else:
-        logger.info("Active Roast disabled")
+    # ---- 按角色启动后台任务；api 角色只监听缓存失效通知，可多 worker 运行 ----
+    tasks = start_role_tasks(role)
 
     yield
 
-    # ---- Shutdown ----
-    stream_task.cancel()
-    if active_roast_task:
-        active_roast_task.cancel()
+    # ---- Shutdown: 先停止入队与认领，再排空在途处理，未完成的释放回 PENDING ----
+    await stop_role_tasks(tasks)
+    await dispose_engines()
     logger.info("Skyeye Bot shutdown complete")
 
 
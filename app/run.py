@@ -0,0 +1,50 @@
+"""
+[INPUT]: 依赖 uvicorn, app.main (以 import string 方式加载)
+[OUTPUT]: 对外提供按角色启动进程的命令行入口
+[POS]: 部署入口：设置 APP_ROLE 后启动 uvicorn；角色含义见 app.bot.roles
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+
+用法:
+    python -m app.run api [--workers N]   # 只读 / OAuth HTTP API，默认按 CPU 核数开 worker
+    python -m app.run ingest              # 竞选 leader，当选者持有唯一的 Filtered Stream 连接；可多副本热备
+    python -m app.run worker [--workers N]  # mention 队列消费；按需在多台主机上扩展
+    python -m app.run all                 # 单进程运行全部 (本地开发)
+
+每个角色都保留 /health 端点，便于容器探活。
+"""
+
+import argparse
+import os
+
+import uvicorn
+
+ROLES = ("all", "api", "ingest", "worker")
+
+
+def default_workers(role: str) -> int:
+    """api 无状态，铺满所有核；其余角色默认单进程，靠副本扩展"""
+    if role == "api":
+        return os.cpu_count() or 1
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Skyeye Bot process role")
+    parser.add_argument("role", choices=ROLES)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="uvicorn worker processes")
+    args = parser.parse_args()
+
+    # ---- 子进程继承环境变量，get_settings() 在各 worker 内读取 ----
+    os.environ["APP_ROLE"] = args.role
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers or default_workers(args.role),
+    )
+
+
+if __name__ == "__main__":
+    main()
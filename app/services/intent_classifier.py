@@ -1,5 +1,5 @@
 """
-[INPUT]: 依赖 openai, app.config, app.db.models
+[INPUT]: 依赖 openai, app.config, app.db.models, app.services.retry
 [OUTPUT]: 对外提供 IntentClassifier (classify 方法)
 [POS]: services 模块的意图分类器，用 GPT-4o-mini 识别用户意图
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
@@ -9,10 +9,11 @@ import re
 from dataclasses import dataclass
 from typing import Optional
 
-from openai import AsyncOpenAI
+from openai import APIConnectionError, AsyncOpenAI
 
 from app.config import get_settings
 from app.db.models import TriggerType
+from app.services.retry import call_timeout, get_retry_policy
 from app.utils.logger import logger
 
 
@@ -23,6 +24,8 @@ class IntentResult:
     confidence: float = 0.0
 
 
+CLASSIFY_TIMEOUT = 20.0
+
 SYSTEM_PROMPT = """你是一个 Twitter Bot 的意图分类器。用户 @ 了这个 Bot，你需要判断用户想让 Bot 做什么。
 
 ## 两种有效意图：
@@ -60,7 +63,8 @@ class IntentClassifier:
 
     def __init__(self):
         settings = get_settings()
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        # ---- 关闭 SDK 内置重试，统一由 app.services.retry 处理 ----
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0)
         self.bot_username = settings.twitter_bot_username.lower()
 
     async def classify(self, text: str, has_image: bool = False) -> IntentResult:
@@ -76,15 +80,19 @@ class IntentClassifier:
             context += "\n[用户消息附带了图片]"
 
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": context},
-                ],
-                temperature=0.1,
-                max_tokens=100,
-                response_format={"type": "json_object"},
+            response = await get_retry_policy("openai").call(
+                lambda: self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": context},
+                    ],
+                    temperature=0.1,
+                    max_tokens=100,
+                    response_format={"type": "json_object"},
+                    timeout=call_timeout(CLASSIFY_TIMEOUT),
+                ),
+                retry_on=(APIConnectionError,),
             )
 
             result_text = response.choices[0].message.content
@@ -0,0 +1,186 @@
+"""
+[INPUT]: 依赖 asyncio，纯逻辑
+[OUTPUT]: 对外提供 AdaptiveLimiter, LimiterRejected
+[POS]: services 模块的自适应并发限制器 (AIMD)，挡在 UpstreamAPIClient 前面；根据延迟与过载错误调整并发上限，
+       排队有上限与超时，超出即拒绝 (shed) 而不是继续压垮上游
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable
+
+
+class LimiterRejected(Exception):
+    """排队已满或排队超时，请求被丢弃 (未发往上游)"""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name} limiter rejected request: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+class Permit:
+    """一次许可；调用方通过 overloaded() / ignore() 标注结果，默认按成功计"""
+
+    __slots__ = ("started", "outcome")
+
+    def __init__(self, started: float):
+        self.started = started
+        self.outcome = "success"
+
+    def overloaded(self):
+        """超时 / 429 / 5xx: 上游过载信号"""
+        self.outcome = "overload"
+
+    def ignore(self):
+        """与负载无关的失败 (如 4xx)，不参与调节"""
+        self.outcome = "ignore"
+
+    def cancelled(self):
+        """调用方取消 (截止时间到 / 关闭)，结果未知: 不上调，耗时已超阈值时按过载计"""
+        self.outcome = "cancelled"
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 并发控制:
+    - 成功且延迟不超过 latency_threshold: limit += 1 / limit (每个完整窗口约 +1)
+    - 调用方取消: 不上调；取消前已超过 latency_threshold 则与延迟超标同样处理
+    - 过载错误或延迟超标: limit *= backoff_ratio，cooldown 秒内只下调一次，避免同一波失败连续砍半
+    - 在途达到 floor(limit) 时排队，队列满或等待超过 queue_timeout 立即拒绝
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        latency_threshold: float = 30.0,
+        backoff_ratio: float = 0.7,
+        cooldown: float = 2.0,
+        max_queue: int = 50,
+        queue_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self.cooldown = cooldown
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = float("-inf")
+
+        self.completed = 0
+        self.overloads = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.last_latency = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    async def acquire(self) -> Permit:
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            return Permit(self._clock())
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LimiterRejected(self.name, "queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise LimiterRejected(self.name, "queue timeout")
+        except asyncio.CancelledError:
+            # ---- 已被唤醒 (槽位已转交) 但随即取消: 归还槽位 ----
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return Permit(self._clock())
+
+    def release(self, permit: Permit):
+        latency = self._clock() - permit.started
+        self.in_flight -= 1
+        self.last_latency = latency
+
+        slow = latency > self.latency_threshold
+        if permit.outcome == "overload" or (permit.outcome in ("success", "cancelled") and slow):
+            self.overloads += 1
+            self._decrease()
+        elif permit.outcome == "cancelled":
+            self.cancelled += 1
+        elif permit.outcome == "success":
+            self.completed += 1
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        self._wake()
+
+    def _decrease(self):
+        now = self._clock()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+
+    def _wake(self):
+        """按 FIFO 把空出的槽位直接转交给排队者 (计入 in_flight)"""
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self):
+        """获取许可并在退出时按结果调节；异常未标注时按过载计，取消 (CancelledError 不是 Exception) 单独处理"""
+        permit = await self.acquire()
+        try:
+            yield permit
+        except asyncio.CancelledError:
+            if permit.outcome == "success":
+                permit.cancelled()
+            raise
+        except Exception:
+            if permit.outcome == "success":
+                permit.overloaded()
+            raise
+        finally:
+            self.release(permit)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "overloads": self.overloads,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "last_latency_ms": round(self.last_latency * 1000, 1),
+        }
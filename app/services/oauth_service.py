@@ -1,5 +1,5 @@
 """
-[INPUT]: 依赖 httpx, app.config
+[INPUT]: 依赖 httpx, app.config, app.services.retry
 [OUTPUT]: 对外提供 XOAuthService (OAuth 2.0 PKCE 流程)
 [POS]: services 模块的 X OAuth 服务
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
@@ -14,6 +14,7 @@ from typing import Optional
 import httpx
 
 from app.config import get_settings
+from app.services.retry import get_retry_policy
 from app.utils.logger import logger
 
 
@@ -51,7 +52,7 @@ class XOAuthService:
         return f"{self.AUTHORIZE_URL}?{urlencode(params)}"
 
     async def exchange_code(self, code: str, code_verifier: str) -> Optional[dict]:
-        """用 code 换取 access_token"""
+        """用 code 换取 access_token (code 一次性有效，不重试)"""
         async with httpx.AsyncClient() as client:
             try:
                 response = await client.post(
@@ -77,28 +78,30 @@ class XOAuthService:
                 return None
 
     async def get_user_info(self, access_token: str) -> Optional[dict]:
-        """获取用户信息"""
-        async with httpx.AsyncClient() as client:
-            try:
+        """获取用户信息 (只读请求，按统一重试策略重试)"""
+        async def fetch() -> httpx.Response:
+            async with httpx.AsyncClient() as client:
                 response = await client.get(
                     self.USER_INFO_URL,
                     headers={"Authorization": f"Bearer {access_token}"},
                     params={"user.fields": "id,username,name,profile_image_url"},
                 )
+                response.raise_for_status()
+                return response
 
-                if response.status_code != 200:
-                    logger.error(f"Get user info failed: {response.text}")
-                    return None
+        try:
+            response = await get_retry_policy("x-oauth").call(fetch)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Get user info failed: {e.response.text}")
+            return None
+        except Exception as e:
+            logger.error(f"Get user info error: {e}")
+            return None
 
-                data = response.json()
-                return data.get("data")
-
-            except Exception as e:
-                logger.error(f"Get user info error: {e}")
-                return None
+        return response.json().get("data")
 
     async def refresh_token(self, refresh_token: str) -> Optional[dict]:
-        """刷新 access_token"""
+        """刷新 access_token (refresh_token 使用后轮换，不重试)"""
         async with httpx.AsyncClient() as client:
             try:
                 response = await client.post(
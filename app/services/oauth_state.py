@@ -0,0 +1,105 @@
+"""
+[INPUT]: 依赖 heapq, app.config, app.db.session, app.db.crud
+[OUTPUT]: 对外提供 OAuthStateStore, MemoryStateStore, PostgresStateStore, get_oauth_state_store
+[POS]: services 模块的 OAuth PKCE state 存储：登录发起时写入 state -> code_verifier，回调时一次性取出
+       - memory:   单进程 (本地开发 / APP_ROLE=all 单 worker)，最小堆按到期时间淘汰，有容量上限
+       - postgres: 多个 API 进程 / 主机共享，回调落到任意进程都能取到
+       被 app.api.v1.auth 使用
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import heapq
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable, Optional
+
+from app.config import get_settings
+from app.db.session import get_async_session
+from app.db.crud import put_oauth_state, pop_oauth_state
+
+
+class OAuthStateStore(ABC):
+    """state 只能被取出一次，过期后视为不存在"""
+
+    @abstractmethod
+    async def put(self, state: str, code_verifier: str):
+        ...
+
+    @abstractmethod
+    async def pop(self, state: str) -> Optional[str]:
+        """取出并删除 state 对应的 code_verifier；不存在或已过期返回 None"""
+        ...
+
+
+class MemoryStateStore(OAuthStateStore):
+    """
+    进程内存储: dict 存数据，最小堆按到期时间排序
+    写入时先弹出堆顶已过期的条目 (每个 O(log n))，超过 max_size 时淘汰最早到期的条目
+    被取出的 state 在堆里留下陈旧条目，弹出时与 dict 中的到期时间比对后跳过
+    """
+
+    def __init__(self, ttl: float = 600.0, max_size: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: dict[str, tuple[float, str]] = {}
+        self._expiry: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop_earliest(self) -> bool:
+        """弹出堆顶；返回是否删除了一个仍存在的条目"""
+        expires_at, state = heapq.heappop(self._expiry)
+        entry = self._entries.get(state)
+        if entry is not None and entry[0] == expires_at:
+            del self._entries[state]
+            return True
+        return False
+
+    def _evict(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            self._pop_earliest()
+        while len(self._entries) >= self.max_size and self._expiry:
+            self._pop_earliest()
+        # ---- 陈旧条目过多时重建堆，防止只取不过期的场景下堆无限增长 ----
+        if len(self._expiry) > 2 * len(self._entries) + 64:
+            self._expiry = [(expires_at, state) for state, (expires_at, _) in self._entries.items()]
+            heapq.heapify(self._expiry)
+
+    async def put(self, state: str, code_verifier: str):
+        now = self._clock()
+        self._evict(now)
+        expires_at = now + self.ttl
+        self._entries[state] = (expires_at, code_verifier)
+        heapq.heappush(self._expiry, (expires_at, state))
+
+    async def pop(self, state: str) -> Optional[str]:
+        entry = self._entries.pop(state, None)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+
+class PostgresStateStore(OAuthStateStore):
+    """oauth_states 表；取出为 DELETE ... RETURNING，天然一次性，并发回调只有一个成功"""
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+
+    async def put(self, state: str, code_verifier: str):
+        async with get_async_session("api") as session:
+            await put_oauth_state(session, state, code_verifier, self.ttl)
+
+    async def pop(self, state: str) -> Optional[str]:
+        async with get_async_session("api") as session:
+            return await pop_oauth_state(session, state)
+
+
+@lru_cache
+def get_oauth_state_store() -> OAuthStateStore:
+    settings = get_settings()
+    if settings.oauth_state_backend == "memory":
+        return MemoryStateStore(ttl=settings.oauth_state_ttl, max_size=settings.oauth_state_max_size)
+    return PostgresStateStore(ttl=settings.oauth_state_ttl)
@@ -0,0 +1,279 @@
+"""
+[INPUT]: 依赖 asyncio, httpx, contextvars, app.config
+[OUTPUT]: 对外提供 RetryPolicy, RetryBudget, DecorrelatedJitter, DeadlineExceeded, deadline, remaining, call_timeout,
+          is_retryable, RETRY_TARGETS, get_retry_policy, retry_stats
+[POS]: services 模块的统一出站重试策略：上游 API / OpenAI / X API / OAuth 共用
+       - 退避: decorrelated jitter，避免同一波失败的请求同步重试
+       - 分类: 仅重试 408 / 425 / 429 / 5xx 与连接层错误，4xx (如 404 用户不存在) 立即失败
+       - 预算: 每个策略在滑动窗口内的重试数不超过 请求数 × ratio + 保底值，上游整体故障时不放大流量
+       - 截止时间: 经 contextvars 向下传播 (如每条 mention 的总时限)，剩余时间不够下一次退避即停止重试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from app.config import get_settings
+from app.utils.logger import logger
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 425, 429}
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (httpx.TransportError, TimeoutError, ConnectionError)
+
+
+class DeadlineExceeded(Exception):
+    """当前上下文的截止时间已过，不再发起新的出站调用"""
+
+
+# ============================================================
+#  截止时间 (contextvars 传播，子任务继承创建时的值)
+# ============================================================
+
+_deadline: ContextVar[Optional[float]] = ContextVar("outbound_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """在 seconds 秒后截止；嵌套时取更早的一个"""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """距截止时间的秒数；未设置截止时间时为 None"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def call_timeout(default: float) -> float:
+    """单次调用的超时: 默认值与剩余时间取小；已截止时抛 DeadlineExceeded"""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("deadline exceeded")
+    return min(default, left)
+
+
+# ============================================================
+#  错误分类
+# ============================================================
+
+def status_of(exc: BaseException) -> Optional[int]:
+    """从 httpx / openai / tweepy 的异常上取 HTTP 状态码"""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException, retry_on: tuple[type[BaseException], ...] = ()) -> bool:
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return isinstance(exc, TRANSIENT_ERRORS + retry_on)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================================
+#  退避与预算
+# ============================================================
+
+class DecorrelatedJitter:
+    """sleep = min(cap, uniform(base, 上一次 × 3))；reset() 回到 base"""
+
+    def __init__(self, base: float, cap: float, rng: Callable[[float, float], float] = random.uniform):
+        self.base = base
+        self.cap = cap
+        self._rng = rng
+        self._last = base
+
+    def next(self) -> float:
+        self._last = min(self.cap, self._rng(self.base, self._last * 3))
+        return self._last
+
+    def reset(self):
+        self._last = self.base
+
+
+class RetryBudget:
+    """滑动窗口内: 重试数 < 请求数 × ratio + min_retries 时才允许重试"""
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_retries: int = 5,
+        window: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._clock = clock
+        self._requests: deque[float] = deque()
+        self._retries: deque[float] = deque()
+        self.exhausted = 0
+
+    def _trim(self, now: float):
+        for samples in (self._requests, self._retries):
+            while samples and now - samples[0] > self.window:
+                samples.popleft()
+
+    def record_request(self):
+        now = self._clock()
+        self._trim(now)
+        self._requests.append(now)
+
+    def try_retry(self) -> bool:
+        now = self._clock()
+        self._trim(now)
+        if len(self._retries) >= len(self._requests) * self.ratio + self.min_retries:
+            self.exhausted += 1
+            return False
+        self._retries.append(now)
+        return True
+
+    def stats(self) -> dict:
+        self._trim(self._clock())
+        return {
+            "requests_in_window": len(self._requests),
+            "retries_in_window": len(self._retries),
+            "exhausted": self.exhausted,
+        }
+
+
+# ============================================================
+#  重试策略
+# ============================================================
+
+class RetryPolicy:
+    """
+    call(fn) 最多执行 max_attempts 次；以下情况直接抛出最后一次的异常:
+    不可重试的错误、预算耗尽、截止时间内等不到下一次退避
+    429 带 Retry-After 时至少等待该时长
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        budget: Optional[RetryBudget] = None,
+        rng: Callable[[float, float], float] = random.uniform,
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self._rng = rng
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        retry_on: tuple[type[BaseException], ...] = (),
+    ) -> T:
+        self.calls += 1
+        backoff = DecorrelatedJitter(self.base_delay, self.max_delay, self._rng)
+
+        for attempt in range(1, self.max_attempts + 1):
+            left = remaining()
+            if left is not None and left <= 0:
+                self.failures += 1
+                raise DeadlineExceeded(f"{self.name}: deadline exceeded before attempt {attempt}")
+
+            self.budget.record_request()
+            try:
+                return await fn()
+            except Exception as e:
+                delay = max(backoff.next(), _retry_after(e) or 0)
+                reason = self._give_up_reason(e, attempt, delay, retry_on)
+                if reason:
+                    self.failures += 1
+                    if attempt > 1 or reason != "not retryable":
+                        logger.warning(f"{self.name}: giving up after attempt {attempt} ({reason}): {e!r}")
+                    raise
+
+                self.retries += 1
+                logger.warning(
+                    f"{self.name}: attempt {attempt}/{self.max_attempts} failed: {e!r}; retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    def _give_up_reason(
+        self,
+        exc: Exception,
+        attempt: int,
+        delay: float,
+        retry_on: tuple[type[BaseException], ...],
+    ) -> Optional[str]:
+        if not is_retryable(exc, retry_on):
+            return "not retryable"
+        if attempt >= self.max_attempts:
+            return "attempts exhausted"
+        left = remaining()
+        if left is not None and left <= delay:
+            return "deadline"
+        if not self.budget.try_retry():
+            return "retry budget exhausted"
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "budget": self.budget.stats(),
+        }
+
+
+# ---- 出站目标: 上游两个端点 / OpenAI / X API / X OAuth ----
+RETRY_TARGETS = ("x-roast", "face-search", "openai", "x-api", "x-oauth")
+
+
+@lru_cache
+def get_retry_policy(name: str) -> RetryPolicy:
+    """每个出站目标一个策略 (独立的重试预算)，参数共用配置"""
+    settings = get_settings()
+    return RetryPolicy(
+        name,
+        max_attempts=settings.retry_max_attempts,
+        base_delay=settings.retry_base_delay,
+        max_delay=settings.retry_max_delay,
+        budget=RetryBudget(
+            ratio=settings.retry_budget_ratio,
+            min_retries=settings.retry_budget_min,
+            window=settings.retry_budget_window,
+        ),
+    )
+
+
+def retry_stats() -> dict:
+    return {name: get_retry_policy(name).stats() for name in RETRY_TARGETS}
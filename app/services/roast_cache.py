@@ -0,0 +1,88 @@
+"""
+[INPUT]: 依赖 asyncio, app.config, app.utils.cache, app.utils.singleflight, app.services.retry
+[OUTPUT]: 对外提供 RoastCache, get_roast_cache, normalize_handle
+[POS]: services 模块的上游 roast 生成合并层：同一 handle 的并发请求合并为一次上游调用，成功结果短期缓存；
+       被 UpstreamAPIClient.x_roast 使用 (bot 回复、/auth/roast、Active Roast 共享)
+       上游每次只返回一条文本，合并与命中的调用方拿到的是同一段文本
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import Awaitable, Callable
+
+from app.config import get_settings
+from app.services.retry import DeadlineExceeded, deadline, remaining
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
+
+
+def normalize_handle(handle: str) -> str:
+    return handle.strip().lstrip("@").lower()
+
+
+class RoastCache:
+    """
+    命中: TTL 内生成过的成功结果直接返回
+    合并: 同一 handle 已有生成在途时加入它，不再打上游 (等待受调用方自己的截止时间约束)
+    未命中: 发起生成；生成在独立上下文中运行，使用自己的 flight_deadline，
+        不受发起它的调用方截止时间影响 (发起者超时离开，其余调用方照常拿到结果)
+    失败结果原样分发给本次合并的调用方，但不入缓存
+    """
+
+    def __init__(self, ttl: float = 120.0, maxsize: int = 256, flight_deadline: float = 120.0):
+        self.flight_deadline = flight_deadline
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flights = SingleFlight()
+
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    async def get_or_generate(self, handle: str, generate: Callable[[], Awaitable[dict]]) -> dict:
+        key = normalize_handle(handle)
+
+        cached = self._results.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        async def flight() -> dict:
+            with deadline(self.flight_deadline):
+                result = await generate()
+            if result.get("success") and result.get("roast"):
+                self._results.set(key, result)
+            return result
+
+        task, shared = self._flights.start(key, flight)
+        if shared:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded("deadline exceeded")
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=left)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("deadline exceeded waiting for x-roast generation")
+
+    def stats(self) -> dict:
+        return {
+            "cached_handles": len(self._results),
+            "in_flight": len(self._flights),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+        }
+
+
+@lru_cache
+def get_roast_cache() -> RoastCache:
+    settings = get_settings()
+    return RoastCache(
+        ttl=settings.roast_cache_ttl,
+        maxsize=settings.roast_cache_size,
+        flight_deadline=settings.roast_cache_flight_deadline,
+    )
@@ -1,14 +1,19 @@
 """
-[INPUT]: 依赖 tweepy, httpx, app.config
-[OUTPUT]: 对外提供 TwitterService (reply_to_tweet, download_image, get_home_timeline)
-[POS]: services 模块的 Twitter API 封装层，被 processor/handlers 消费
+[INPUT]: 依赖 tweepy, requests, httpx, app.config, app.services.retry, app.services.x_scheduler
+[OUTPUT]: 对外提供 TwitterService (reply_to_tweet, post_tweet, download_image, get_home_timeline)
+[POS]: services 模块的 Twitter API 封装层，被 processor/handlers 消费；写调用 (发推 / 回复) 统一经 XWriteScheduler 按额度与优先级发送
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import tweepy
+from typing import Optional
+
 import httpx
+import requests
+import tweepy
 
 from app.config import get_settings
+from app.services.retry import call_timeout, get_retry_policy
+from app.services.x_scheduler import TWEETS_ENDPOINT, WritePriority, get_x_scheduler
 from app.utils.logger import logger
 
 
@@ -24,18 +29,38 @@ class TwitterService:
             access_token_secret=settings.twitter_access_token_secret,
             wait_on_rate_limit=True,
         )
+        # ---- 写调用: 不阻塞等待限流，返回原始响应以便调度器读取 x-rate-limit-* 头 ----
+        self.write_client = tweepy.Client(
+            consumer_key=settings.twitter_api_key,
+            consumer_secret=settings.twitter_api_secret,
+            access_token=settings.twitter_access_token,
+            access_token_secret=settings.twitter_access_token_secret,
+            return_type=requests.Response,
+            wait_on_rate_limit=False,
+        )
 
         self.bot_user_id = settings.twitter_bot_user_id
 
-    def reply_to_tweet(self, tweet_id: str, text: str) -> dict:
-        """回复推文"""
+    def _create_tweet(self, **kwargs) -> requests.Response:
+        return self.write_client.create_tweet(**kwargs)
+
+    async def reply_to_tweet(
+        self,
+        tweet_id: str,
+        text: str,
+        priority: WritePriority = WritePriority.REPLY,
+        max_wait: Optional[float] = None,
+    ) -> dict:
+        """回复推文 (经写调度器排队；预计等待超过 max_wait 时抛 WriteDelayed)"""
         try:
-            response = self.client.create_tweet(
-                text=text,
-                in_reply_to_tweet_id=tweet_id,
+            response = await get_x_scheduler().submit(
+                TWEETS_ENDPOINT,
+                lambda: self._create_tweet(text=text, in_reply_to_tweet_id=tweet_id),
+                priority,
+                max_wait,
             )
             return {
-                "reply_tweet_id": str(response.data["id"]),
+                "reply_tweet_id": str(response.json()["data"]["id"]),
                 "text": text,
             }
         except tweepy.errors.Forbidden as e:
@@ -56,20 +81,33 @@ class TwitterService:
             logger.error(f"Tweepy error for tweet {tweet_id}: {type(e).__name__} - {e}")
             raise
 
-    def post_tweet(self, text: str) -> dict:
-        """发送新推文"""
-        response = self.client.create_tweet(text=text)
+    async def post_tweet(
+        self,
+        text: str,
+        priority: WritePriority = WritePriority.INTERACTIVE,
+        max_wait: Optional[float] = None,
+    ) -> dict:
+        """发送新推文 (经写调度器排队)"""
+        response = await get_x_scheduler().submit(
+            TWEETS_ENDPOINT,
+            lambda: self._create_tweet(text=text),
+            priority,
+            max_wait,
+        )
         return {
-            "tweet_id": str(response.data["id"]),
+            "tweet_id": str(response.json()["data"]["id"]),
             "text": text,
         }
 
     async def download_image(self, url: str) -> bytes:
         """下载图片"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            return resp.content
+        async def fetch() -> bytes:
+            async with httpx.AsyncClient(timeout=call_timeout(30.0)) as client:
+                resp = await client.get(url)
+                resp.raise_for_status()
+                return resp.content
+
+        return await get_retry_policy("x-api").call(fetch)
 
     def get_home_timeline(self, max_results: int = 20) -> list[dict]:
         """
@@ -1,17 +1,59 @@
 """
-[INPUT]: 依赖 httpx, asyncio, app.config
-[OUTPUT]: 对外提供 UpstreamAPIClient (face_search, x_roast)
-[POS]: services 模块的上游 API 客户端，被 handlers 消费
+[INPUT]: 依赖 httpx, app.config, app.services.limiter, app.services.roast_cache, app.services.retry
+[OUTPUT]: 对外提供 UpstreamAPIClient (face_search, x_roast), get_upstream_limiter, upstream_limiter_stats
+[POS]: services 模块的上游 API 客户端，被 handlers 消费；每次请求 (含重试) 都经过该端点的 AdaptiveLimiter，
+       重试走 app.services.retry (4xx 不重试，受重试预算与截止时间约束)，被限流拒绝时抛 LimiterRejected 不再重试；
+       x_roast 先经过 RoastCache (同一 handle 的并发请求合并，成功结果短期缓存)
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import asyncio
+from functools import lru_cache
 
 import httpx
 
 from app.config import get_settings
+from app.services.limiter import AdaptiveLimiter, LimiterRejected
+from app.services.roast_cache import get_roast_cache
+from app.services.retry import call_timeout, get_retry_policy
 from app.utils.logger import logger
 
+# ---- 各端点的客户端超时 (秒)，拥塞阈值按比例派生 ----
+ENDPOINT_TIMEOUTS = {
+    "x-roast": 60.0,
+    "face-search": 120.0,
+}
+
+
+@lru_cache
+def get_upstream_limiter(endpoint: str) -> AdaptiveLimiter:
+    settings = get_settings()
+    return AdaptiveLimiter(
+        f"upstream:{endpoint}",
+        initial_limit=settings.upstream_limit_initial,
+        min_limit=settings.upstream_limit_min,
+        max_limit=settings.upstream_limit_max,
+        latency_threshold=ENDPOINT_TIMEOUTS[endpoint] * settings.upstream_latency_ratio,
+        max_queue=settings.upstream_queue_size,
+        queue_timeout=settings.upstream_queue_timeout,
+    )
+
+
+def upstream_limiter_stats() -> dict:
+    return {endpoint: get_upstream_limiter(endpoint).stats() for endpoint in ENDPOINT_TIMEOUTS}
+
+
+def _is_client_error(status_code: int) -> bool:
+    """4xx (429 除外) 是请求本身的问题: 不作为过载信号"""
+    return 400 <= status_code < 500 and status_code != 429
+
+
+def _describe_error(e: Exception, with_body: bool = False) -> str:
+    """handler 依赖 "HTTP 404" 字样判断用户不存在"""
+    if isinstance(e, httpx.HTTPStatusError):
+        status = f"HTTP {e.response.status_code}"
+        return f"{status}: {e.response.text[:500]}" if with_body else status
+    return str(e) or type(e).__name__
+
 
 class UpstreamAPIClient:
     """wtf.nuwa.world API 客户端"""
@@ -27,68 +69,54 @@ class UpstreamAPIClient:
             "Content-Type": "application/json",
         }
 
-    async def face_search(self, image_bytes: bytes, limit: int = 3, max_retries: int = 3) -> dict:
-        """POST /face-search (multipart/form-data, 带重试)"""
-        last_error = None
-
-        for attempt in range(max_retries):
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                try:
-                    resp = await client.post(
-                        f"{self.base_url}/face-search",
-                        headers={"Authorization": f"Bearer {self.api_key}"},
-                        files={"image": ("image.jpg", image_bytes, "image/jpeg")},
-                        data={"limit": str(limit)},
-                    )
-                    resp.raise_for_status()
-                    data = resp.json()
-                    return {"success": True, "results": data.get("results", [])}
-
-                except httpx.HTTPStatusError as e:
-                    body = e.response.text[:500]
-                    last_error = f"HTTP {e.response.status_code}: {body}"
-                    logger.warning(f"Face Search API attempt {attempt + 1}/{max_retries} failed: HTTP {e.response.status_code}")
-
-                except Exception as e:
-                    last_error = str(e)
-                    logger.warning(f"Face Search API attempt {attempt + 1}/{max_retries} failed: {last_error}")
-
-            # ---- 重试前等待 (指数退避) ----
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # 1s, 2s, 4s
-                await asyncio.sleep(wait_time)
-
-        logger.error(f"Face Search API failed after {max_retries} attempts: {last_error}")
-        return {"success": False, "error": last_error}
-
-    async def x_roast(self, handle: str, max_retries: int = 3) -> dict:
-        """POST /x-roast (带重试)"""
-        last_error = None
-
-        for attempt in range(max_retries):
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                try:
-                    resp = await client.post(
-                        f"{self.base_url}/x-roast",
-                        headers=self._headers(),
-                        json={"handle": handle},
-                    )
-                    resp.raise_for_status()
-                    data = resp.json()
-                    return {"success": True, "roast": data.get("roast", "")}
-
-                except httpx.HTTPStatusError as e:
-                    last_error = f"HTTP {e.response.status_code}"
-                    logger.warning(f"X Roast API attempt {attempt + 1}/{max_retries} failed: {last_error}")
-
-                except Exception as e:
-                    last_error = str(e)
-                    logger.warning(f"X Roast API attempt {attempt + 1}/{max_retries} failed: {last_error}")
-
-            # ---- 重试前等待 (指数退避) ----
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # 1s, 2s, 4s
-                await asyncio.sleep(wait_time)
-
-        logger.error(f"X Roast API failed after {max_retries} attempts: {last_error}")
-        return {"success": False, "error": last_error}
+    async def _post(self, endpoint: str, **kwargs) -> httpx.Response:
+        """经自适应限流发出一次请求；超时不超过剩余截止时间；超时 / 429 / 5xx 计为过载，4xx 不参与调节"""
+        timeout = call_timeout(ENDPOINT_TIMEOUTS[endpoint])
+        async with get_upstream_limiter(endpoint).slot() as permit:
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                resp = await client.post(f"{self.base_url}/{endpoint}", **kwargs)
+            if _is_client_error(resp.status_code):
+                permit.ignore()
+            resp.raise_for_status()
+            return resp
+
+    async def face_search(self, image_bytes: bytes, limit: int = 3) -> dict:
+        """POST /face-search (multipart/form-data, 按统一重试策略重试)"""
+        try:
+            resp = await get_retry_policy("face-search").call(
+                lambda: self._post(
+                    "face-search",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    files={"image": ("image.jpg", image_bytes, "image/jpeg")},
+                    data={"limit": str(limit)},
+                )
+            )
+        except LimiterRejected:
+            raise
+        except Exception as e:
+            error = _describe_error(e, with_body=True)
+            logger.error(f"Face Search API failed: {error}")
+            return {"success": False, "error": error}
+
+        data = resp.json()
+        return {"success": True, "results": data.get("results", [])}
+
+    async def x_roast(self, handle: str) -> dict:
+        """同一 handle 的并发请求共享一次上游调用，TTL 内直接返回缓存结果 (见 RoastCache)"""
+        return await get_roast_cache().get_or_generate(handle, lambda: self._x_roast(handle))
+
+    async def _x_roast(self, handle: str) -> dict:
+        """POST /x-roast (按统一重试策略重试)"""
+        try:
+            resp = await get_retry_policy("x-roast").call(
+                lambda: self._post("x-roast", headers=self._headers(), json={"handle": handle})
+            )
+        except LimiterRejected:
+            raise
+        except Exception as e:
+            error = _describe_error(e)
+            logger.error(f"X Roast API failed: {error}")
+            return {"success": False, "error": error}
+
+        data = resp.json()
+        return {"success": True, "roast": data.get("roast", "")}
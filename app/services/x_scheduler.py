@@ -0,0 +1,318 @@
+"""
+[INPUT]: 依赖 asyncio, heapq, app.config
+[OUTPUT]: 对外提供 WritePriority, WriteDelayed, RateWindow, XWriteScheduler, get_x_scheduler, TWEETS_ENDPOINT
+[POS]: services 模块的 X 写调用调度器：按 x-rate-limit-* / x-*-limit-24hour-* 响应头跟踪每个端点的剩余额度，
+       写请求按优先级排队发送；额度见底时按剩余时间均匀配速，用完则排到窗口重置之后，不再撞 429 被动暂停；
+       预计等待超过调用方上限时立即抛 WriteDelayed，HTTP 调用方可据此提前返回
+       被 TwitterService (reply_to_tweet / post_tweet) 使用
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from functools import lru_cache
+from typing import Any, Callable, Mapping, Optional
+
+from app.config import get_settings
+from app.utils.logger import logger
+
+TWEETS_ENDPOINT = "POST /2/tweets"
+
+# ---- 响应头前缀: 15 分钟窗口 + 24 小时用户 / 应用额度 ----
+_HEADER_FAMILIES = ("x-rate-limit", "x-user-limit-24hour", "x-app-limit-24hour")
+
+
+class WritePriority(IntEnum):
+    """数值越小越先发送"""
+
+    INTERACTIVE = 0   # Web 端用户在等结果 (/auth/roast)
+    REPLY = 1         # mention 回复 (outbox)
+    BACKGROUND = 2    # Active Roast，只使用预留额度之外的部分
+
+
+class WriteDelayed(Exception):
+    """预计等待超过调用方可接受的上限 (入队前预估，或排队后超过截止时间仍未发出)，请求没有发送"""
+
+    def __init__(self, endpoint: str, delay: float):
+        super().__init__(f"{endpoint} write delayed ~{delay:.0f}s by rate limit")
+        self.endpoint = endpoint
+        self.delay = delay
+
+
+class RateWindow:
+    """一个限额窗口；limit / remaining / reset_at 来自最近一次响应头，发送时先乐观扣减"""
+
+    __slots__ = ("limit", "remaining", "reset_at")
+
+    def __init__(self, limit: int, remaining: int, reset_at: float):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+
+    def refresh(self, now: float):
+        """窗口已重置但还没有新的响应头: 视为额度回满"""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+
+    def stats(self, now: float) -> dict:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "resets_in_s": max(0, round(self.reset_at - now)),
+        }
+
+
+def parse_rate_windows(headers: Mapping[str, str]) -> dict[str, RateWindow]:
+    """从响应头解析出各限额窗口，缺失或格式错误的族忽略"""
+    windows = {}
+    lowered = {k.lower(): v for k, v in headers.items()}
+    for family in _HEADER_FAMILIES:
+        try:
+            windows[family] = RateWindow(
+                int(lowered[f"{family}-limit"]),
+                int(lowered[f"{family}-remaining"]),
+                float(lowered[f"{family}-reset"]),
+            )
+        except (KeyError, ValueError):
+            continue
+    return windows
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "endpoint", "call", "future", "send_by", "rate_limited")
+
+    def __init__(
+        self,
+        priority: WritePriority,
+        seq: int,
+        endpoint: str,
+        call: Callable[[], Any],
+        future: asyncio.Future,
+        send_by: Optional[float] = None,
+    ):
+        self.priority = priority
+        self.seq = seq
+        self.endpoint = endpoint
+        self.call = call
+        self.future = future
+        self.send_by = send_by   # 最晚发送时间 (调度器时钟)；过了仍未发出则以 WriteDelayed 失败，不再发送
+        self.rate_limited = 0
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class XWriteScheduler:
+    """
+    单个派发任务按 (优先级, 到达顺序) 出队，同一时刻最多 concurrency 个请求在途 (同步调用放到线程池)
+    发送时机:
+    - 未见过响应头的端点直接发送
+    - 剩余额度高于 limit × pace_below: 不限速
+    - 低于该水位: 发送间隔 = 距重置时间 / 剩余额度，窗口结束时恰好用完
+    - 额度为 0: 等到重置时间 (BACKGROUND 另外保留 limit × reserve_ratio 给回复与 Web 端)
+    - 仍收到 429: 用该响应头更新窗口后重新入队，最多 max_rate_limited 次
+    - 带 max_wait 的请求记下最晚发送时间；入队后被更高优先级插队、429 重排或等待重置推迟到超过该时间时，
+      以 WriteDelayed 失败而不发送 (调用方的租约此时可能已到期，记录会被重新认领，再发就是重复发送)
+    额度由 X 按账号计算，各进程各自从响应头学习，多进程同时写时以最新响应头为准
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        pace_below: float = 0.25,
+        reserve_ratio: float = 0.1,
+        max_rate_limited: int = 3,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.concurrency = concurrency
+        self.pace_below = pace_below
+        self.reserve_ratio = reserve_ratio
+        self.max_rate_limited = max_rate_limited
+        self._clock = clock
+
+        self.windows: dict[str, dict[str, RateWindow]] = {}
+        self._last_sent: dict[str, float] = {}
+        self._queue: list[_Job] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.delayed = 0
+        self.rate_limited = 0
+
+    # ---- 额度计算 ----
+
+    def _reserve(self, window: RateWindow, priority: WritePriority) -> int:
+        return int(window.limit * self.reserve_ratio) if priority == WritePriority.BACKGROUND else 0
+
+    def send_delay(self, endpoint: str, priority: WritePriority, ahead: int = 0) -> float:
+        """前面还有 ahead 个请求时，新请求最早可发送的等待秒数"""
+        now = self._clock()
+        delay = 0.0
+        for window in self.windows.get(endpoint, {}).values():
+            window.refresh(now)
+            available = window.remaining - self._reserve(window, priority)
+            until_reset = max(0.0, window.reset_at - now)
+
+            if available <= ahead:
+                delay = max(delay, until_reset)
+            elif window.remaining <= window.limit * self.pace_below:
+                gap = until_reset / max(1, window.remaining)
+                since_last = now - self._last_sent.get(endpoint, float("-inf"))
+                delay = max(delay, gap * ahead + max(0.0, gap - since_last))
+        return delay
+
+    def estimate_delay(self, endpoint: str, priority: WritePriority) -> float:
+        ahead = sum(1 for job in self._queue if job.endpoint == endpoint and job.priority <= priority)
+        return self.send_delay(endpoint, priority, ahead)
+
+    def observe(self, endpoint: str, headers: Mapping[str, str]):
+        """用响应头 (成功或 429) 校正额度"""
+        windows = parse_rate_windows(headers)
+        if windows:
+            self.windows.setdefault(endpoint, {}).update(windows)
+            self._wakeup.set()
+
+    def _consume(self, endpoint: str):
+        self._last_sent[endpoint] = self._clock()
+        for window in self.windows.get(endpoint, {}).values():
+            window.remaining = max(0, window.remaining - 1)
+
+    # ---- 提交与派发 ----
+
+    async def submit(
+        self,
+        endpoint: str,
+        call: Callable[[], Any],
+        priority: WritePriority = WritePriority.REPLY,
+        max_wait: Optional[float] = None,
+    ) -> Any:
+        """
+        call 为同步函数 (tweepy)，返回值需带 headers 属性 (requests.Response)
+        预计等待超过 max_wait 时不入队，直接抛 WriteDelayed；入队后 max_wait 秒内仍未发出同样抛 WriteDelayed
+        """
+        send_by = None
+        if max_wait is not None:
+            delay = self.estimate_delay(endpoint, priority)
+            if delay > max_wait:
+                self.delayed += 1
+                raise WriteDelayed(endpoint, delay)
+            send_by = self._clock() + max_wait
+
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(priority, next(self._seq), endpoint, call, future, send_by)
+        heapq.heappush(self._queue, job)
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        return await job.future
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while self._queue:
+            self._expire()
+            if not self._queue:
+                break
+            job = self._queue[0]
+            if job.future.done():
+                # ---- 调用方已取消 ----
+                heapq.heappop(self._queue)
+                continue
+
+            delay = self.send_delay(job.endpoint, job.priority)
+            if delay > 0:
+                # ---- 等到可发送或最近的截止时间，期间有新请求 (可能优先级更高) 或新响应头时重新评估 ----
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, self._until_next_deadline()))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._slots.acquire()
+            if not self._queue or self._queue[0] is not job or self._expired(job):
+                # ---- 等槽位期间有更高优先级的请求入队或已过截止时间，重新评估队首 ----
+                self._slots.release()
+                continue
+            heapq.heappop(self._queue)
+            self._consume(job.endpoint)
+            asyncio.create_task(self._execute(job))
+
+    def _expired(self, job: _Job) -> bool:
+        return job.send_by is not None and self._clock() > job.send_by
+
+    def _expire(self):
+        """排队中已过最晚发送时间的请求以 WriteDelayed 失败，不再发送"""
+        expired = [job for job in self._queue if self._expired(job)]
+        if not expired:
+            return
+        self._queue = [job for job in self._queue if not self._expired(job)]
+        heapq.heapify(self._queue)
+        for job in expired:
+            if job.future.done():
+                continue
+            self.delayed += 1
+            delay = self.estimate_delay(job.endpoint, job.priority)
+            logger.warning(f"{job.endpoint} write not sent within its deadline, failing it (next slot ~{delay:.0f}s)")
+            job.future.set_exception(WriteDelayed(job.endpoint, delay))
+
+    def _until_next_deadline(self) -> float:
+        deadlines = [job.send_by for job in self._queue if job.send_by is not None]
+        return max(0.0, min(deadlines) - self._clock()) if deadlines else float("inf")
+
+    async def _execute(self, job: _Job):
+        try:
+            response = await asyncio.to_thread(job.call)
+        except Exception as e:
+            response = getattr(e, "response", None)
+            if response is not None:
+                self.observe(job.endpoint, response.headers)
+
+            if getattr(response, "status_code", None) == 429 and job.rate_limited < self.max_rate_limited:
+                # ---- 额度判断落后于服务端 (其他进程也在写): 窗口已按 429 响应头更新，重新排队 ----
+                job.rate_limited += 1
+                self.rate_limited += 1
+                logger.warning(f"{job.endpoint} returned 429, requeued (attempt {job.rate_limited})")
+                heapq.heappush(self._queue, job)
+                self._ensure_dispatcher()
+                self._wakeup.set()
+            elif not job.future.done():
+                job.future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        self.observe(job.endpoint, response.headers)
+        self.sent += 1
+        if not job.future.done():
+            job.future.set_result(response)
+
+    def stats(self) -> dict:
+        now = self._clock()
+        return {
+            "queued": {p.name.lower(): sum(1 for j in self._queue if j.priority == p) for p in WritePriority},
+            "sent": self.sent,
+            "delayed": self.delayed,
+            "rate_limited": self.rate_limited,
+            "windows": {
+                endpoint: {family: window.stats(now) for family, window in windows.items()}
+                for endpoint, windows in self.windows.items()
+            },
+        }
+
+
+@lru_cache
+def get_x_scheduler() -> XWriteScheduler:
+    settings = get_settings()
+    return XWriteScheduler(
+        concurrency=settings.x_write_concurrency,
+        pace_below=settings.x_write_pace_below,
+        reserve_ratio=settings.x_write_reserve_ratio,
+    )
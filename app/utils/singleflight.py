@@ -0,0 +1,48 @@
+"""
+[INPUT]: 依赖 asyncio，纯逻辑
+[OUTPUT]: 对外提供 SingleFlight
+[POS]: utils 模块的并发请求合并工具：同一 key 同时只执行一次，其余调用方共享结果，被 app.services.roast_cache 消费
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    同一 key 的并发调用合并为一次执行
+    - 执行体在独立任务中运行，任何一个调用方被取消都不会连累其他调用方
+    - 执行体在空的 contextvars 上下文中运行，不继承发起者的上下文 (如截止时间)；需要时由执行体自己设置
+    - 结果与异常原样分发给全部调用方；执行结束即移除，不做缓存
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def get(self, key: Hashable) -> Optional[asyncio.Task]:
+        """正在进行的执行；没有时返回 None"""
+        return self._calls.get(key)
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[asyncio.Task, bool]:
+        """返回 (执行任务, 是否为共享已有执行)"""
+        task = self._calls.get(key)
+        if task is not None:
+            return task, True
+
+        task = asyncio.get_running_loop().create_task(fn(), context=contextvars.Context())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return task, False
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """执行或加入已有执行，返回 (结果, 是否共享)"""
+        task, shared = self.start(key, fn)
+        return await asyncio.shield(task), shared
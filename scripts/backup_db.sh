@@ -1,6 +1,7 @@
 #!/bin/bash
 # 数据库备份脚本
 # 用法: ./scripts/backup_db.sh
+# 全量 pg_dump 仅用于灾备；日常分析数据用增量导出: python -m app.jobs.export
 
 BACKUP_DIR="./backups"
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
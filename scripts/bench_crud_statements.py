@@ -0,0 +1,123 @@
+"""
+[INPUT]: 依赖 sqlalchemy, app.db.crud, app.db.models, app.db.session (--db 模式)
+[OUTPUT]: 热点 CRUD 语句的单次调用开销基准 (旧写法 vs 预构建语句)
+[POS]: scripts 目录的性能基准脚本，手动运行
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+
+用法:
+    PYTHONPATH=. python scripts/bench_crud_statements.py            # 仅测语句构建 + 编译缓存开销
+    PYTHONPATH=. python scripts/bench_crud_statements.py --db -n 2000  # 连真实数据库测完整往返
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db import crud
+from app.db.models import ProcessedMention, RoastProfile, RevengeRelation, ProcessingStatus
+
+
+# ============================================================
+#  旧写法 (每次调用新建 select)
+# ============================================================
+
+def _legacy_mention_stmt(tweet_id: str):
+    return select(ProcessedMention).where(ProcessedMention.tweet_id == tweet_id)
+
+
+def _legacy_profile_stmt(handle: str):
+    return select(RoastProfile).where(RoastProfile.target_handle == handle)
+
+
+def _legacy_revenge_stmt(attacker: str, victim: str):
+    return select(RevengeRelation).where(
+        RevengeRelation.attacker_handle == attacker,
+        RevengeRelation.victim_handle == victim,
+    )
+
+
+def _per_call_us(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+# ============================================================
+#  离线: 语句构建 + cache key (命中编译缓存前的必经开销)
+# ============================================================
+
+def bench_offline(n: int):
+    dialect = postgresql.asyncpg.dialect()
+
+    cases = {
+        "is_mention_processed": (
+            lambda: _legacy_mention_stmt("1")._generate_cache_key(),
+            lambda: crud._MENTION_EXISTS_STMT._generate_cache_key(),
+        ),
+        "get_roast_profile": (
+            lambda: _legacy_profile_stmt("a")._generate_cache_key(),
+            lambda: crud._ROAST_PROFILE_BY_HANDLE_STMT._generate_cache_key(),
+        ),
+        "get_revenge_context": (
+            lambda: _legacy_revenge_stmt("a", "b")._generate_cache_key(),
+            lambda: crud._REVENGE_BY_PAIR_STMT._generate_cache_key(),
+        ),
+    }
+
+    print(f"{'query':<24}{'legacy us/call':>16}{'cached us/call':>16}")
+    for name, (legacy, cached) in cases.items():
+        print(f"{name:<24}{_per_call_us(legacy, n):>16.2f}{_per_call_us(cached, n):>16.2f}")
+
+    # ---- 编译缓存未命中时的代价 (参考值) ----
+    compile_us = _per_call_us(lambda: _legacy_mention_stmt("1").compile(dialect=dialect), max(n // 10, 1))
+    print(f"\nfull compile (cache miss): {compile_us:.2f} us/call")
+
+
+# ============================================================
+#  在线: 真实往返 (需要 DATABASE_URL)
+# ============================================================
+
+async def bench_db(n: int):
+    from app.db.session import get_async_session, dispose_engines
+
+    async def run(label: str, call):
+        async with get_async_session() as session:
+            await call(session)  # 预热: 建立连接 + 预编译
+            start = time.perf_counter()
+            for _ in range(n):
+                await call(session)
+            elapsed = (time.perf_counter() - start) / n * 1e6
+        print(f"{label:<40}{elapsed:>12.1f} us/call")
+
+    await run("legacy is_mention_processed", lambda s: s.execute(_legacy_mention_stmt("bench-missing")))
+    await run("crud.is_mention_processed", lambda s: crud.is_mention_processed(s, "bench-missing"))
+    await run("legacy get_roast_profile", lambda s: s.execute(_legacy_profile_stmt("bench-missing")))
+    await run("crud.get_roast_profile", lambda s: crud.get_roast_profile(s, "bench-missing"))
+    await run("legacy get_revenge_context", lambda s: s.execute(_legacy_revenge_stmt("a", "b")))
+    await run("crud.get_revenge_context", lambda s: crud.get_revenge_context(s, "a", "b"))
+    await run(
+        "crud.update_mention_status (no-op row)",
+        lambda s: crud.update_mention_status(s, "bench-missing", ProcessingStatus.FAILED),
+    )
+
+    await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hot CRUD statement overhead")
+    parser.add_argument("-n", type=int, default=5000, help="iterations per case")
+    parser.add_argument("--db", action="store_true", help="run round trips against DATABASE_URL")
+    args = parser.parse_args()
+
+    bench_offline(args.n)
+    if args.db:
+        print()
+        asyncio.run(bench_db(args.n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+[INPUT]: 依赖 asyncio, app.bot.admission, app.bot.ingest
+[OUTPUT]: AdmissionController / TokenBucket 的单元测试，以及 ingest / worker 分进程时准入标记释放的测试
+[POS]: tests 模块的准入控制测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.bot import admission as admission_module
+from app.bot import ingest
+from app.bot.admission import AdmissionController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _mention(author_id="u1", reply_to="t1"):
+    return {"tweet_id": "x", "author_id": author_id, "reply_to_tweet_id": reply_to}
+
+
+def test_inflight_pair_coalesced_until_release():
+    admission = AdmissionController(author_burst=10)
+    mention = _mention()
+
+    assert admission.admit(mention)
+    assert not admission.admit(_mention())
+    assert admission.coalesced == 1
+
+    admission.release(mention)
+    assert admission.admit(_mention())
+
+
+def test_completed_pair_kept_for_ttl():
+    clock = FakeClock()
+    admission = AdmissionController(pair_ttl=60, author_burst=10, clock=clock)
+    mention = _mention()
+
+    admission.admit(mention)
+    admission.mark_completed(mention)
+    admission.release(mention)
+    assert not admission.admit(_mention())
+
+    clock.now = 61
+    assert admission.admit(_mention())
+
+
+def test_author_burst_limited():
+    clock = FakeClock()
+    admission = AdmissionController(author_rate=1.0, author_burst=2, clock=clock)
+
+    assert admission.admit(_mention(reply_to=None))
+    assert admission.admit(_mention(reply_to=None))
+    assert not admission.admit(_mention(reply_to=None))
+    assert admission.admit(_mention(author_id="u2", reply_to=None))
+
+    clock.now = 1.0
+    assert admission.admit(_mention(reply_to=None))
+
+
+def test_split_roles_release_pair_once_enqueued(monkeypatch):
+    """APP_ROLE=ingest: worker 在另一个进程，入队后 pair 必须立即释放，不能卡满 pair_ttl"""
+    ingest_side = AdmissionController(author_burst=10)
+    outcomes = iter([True, False])
+
+    async def fake_ingest(mention):
+        return next(outcomes)
+
+    monkeypatch.setattr(ingest, "ingest_mention", fake_ingest)
+
+    async def scenario():
+        queued = await ingest.admit_and_ingest(_mention(), ingest_side)
+        # ---- 第一条被 worker 判为 UNKNOWN / 失败，同 thread 同请求者的新 mention 仍能入队 ----
+        requeued = await ingest.admit_and_ingest(_mention(), ingest_side)
+        return queued, requeued
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert ingest_side.coalesced == 0
+    assert len(ingest_side._pairs) == 0
+
+
+def test_worker_only_process_does_not_track_completions(monkeypatch):
+    worker_side = AdmissionController(author_burst=10)
+    monkeypatch.setattr(admission_module, "get_admission_controller", lambda: worker_side)
+
+    monkeypatch.setattr(admission_module, "get_settings", lambda: SimpleNamespace(app_role="worker"))
+    admission_module.mark_pair_completed(_mention())
+    assert len(worker_side._pairs) == 0
+
+    monkeypatch.setattr(admission_module, "get_settings", lambda: SimpleNamespace(app_role="all"))
+    admission_module.mark_pair_completed(_mention())
+    assert not worker_side.admit(_mention())
@@ -0,0 +1,168 @@
+"""
+[INPUT]: 依赖 asyncio, jwt, fastapi, app.api.deps, app.db.crud
+[OUTPUT]: 认证依赖 (token 提取 / Principal 缓存)、画像摘要缓存命中不借连接与缓存失效的单元测试
+[POS]: tests 模块的认证依赖测试，直接调用依赖函数，不经过 HTTP 层与数据库
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.api import deps
+from app.db import crud
+from app.db.invalidation import RequesterSummaryListener
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    deps._principal_cache.clear()
+    crud._requester_summary_cache.clear()
+    yield
+    deps._principal_cache.clear()
+    crud._requester_summary_cache.clear()
+
+
+def test_bearer_header_takes_precedence_over_query():
+    assert asyncio.run(deps.get_token(authorization="Bearer header-token", token="query-token")) == "header-token"
+    assert asyncio.run(deps.get_token(authorization=None, token="query-token")) == "query-token"
+    assert asyncio.run(deps.get_token(authorization="Basic abc", token="query-token")) == "query-token"
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(deps.get_token(authorization=None, token=None))
+    assert exc.value.status_code == 401
+
+
+def test_principal_is_decoded_once_then_cached(monkeypatch):
+    token = deps.issue_token("42", "alice")
+    calls = []
+    real_decode = deps.decode_token
+    monkeypatch.setattr(deps, "decode_token", lambda t: calls.append(t) or real_decode(t))
+
+    first = asyncio.run(deps.get_principal(token))
+    second = asyncio.run(deps.get_principal(token))
+
+    assert (first.user_id, first.username) == ("42", "alice")
+    assert second is first
+    assert calls == [token]
+
+
+def test_invalid_token_is_rejected_and_not_cached():
+    forged = jwt.encode({"user_id": "42", "exp": time.time() + 60}, "wrong-secret", algorithm="HS256")
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(deps.get_principal(forged))
+        assert exc.value.status_code == 401
+    assert len(deps._principal_cache) == 0
+
+
+def test_cached_principal_does_not_outlive_token_exp():
+    token = jwt.encode(
+        {"user_id": "42", "username": "alice", "exp": int(time.time()) + 5},
+        deps.settings.jwt_secret,
+        algorithm="HS256",
+    )
+    asyncio.run(deps.get_principal(token))
+
+    expires_at, _ = deps._principal_cache._data[token]
+    assert expires_at - time.monotonic() <= 5
+    assert deps.settings.auth_principal_cache_ttl > 5
+
+
+def test_expired_principal_in_cache_is_not_served():
+    token = deps.issue_token("42", "alice")
+    stale = deps.Principal("42", "alice", expires_at=time.time() - 1)
+    deps._principal_cache.set(token, stale, ttl=60)
+
+    principal = asyncio.run(deps.get_principal(token))
+    assert principal is not stale
+    assert principal.expires_at > time.time()
+
+
+def test_requester_summary_is_cached_until_invalidated(monkeypatch):
+    profile = SimpleNamespace(user_id="42", username="alice", request_count=1, favorite_targets=None)
+    lookups = []
+
+    async def fake_lookup(session, user_id):
+        lookups.append(user_id)
+        return profile
+
+    monkeypatch.setattr(crud, "get_requester_profile_by_id", fake_lookup)
+
+    async def scenario():
+        first = await crud.get_requester_summary(None, "42")
+        profile.request_count = 2
+        cached = await crud.get_requester_summary(None, "42")
+        crud.invalidate_requester_summaries(["42"])
+        fresh = await crud.get_requester_summary(None, "42")
+        return first, cached, fresh
+
+    first, cached, fresh = asyncio.run(scenario())
+    assert first["request_count"] == cached["request_count"] == 1
+    assert first["favorite_targets"] == []
+    assert fresh["request_count"] == 2
+    assert lookups == ["42", "42"]
+
+
+def test_profile_summary_cache_hit_does_not_open_a_session(monkeypatch):
+    sessions = []
+
+    @asynccontextmanager
+    async def counting_session(workload):
+        sessions.append(workload)
+        yield None
+
+    async def fake_lookup(session, user_id):
+        return SimpleNamespace(user_id=user_id, username="alice", request_count=1, favorite_targets=[])
+
+    monkeypatch.setattr(deps, "get_async_session", counting_session)
+    monkeypatch.setattr(crud, "get_requester_profile_by_id", fake_lookup)
+    principal = deps.Principal("42", "alice", expires_at=time.time() + 60)
+
+    async def scenario():
+        return [await deps.get_profile_summary(principal) for _ in range(3)]
+
+    summaries = asyncio.run(scenario())
+    assert all(summary["user_id"] == "42" for summary in summaries)
+    assert sessions == ["api"]
+
+
+def test_summary_invalidation_is_published_in_chunks():
+    class _Conn:
+        def __init__(self):
+            self.payloads = []
+
+        async def execute(self, stmt, params):
+            assert "pg_notify" in str(stmt)
+            assert params["channel"] == crud.REQUESTER_SUMMARY_CHANNEL
+            self.payloads.append(params["payload"])
+
+    ids = [str(i) for i in range(crud.REQUESTER_SUMMARY_NOTIFY_BATCH + 1)]
+    conn = _Conn()
+    asyncio.run(crud.publish_requester_summary_invalidation(conn, ids))
+    assert [len(json.loads(p)) for p in conn.payloads] == [crud.REQUESTER_SUMMARY_NOTIFY_BATCH, 1]
+
+    conn = _Conn()
+    asyncio.run(crud.publish_requester_summary_invalidation(conn, None))
+    assert conn.payloads == ["*"]
+
+
+def test_listener_notifications_invalidate_summaries(monkeypatch):
+    invalidated, cleared = [], []
+    monkeypatch.setattr(crud, "invalidate_requester_summaries", invalidated.append)
+    monkeypatch.setattr(crud, "invalidate_all_requester_summaries", lambda: cleared.append(True))
+    listener = RequesterSummaryListener()
+
+    listener.on_notify(None, 1, crud.REQUESTER_SUMMARY_CHANNEL, '["42", "7"]')
+    assert invalidated == [["42", "7"]] and cleared == []
+
+    listener.on_notify(None, 1, crud.REQUESTER_SUMMARY_CHANNEL, "*")
+    listener.on_notify(None, 1, crud.REQUESTER_SUMMARY_CHANNEL, "not-json")
+    assert cleared == [True, True]
+    assert listener.stats()["notifications"] == 3
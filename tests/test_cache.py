@@ -0,0 +1,51 @@
+"""
+[INPUT]: 依赖 app.utils.cache
+[OUTPUT]: TTLCache 的单元测试
+[POS]: tests 模块的进程内缓存测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+from app.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_and_expire():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_invalidate_where():
+    cache = TTLCache(maxsize=8, ttl=10)
+    cache.set(("elon", "jack"), 1)
+    cache.set(("elon", "bob"), 2)
+    cache.set(("jack", "elon"), 3)
+
+    cache.invalidate_where(lambda key: key[0] == "elon")
+
+    assert len(cache) == 1
+    assert cache.get(("jack", "elon")) == 3
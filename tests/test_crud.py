@@ -0,0 +1,117 @@
+"""
+[INPUT]: 依赖 asyncio, sqlalchemy postgresql 方言, app.db.crud
+[OUTPUT]: crud 预编译语句形状 (含公平认领的按作者取候选) 与 thread 占位加锁顺序的单元测试 (只编译 SQL / 假会话，不连接数据库)
+[POS]: tests 模块的 crud 语句测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.db import crud
+from app.db.models import ProcessingStatus
+
+
+def test_processed_at_uses_server_clock():
+    sql = str(crud._UPDATE_MENTION_STATUS_STMT.compile(dialect=postgresql.dialect()))
+    assert "processed_at=now()" in sql
+    assert "processed_at" not in "".join(crud._mention_status_params("1", ProcessingStatus.COMPLETED))
+
+
+def test_final_status_clears_payload_as_sql_null():
+    sql = str(crud._UPDATE_MENTION_STATUS_STMT.compile(dialect=postgresql.dialect()))
+    assert "payload=NULL" in sql
+
+
+def test_thread_dedup_counts_in_flight_roasts_of_other_mentions():
+    compiled = crud._THREAD_REQUESTER_EXISTS_STMT.compile(dialect=postgresql.dialect())
+    assert "processed_mentions.tweet_id != %(tweet_id)s" in str(compiled)
+    assert "processed_mentions.status != %(status_1)s" in str(compiled)
+    assert compiled.params["status_1"] == ProcessingStatus.FAILED
+
+
+class _ClaimSession:
+    """记录语句顺序；C3 查询返回 taken"""
+
+    def __init__(self, taken: bool):
+        self.taken = taken
+        self.log = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.log.append(sql.split("(")[0] if sql.startswith("SELECT pg_") else sql.split()[0])
+        return _Result(self.taken)
+
+    async def rollback(self):
+        self.log.append("rollback")
+
+    async def commit(self):
+        self.log.append("commit")
+
+
+class _Result:
+    def __init__(self, row: bool):
+        self.row = row
+
+    def first(self):
+        return (1,) if self.row else None
+
+
+def test_thread_claim_rechecks_under_pair_lock():
+    taken = _ClaimSession(taken=True)
+    assert asyncio.run(crud.claim_thread_requester(taken, "2", "100", "42", "bob")) is False
+    assert taken.log == ["SELECT pg_advisory_xact_lock", "SELECT", "rollback"]
+
+    free = _ClaimSession(taken=False)
+    assert asyncio.run(crud.claim_thread_requester(free, "2", "100", "42", "bob")) is True
+    assert free.log == ["SELECT pg_advisory_xact_lock", "SELECT", "UPDATE", "commit"]
+
+
+class _CaptureSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return _Rows()
+
+    async def commit(self):
+        pass
+
+
+class _Rows:
+    rowcount = 0
+
+    def all(self):
+        return []
+
+
+def test_fair_claim_picks_per_author_heads_before_the_window():
+    """刷屏作者的积压不能占满候选: 先排除在途已满的作者，再按作者取前 window 个，每个作者只取 author_cap 条"""
+    session = _CaptureSession()
+    asyncio.run(crud.claim_mentions(session, "w1", limit=10, lease_seconds=60, author_cap=3, window=50))
+    compiled = session.statements[0].compile(dialect=postgresql.dialect())
+    sql = " ".join(str(compiled).split())
+
+    authors = sql[sql.index("FROM (SELECT processed_mentions_1.author_id"):sql.index(") AS authors")]
+    assert "NOT IN (SELECT in_flight.author_id" in authors
+    assert "WHERE in_flight.cnt >= %(cnt_1)s" in authors
+    assert authors.rstrip().endswith("LIMIT %(param_1)s::INTEGER")
+    assert "JOIN LATERAL" in sql and ") AS heads ON true" in sql
+    assert "FOR UPDATE OF processed_mentions SKIP LOCKED" in sql
+    assert (compiled.params["param_1"], compiled.params["param_2"], compiled.params["cnt_1"]) == (50, 3, 3)
+
+
+def test_keyed_updates_pin_the_partition_through_the_key_table():
+    """按 tweet_id 的更新带上去重键表里的 created_at，执行期只落到一个分区"""
+    sql = " ".join(str(crud._UPDATE_MENTION_STATUS_STMT.compile(dialect=postgresql.dialect())).split())
+    assert (
+        "processed_mentions.created_at = (SELECT processed_mention_keys.created_at FROM processed_mention_keys "
+        "WHERE processed_mention_keys.tweet_id = %(p_tweet_id)s::VARCHAR)"
+    ) in sql
+
+    session = _CaptureSession()
+    asyncio.run(crud.release_mentions(session, "w1", ["1", "2"]))
+    released = " ".join(str(session.statements[0].compile(dialect=postgresql.dialect())).split())
+    assert "processed_mentions.created_at BETWEEN (SELECT min(processed_mention_keys.created_at)" in released
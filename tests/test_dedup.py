@@ -0,0 +1,83 @@
+"""
+[INPUT]: 依赖 app.bot.dedup, app.bot.ingest
+[OUTPUT]: BloomFilter / MentionDedupFilter 的单元测试，以及 ingest 按判定分流 (查库 / 直接插入) 的测试
+[POS]: tests 模块的进程内幂等过滤器测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.bot import ingest
+from app.bot.dedup import BloomFilter, MentionDedupFilter, DedupVerdict
+
+
+def test_bloom_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [str(i) for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"seen-{i}")
+    false_positives = sum(f"unseen-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_filter_verdicts():
+    dedup = MentionDedupFilter(recent_size=2, bloom_capacity=100)
+    assert dedup.check("1") == DedupVerdict.NEW
+
+    dedup.add("1")
+    dedup.add("2")
+    dedup.add("3")
+
+    assert dedup.check("3") == DedupVerdict.DUPLICATE
+    # ---- 被挤出 LRU 但仍在 Bloom 中，需要查库 ----
+    assert dedup.check("1") == DedupVerdict.UNKNOWN
+    assert dedup.check("4") == DedupVerdict.NEW
+
+
+def test_bloom_rebuild_keeps_recent():
+    dedup = MentionDedupFilter(recent_size=5, bloom_capacity=10)
+    for i in range(25):
+        dedup.add(str(i))
+    assert dedup.check("24") == DedupVerdict.DUPLICATE
+    assert len(dedup) == 5
+
+
+def test_ingest_looks_up_only_maybe_seen_ids(monkeypatch):
+    dedup = MentionDedupFilter(recent_size=1, bloom_capacity=100)
+    dedup.add("old")
+    dedup.add("recent")          # "old" 被挤出 LRU，只留在 Bloom 中
+    calls = []
+
+    @asynccontextmanager
+    async def fake_session(*args):
+        yield None
+
+    async def fake_exists(session, tweet_id):
+        calls.append(("lookup", tweet_id))
+        return True
+
+    async def fake_enqueue(session, mention):
+        calls.append(("insert", mention["tweet_id"]))
+        return True
+
+    monkeypatch.setattr(ingest, "get_mention_filter", lambda: dedup)
+    monkeypatch.setattr(ingest, "get_async_session", fake_session)
+    monkeypatch.setattr(ingest, "is_mention_processed", fake_exists)
+    monkeypatch.setattr(ingest, "enqueue_mention", fake_enqueue)
+
+    async def scenario():
+        return [
+            await ingest.ingest_mention({"tweet_id": tweet_id, "author_username": "alice"})
+            for tweet_id in ("recent", "old", "new")
+        ]
+
+    assert asyncio.run(scenario()) == [False, False, True]
+    assert calls == [("lookup", "old"), ("insert", "new")]
@@ -0,0 +1,74 @@
+"""
+[INPUT]: 依赖 app.jobs.export, app.db.projections
+[OUTPUT]: WatermarkStore / ChunkWriter / 水位列的单元测试
+[POS]: tests 模块的增量导出测试 (不连数据库)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import gzip
+import json
+import uuid
+from datetime import datetime, timezone
+
+from app.db.models import TriggerType
+from app.db import projections
+from app.jobs.export import EXPORT_TABLES, WatermarkStore, ChunkWriter
+
+
+def test_watermark_roundtrip(tmp_path):
+    path = tmp_path / "_watermarks.json"
+    store = WatermarkStore(path)
+    assert store.get("roast_profiles") is None
+
+    at = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    store.set("roast_profiles", at, "abc")
+
+    reloaded = WatermarkStore(path)
+    assert reloaded.get("roast_profiles") == (at, "abc")
+
+    reloaded.reset("roast_profiles")
+    assert WatermarkStore(path).get("roast_profiles") is None
+
+
+def test_ndjson_chunk_serializes_rows(tmp_path):
+    writer = ChunkWriter(tmp_path / "processed_mentions", "20260101T000000Z", "ndjson")
+    row_id = uuid.uuid4()
+    at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    path = writer.write(["id", "trigger_type", "created_at", "meta"], [(row_id, TriggerType.X_ROAST, at, [1])])
+
+    assert path.name == "20260101T000000Z_part0001.ndjson.gz"
+    with gzip.open(path, "rt", encoding="utf-8") as fp:
+        record = json.loads(fp.readline())
+    assert record == {"id": str(row_id), "trigger_type": "x_roast", "created_at": at.isoformat(), "meta": [1]}
+
+
+def test_oauth_tokens_never_exported():
+    names = {c.name for c in EXPORT_TABLES["requester_profiles"].columns}
+    assert "oauth_access_token" not in names
+    assert "oauth_refresh_token" not in names
+    assert "user_id" in names
+
+
+def test_every_table_exports_on_updated_at():
+    # ---- created_at / last_attack_at 不随状态更新或重建替换推进，晚到的变更会漏导 ----
+    assert {spec.watermark for spec in EXPORT_TABLES.values()} == {"updated_at"}
+    for spec in EXPORT_TABLES.values():
+        assert spec.model.__table__.c.updated_at.server_default is not None
+
+
+def test_rebuild_swaps_bump_updated_at():
+    class _Conn:
+        def __init__(self):
+            self.statements = []
+
+        async def execute(self, stmt, params=None):
+            self.statements.append(str(stmt))
+
+    swaps = (projections._swap_roast_profiles, projections._swap_requester_profiles, projections._swap_revenge_relations)
+    for swap in swaps:
+        conn = _Conn()
+        asyncio.run(swap(conn))
+        upsert = next(sql for sql in conn.statements if "ON CONFLICT" in sql)
+        assert "updated_at = now()" in upsert.split("DO UPDATE SET", 1)[1]
@@ -0,0 +1,140 @@
+"""
+[INPUT]: 依赖 asyncio, pytest, app.services.limiter
+[OUTPUT]: AdaptiveLimiter 的 AIMD 调节、排队与拒绝的单元测试
+[POS]: tests 模块的自适应限流测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.limiter import AdaptiveLimiter, LimiterRejected
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_additive_increase_on_fast_success():
+    async def scenario():
+        clock = FakeClock()
+        limiter = AdaptiveLimiter("t", initial_limit=4, latency_threshold=1.0, clock=clock)
+        for _ in range(4):
+            async with limiter.slot():
+                clock.now += 0.1
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert 4.9 < limiter.limit < 5.1
+    assert limiter.completed == 4
+
+
+def test_multiplicative_decrease_once_per_cooldown():
+    async def scenario():
+        clock = FakeClock()
+        limiter = AdaptiveLimiter("t", initial_limit=10, backoff_ratio=0.5, cooldown=2.0, clock=clock)
+        for _ in range(3):
+            permit = await limiter.acquire()
+            permit.overloaded()
+            limiter.release(permit)
+        after_burst = limiter.limit
+
+        clock.now += 3.0
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("timeout")
+        return after_burst, limiter
+
+    after_burst, limiter = asyncio.run(scenario())
+    assert after_burst == 5
+    assert limiter.limit == 2.5
+    assert limiter.overloads == 4
+
+
+def test_slow_success_counts_as_congestion_and_ignore_is_neutral():
+    async def scenario():
+        clock = FakeClock()
+        limiter = AdaptiveLimiter("t", initial_limit=8, latency_threshold=1.0, backoff_ratio=0.5, clock=clock)
+        permit = await limiter.acquire()
+        permit.ignore()
+        limiter.release(permit)
+        unchanged = limiter.limit
+
+        async with limiter.slot():
+            clock.now += 5.0
+        return unchanged, limiter.limit
+
+    unchanged, after_slow = asyncio.run(scenario())
+    assert unchanged == 8
+    assert after_slow == 4
+
+
+def test_cancellation_never_raises_the_limit():
+    async def scenario():
+        clock = FakeClock()
+        limiter = AdaptiveLimiter("t", initial_limit=4, latency_threshold=1.0, backoff_ratio=0.5, clock=clock)
+
+        async def slow_call(elapsed: float):
+            async with limiter.slot():
+                clock.now += elapsed
+                await asyncio.sleep(10)
+
+        # ---- 阈值内被取消: 中性 ----
+        task = asyncio.create_task(slow_call(0.1))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        neutral = limiter.limit
+
+        # ---- 截止时间打断了一次已经很慢的调用: 按过载下调 ----
+        task = asyncio.create_task(slow_call(5.0))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return neutral, limiter
+
+    neutral, limiter = asyncio.run(scenario())
+    assert neutral == 4
+    assert limiter.limit == 2
+    assert (limiter.completed, limiter.cancelled, limiter.overloads) == (0, 1, 1)
+    assert limiter.in_flight == 0
+
+
+def test_queue_hands_over_slots_and_sheds_when_full():
+    async def scenario():
+        limiter = AdaptiveLimiter("t", initial_limit=1, max_queue=1, queue_timeout=1.0)
+        first = await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        with pytest.raises(LimiterRejected):
+            await limiter.acquire()
+
+        limiter.release(first)
+        second = await waiter
+        assert limiter.in_flight == 1
+        limiter.release(second)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.rejected == 1
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_queue_timeout_rejects():
+    async def scenario():
+        limiter = AdaptiveLimiter("t", initial_limit=1, queue_timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(LimiterRejected):
+            await limiter.acquire()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.timed_out == 1 and limiter.queued == 0
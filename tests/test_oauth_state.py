@@ -0,0 +1,55 @@
+"""
+[INPUT]: 依赖 asyncio, app.services.oauth_state
+[OUTPUT]: MemoryStateStore 的一次性取出、过期与容量淘汰的单元测试
+[POS]: tests 模块的 OAuth state 存储测试 (postgres 后端需要数据库，不在此覆盖)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+from app.services.oauth_state import MemoryStateStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_state_is_single_use():
+    async def scenario():
+        store = MemoryStateStore(ttl=600)
+        await store.put("s", "verifier")
+        return await store.pop("s"), await store.pop("s")
+
+    assert asyncio.run(scenario()) == ("verifier", None)
+
+
+def test_expired_state_is_rejected_and_purged():
+    async def scenario():
+        clock = FakeClock()
+        store = MemoryStateStore(ttl=600, clock=clock)
+        await store.put("old", "v1")
+        clock.now = 86_400 + 1          # 超过一天也能正确判断过期
+        expired = await store.pop("old")
+
+        await store.put("a", "v2")
+        clock.now += 601
+        await store.put("b", "v3")      # 写入时顺带清理过期的 "a"
+        return expired, len(store), await store.pop("b")
+
+    assert asyncio.run(scenario()) == (None, 1, "v3")
+
+
+def test_size_cap_evicts_earliest_expiring():
+    async def scenario():
+        clock = FakeClock()
+        store = MemoryStateStore(ttl=600, max_size=2, clock=clock)
+        for i, state in enumerate(["a", "b", "c"]):
+            clock.now = i
+            await store.put(state, state.upper())
+        return len(store), await store.pop("a"), await store.pop("c")
+
+    assert asyncio.run(scenario()) == (2, None, "C")
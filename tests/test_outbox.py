@@ -0,0 +1,33 @@
+"""
+[INPUT]: 依赖 requests, tweepy, app.bot.outbox
+[OUTPUT]: 回复发件箱错误分类的单元测试
+[POS]: tests 模块的 outbox 重试策略测试 (不连数据库、不调用 Twitter)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import requests
+import tweepy
+
+from app.bot.outbox import is_transient_error
+
+
+def _response(status_code: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = "test"
+    response._content = b"{}"
+    return response
+
+
+def test_rate_limit_and_server_errors_are_transient():
+    assert is_transient_error(tweepy.errors.TooManyRequests(_response(429)))
+    assert is_transient_error(tweepy.errors.TwitterServerError(_response(503)))
+
+
+def test_client_errors_are_permanent():
+    assert not is_transient_error(tweepy.errors.Forbidden(_response(403)))
+    assert not is_transient_error(tweepy.errors.NotFound(_response(404)))
+
+
+def test_network_errors_are_transient():
+    assert is_transient_error(requests.ConnectionError("reset"))
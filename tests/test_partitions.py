@@ -0,0 +1,49 @@
+"""
+[INPUT]: 依赖 pytest, app.db.partitions
+[OUTPUT]: 冷归档语句 (大文本移入归档、已结束行清空 payload) 与分区删除 (连同该月去重键) 的单元测试 (假连接记录 SQL，不连接数据库)
+[POS]: tests 模块的分区维护测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import pytest
+
+from app.db import partitions
+
+
+class _RecordingConnection:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(" ".join(str(statement).split()))
+        return _Result()
+
+
+class _Result:
+    rowcount = 7
+
+
+def test_archive_clears_payload_of_finished_rows_only():
+    conn = _RecordingConnection()
+    assert partitions.archive_partition(conn, "processed_mentions_p202601") == 7
+
+    insert, update = conn.statements
+    finished = "status IN ('COMPLETED', 'FAILED')"
+    assert insert.startswith("INSERT INTO processed_mentions_archive")
+    assert f"payload IS NOT NULL AND {finished}" in insert
+    assert f"payload = CASE WHEN {finished} THEN NULL ELSE payload END" in update
+
+
+def test_archive_rejects_non_partition_names():
+    with pytest.raises(ValueError):
+        partitions.archive_partition(_RecordingConnection(), "processed_mentions")
+
+
+def test_drop_partition_detaches_and_removes_that_months_keys():
+    conn = _RecordingConnection()
+    assert partitions.drop_partition(conn, "processed_mentions_p202512") == 7
+    assert conn.statements == [
+        "ALTER TABLE processed_mentions DETACH PARTITION processed_mentions_p202512",
+        "DROP TABLE processed_mentions_p202512",
+        "DELETE FROM processed_mention_keys WHERE created_at >= '2025-12-01' AND created_at < '2026-01-01'",
+    ]
@@ -0,0 +1,76 @@
+"""
+[INPUT]: 依赖 asyncio, pytest, app.bot.pipeline
+[OUTPUT]: Stage 并发上限、排队上限与统计的单元测试
+[POS]: tests 模块的分阶段管线测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+import pytest
+
+from app.bot.pipeline import Stage, StageFull
+
+
+def test_stage_limits_concurrency():
+    async def scenario():
+        stage = Stage("generate", limit=2)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with stage.slot():
+                peak = max(peak, stage.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        return stage, peak
+
+    stage, peak = asyncio.run(scenario())
+    assert peak == 2
+    assert stage.completed == 6
+    assert stage.in_flight == 0 and stage.waiting == 0
+
+
+def test_stage_rejects_when_queue_is_full():
+    async def scenario():
+        stage = Stage("generate", limit=1, queue_size=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with stage.slot():
+                await release.wait()
+
+        running = asyncio.create_task(hold())
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert stage.full
+
+        with pytest.raises(StageFull):
+            async with stage.slot():
+                pass
+
+        release.set()
+        await asyncio.gather(running, queued)
+        return stage
+
+    stage = asyncio.run(scenario())
+    assert stage.rejected == 1
+    assert stage.completed == 2
+
+
+def test_stage_counts_failures_and_reports_stats():
+    async def scenario():
+        stage = Stage("classify", limit=4)
+        with pytest.raises(ValueError):
+            async with stage.slot():
+                raise ValueError("boom")
+        async with stage.slot():
+            pass
+        return stage.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["failed"] == 1
+    assert stats["completed"] == 1
+    assert stats["occupancy"] == 0
+    assert stats["latency_ms_p95"] >= 0
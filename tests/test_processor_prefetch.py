@@ -0,0 +1,180 @@
+"""
+[INPUT]: 依赖 asyncio, pytest, app.bot.processor, app.db.models
+[OUTPUT]: 分类与上下文投机预取并发执行、按需取消 (C3 先命中时取消分类)，C3 命中或占位失败时不生成、不留下 X_ROAST 记录的单元测试
+[POS]: tests 模块的 processor 关键路径测试 (替换 LLM 与 DB 调用为本地协程)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.bot import processor
+from app.db.models import TriggerType
+
+MENTION = {
+    "tweet_id": "1",
+    "author_id": "42",
+    "author_username": "alice",
+    "text": "@bot roast @bob",
+    "reply_to_tweet_id": "100",
+}
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    calls = {"prefetch_started": False, "prefetch_cancelled": False}
+
+    def install(trigger_type: TriggerType, classify_delay: float, prefetch_delay: float):
+        async def fake_classify(mention):
+            await asyncio.sleep(classify_delay)
+            return trigger_type
+
+        async def fake_load_context(mention, target):
+            calls["prefetch_started"] = True
+            calls["target"] = target
+            try:
+                await asyncio.sleep(prefetch_delay)
+            except asyncio.CancelledError:
+                calls["prefetch_cancelled"] = True
+                raise
+            return False, {"roast_count": 3, "revenge_context": None}
+
+        monkeypatch.setattr(processor, "_classify", fake_classify)
+        monkeypatch.setattr(processor, "_load_context", fake_load_context)
+        # ---- 不依赖环境里的真实 bot 用户名，MENTION 里的 @bot 必须被排除 ----
+        monkeypatch.setattr(processor, "get_settings", lambda: SimpleNamespace(twitter_bot_username="bot"))
+        return calls
+
+    return install
+
+
+def test_roast_runs_classify_and_prefetch_concurrently(fake_stages):
+    calls = fake_stages(TriggerType.X_ROAST, classify_delay=0.1, prefetch_delay=0.1)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await processor._classify_with_prefetch(MENTION)
+        return result, loop.time() - started
+
+    (trigger_type, target, context), elapsed = asyncio.run(scenario())
+    assert trigger_type == TriggerType.X_ROAST
+    assert target == "bob" and calls["target"] == "bob"
+    assert context == (False, {"roast_count": 3, "revenge_context": None})
+    assert elapsed < 0.18
+
+
+def test_non_roast_cancels_prefetch(fake_stages):
+    calls = fake_stages(TriggerType.UNKNOWN, classify_delay=0.01, prefetch_delay=10)
+
+    trigger_type, target, context = asyncio.run(processor._classify_with_prefetch(MENTION))
+    assert trigger_type == TriggerType.UNKNOWN
+    assert target is None and context is None
+    assert calls["prefetch_started"] and calls["prefetch_cancelled"]
+
+
+class _Writes(list):
+    claim_wins = True
+
+
+def test_thread_hit_cancels_classification(fake_stages, monkeypatch):
+    """同 thread 同请求者已有 X_ROAST 占位: 预取先返回时不再等 LLM 分类"""
+    classify_cancelled = []
+
+    async def slow_classify(mention):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            classify_cancelled.append(True)
+            raise
+
+    async def handled(mention, target):
+        return True, None
+
+    fake_stages(TriggerType.X_ROAST, classify_delay=0, prefetch_delay=0)
+    monkeypatch.setattr(processor, "_classify", slow_classify)
+    monkeypatch.setattr(processor, "_load_context", handled)
+
+    trigger_type, target, context = asyncio.run(processor._classify_with_prefetch(MENTION))
+    assert (trigger_type, context) == (TriggerType.X_ROAST, (True, None))
+    assert classify_cancelled == [True]
+
+
+@pytest.fixture
+def db_writes(monkeypatch):
+
+    @asynccontextmanager
+    async def fake_session(*args):
+        yield None
+
+    async def fake_set_intent(session, tweet_id, trigger_type, target):
+        writes.append(("intent", trigger_type, target))
+
+    async def fake_skip(session, tweet_id, note):
+        writes.append(("skip", note))
+
+    async def fake_claim(session, tweet_id, reply_to_tweet_id, author_id, target):
+        writes.append(("intent", TriggerType.X_ROAST, target))
+        return writes.claim_wins
+
+    writes = _Writes()
+    monkeypatch.setattr(processor, "get_async_session", fake_session)
+    monkeypatch.setattr(processor, "set_mention_intent", fake_set_intent)
+    monkeypatch.setattr(processor, "claim_thread_requester", fake_claim)
+    monkeypatch.setattr(processor, "skip_mention", fake_skip)
+    monkeypatch.setattr(processor, "mark_pair_completed", lambda mention: None)
+    return writes
+
+
+def test_reclaimed_roast_skipped_by_thread_dedup_clears_intent(db_writes, monkeypatch):
+    """被退回后重新认领: 意图已落库，C3 命中时必须清除意图，否则投影器会把它计为一次 roast"""
+    async def fake_load_context(mention, target):
+        return True, None
+
+    monkeypatch.setattr(processor, "_load_context", fake_load_context)
+
+    asyncio.run(processor.process_claimed_mention(None, MENTION, intent=(TriggerType.X_ROAST, "bob")))
+    assert db_writes == [("skip", "[skipped - thread already handled]")]
+
+
+def test_intent_persisted_only_after_thread_dedup(fake_stages, db_writes, monkeypatch):
+    generated = []
+
+    async def fake_generate(twitter, mention, trigger_type, target, roast_ctx):
+        generated.append((trigger_type, target, roast_ctx))
+
+    monkeypatch.setattr(processor, "_generate_and_enqueue", fake_generate)
+    fake_stages(TriggerType.X_ROAST, classify_delay=0, prefetch_delay=0)
+    asyncio.run(processor.process_claimed_mention(None, MENTION))
+    assert db_writes == [("intent", TriggerType.X_ROAST, "bob")]
+    assert generated == [(TriggerType.X_ROAST, "bob", {"roast_count": 3, "revenge_context": None})]
+
+    # ---- C3 命中: 不写意图，直接跳过 ----
+    db_writes.clear()
+
+    async def handled(mention, target):
+        return True, None
+
+    monkeypatch.setattr(processor, "_load_context", handled)
+    asyncio.run(processor.process_claimed_mention(None, MENTION))
+    assert db_writes == [("skip", "[skipped - thread already handled]")]
+    assert len(generated) == 1
+
+
+def test_losing_the_thread_claim_skips_generation(fake_stages, db_writes, monkeypatch):
+    """C3 预取未命中，但同对的另一条 mention 先占位 (并发 / 其他 worker): 不生成，按重复跳过"""
+    generated = []
+
+    async def fake_generate(*args):
+        generated.append(args)
+
+    monkeypatch.setattr(processor, "_generate_and_enqueue", fake_generate)
+    fake_stages(TriggerType.X_ROAST, classify_delay=0, prefetch_delay=0)
+    db_writes.claim_wins = False
+
+    asyncio.run(processor.process_claimed_mention(None, MENTION))
+    assert db_writes == [("intent", TriggerType.X_ROAST, "bob"), ("skip", "[skipped - thread already handled]")]
+    assert generated == []
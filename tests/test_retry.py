@@ -0,0 +1,104 @@
+"""
+[INPUT]: 依赖 asyncio, httpx, pytest, app.services.retry
+[OUTPUT]: RetryPolicy 的错误分类、重试预算、截止时间与 DecorrelatedJitter 的单元测试
+[POS]: tests 模块的统一重试策略测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.retry import (
+    DeadlineExceeded,
+    DecorrelatedJitter,
+    RetryBudget,
+    RetryPolicy,
+    deadline,
+    is_retryable,
+    remaining,
+)
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://upstream.test/x-roast")
+    return httpx.HTTPStatusError("boom", request=request, response=httpx.Response(status, request=request))
+
+
+def _flaky(errors: list[Exception], result="ok"):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+
+def _no_wait(a: float, b: float) -> float:
+    return 0.0
+
+
+def test_classification():
+    assert is_retryable(_status_error(503))
+    assert is_retryable(_status_error(429))
+    assert not is_retryable(_status_error(404))
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert not is_retryable(ValueError("bad json"))
+
+
+def test_decorrelated_jitter_stays_within_bounds():
+    backoff = DecorrelatedJitter(base=1.0, cap=8.0)
+    delays = [backoff.next() for _ in range(50)]
+    assert all(1.0 <= d <= 8.0 for d in delays)
+
+
+def test_retries_transient_then_succeeds():
+    policy = RetryPolicy("t", max_attempts=3, rng=_no_wait)
+    fn, calls = _flaky([_status_error(503), httpx.ReadTimeout("slow")])
+    assert asyncio.run(policy.call(fn)) == "ok"
+    assert len(calls) == 3 and policy.retries == 2
+
+
+def test_client_error_is_not_retried():
+    policy = RetryPolicy("t", max_attempts=3, rng=_no_wait)
+    fn, calls = _flaky([_status_error(404)])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.call(fn))
+    assert len(calls) == 1
+
+
+def test_budget_limits_retries_across_calls():
+    budget = RetryBudget(ratio=0.0, min_retries=1, window=60)
+    policy = RetryPolicy("t", max_attempts=5, budget=budget, rng=_no_wait)
+
+    fn, calls = _flaky([_status_error(500)] * 10)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.call(fn))
+    assert len(calls) == 2          # 首次 + 预算内唯一一次重试
+    assert budget.exhausted == 1
+
+
+def test_deadline_stops_retrying_and_propagates_to_tasks():
+    async def read_remaining():
+        return remaining()
+
+    async def scenario():
+        policy = RetryPolicy("t", max_attempts=3, base_delay=5, max_delay=5)
+        fn, calls = _flaky([_status_error(503)] * 3)
+        with deadline(1.0):
+            inherited = await asyncio.create_task(read_remaining())
+            with pytest.raises(httpx.HTTPStatusError):
+                await policy.call(fn)
+        with deadline(0):
+            with pytest.raises(DeadlineExceeded):
+                await policy.call(fn)
+        return inherited, len(calls), remaining()
+
+    inherited, calls, after = asyncio.run(scenario())
+    assert inherited is not None and 0 < inherited <= 1.0
+    assert calls == 1               # 5s 退避超过剩余时间，不再重试
+    assert after is None
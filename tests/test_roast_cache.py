@@ -0,0 +1,136 @@
+"""
+[INPUT]: 依赖 asyncio, app.utils.singleflight, app.services.retry, app.services.roast_cache
+[OUTPUT]: SingleFlight 合并与 RoastCache 突发单次上游调用、失败不缓存、合并生成独立时限的单元测试
+[POS]: tests 模块的 x-roast 合并缓存测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+from app.services.retry import DeadlineExceeded, deadline, remaining
+from app.services.roast_cache import RoastCache
+
+
+def test_singleflight_shares_one_call():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+        gate = asyncio.Event()
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return "done"
+
+        waiters = [asyncio.create_task(flights.do("k", fn)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*waiters)
+        return calls, results, len(flights)
+
+    calls, results, remaining = asyncio.run(scenario())
+    assert calls == 1
+    assert [r for r, _ in results] == ["done"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert remaining == 0
+
+
+def test_singleflight_caller_cancel_does_not_cancel_others():
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+
+        async def fn():
+            await gate.wait()
+            return 42
+
+        first = asyncio.create_task(flights.do("k", fn))
+        second = asyncio.create_task(flights.do("k", fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        return await second
+
+    assert asyncio.run(scenario()) == (42, True)
+
+
+def test_burst_for_one_handle_costs_one_upstream_call():
+    async def scenario():
+        cache = RoastCache(ttl=60)
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"success": True, "roast": f"r{calls}"}
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        handles = ["Elon", "@elon", " ELON ", "elon"] * 3
+        results = await asyncio.gather(*(cache.get_or_generate(h, generate) for h in handles))
+        elapsed = loop.time() - started
+        later = await cache.get_or_generate("elon", generate)
+        return calls, results, later, elapsed, cache.stats()
+
+    calls, results, later, elapsed, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert {r["roast"] for r in results} == {"r1"}
+    assert later["roast"] == "r1"
+    assert elapsed < 0.1
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 11, 1)
+    assert stats["in_flight"] == 0
+
+
+def test_failures_are_shared_but_not_cached():
+    async def scenario():
+        cache = RoastCache(ttl=60)
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            if calls == 1:
+                return {"success": False, "error": "HTTP 500"}
+            return {"success": True, "roast": "ok"}
+
+        burst = await asyncio.gather(*(cache.get_or_generate("h", generate) for _ in range(3)))
+        retry = await cache.get_or_generate("h", generate)
+        return calls, burst, retry
+
+    calls, burst, retry = asyncio.run(scenario())
+    assert [r["success"] for r in burst] == [False] * 3
+    assert retry == {"success": True, "roast": "ok"}
+    assert calls == 2
+
+
+def test_flight_runs_under_its_own_deadline():
+    async def scenario():
+        cache = RoastCache(ttl=60, flight_deadline=30)
+        seen = []
+        gate = asyncio.Event()
+
+        async def generate():
+            seen.append(remaining())
+            await gate.wait()
+            return {"success": True, "roast": "r"}
+
+        async def impatient():
+            with deadline(0.01):
+                return await cache.get_or_generate("h", generate)
+
+        leader = asyncio.create_task(impatient())
+        follower = asyncio.create_task(cache.get_or_generate("h", generate))
+        with pytest.raises(DeadlineExceeded):
+            await leader
+        gate.set()
+        return seen, await follower
+
+    seen, result = asyncio.run(scenario())
+    assert len(seen) == 1 and 0.01 < seen[0] <= 30
+    assert result["roast"] == "r"
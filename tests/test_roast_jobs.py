@@ -0,0 +1,126 @@
+"""
+[INPUT]: 依赖 asyncio, pytest, app.bot.roast_jobs, app.db.crud, app.db.models
+[OUTPUT]: 网页端 roast 任务推文拼装、发推至多一次 (POSTING 重新认领不重发) 与每用户上限加锁的单元测试
+[POS]: tests 模块的 roast 任务测试 (不连数据库、不调用上游)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.bot import roast_jobs
+from app.bot.roast_jobs import build_roast_tweet
+from app.db import crud
+from app.db.models import RoastJobStatus
+
+
+def test_prefix_follows_history():
+    revenge = {"roast_count": 7, "revenge_context": {"revenge_mode": True, "attack_count": 2}}
+    assert build_roast_tweet("me", "you", "r", revenge).startswith("[复仇模式] @you 曾喷过你2次")
+    assert build_roast_tweet("me", "you", "r", {"roast_count": 5}).startswith("[老朋友警报] 第6次被喷")
+    assert build_roast_tweet("me", "you", "r", {"roast_count": 0}) == "我 @me 要喷你 @you：r"
+
+
+def test_tweet_is_truncated_to_280():
+    tweet = build_roast_tweet("me", "you", "x" * 400, {"roast_count": 0})
+    assert len(tweet) == 280 and tweet.endswith("...")
+
+
+# ============================================================
+#  发推至多一次 / 每用户上限
+# ============================================================
+
+class _XError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.response = SimpleNamespace(status_code=status_code, headers={})
+
+
+class _FakeTwitter:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.posted = []
+
+    async def post_tweet(self, text, priority=None, max_wait=None):
+        self.posted.append(text)
+        if self.error:
+            raise self.error
+        return {"tweet_id": "t1"}
+
+
+@pytest.fixture
+def job_writes(monkeypatch):
+    writes = []
+
+    @asynccontextmanager
+    async def fake_session(*args):
+        yield None
+
+    async def fake_update(session, job_id, **values):
+        writes.append(("update", values.get("status")))
+
+    async def fake_fail(session, job_id, error):
+        writes.append(("fail", error))
+
+    async def fake_complete(session, job, tweet_id, tweet_text):
+        writes.append(("complete", tweet_id))
+
+    monkeypatch.setattr(roast_jobs, "get_async_session", fake_session)
+    monkeypatch.setattr(roast_jobs, "update_roast_job", fake_update)
+    monkeypatch.setattr(roast_jobs, "fail_roast_job", fake_fail)
+    monkeypatch.setattr(roast_jobs, "complete_roast_job", fake_complete)
+    return writes
+
+
+def _job(status: RoastJobStatus) -> SimpleNamespace:
+    return SimpleNamespace(
+        id="j1", status=status, attempts=2, roast_text="ready", requester_username="me", target_handle="you"
+    )
+
+
+def test_job_reclaimed_while_posting_is_not_posted_again(job_writes):
+    twitter = _FakeTwitter()
+    runner = roast_jobs.RoastJobRunner(twitter)
+
+    asyncio.run(runner._run(_job(RoastJobStatus.POSTING)))
+    assert twitter.posted == []
+    assert [kind for kind, _ in job_writes] == ["fail"]
+
+
+def test_rejected_post_goes_back_to_queue_but_unknown_outcome_stays_posting(job_writes):
+    rejected = roast_jobs.RoastJobRunner(_FakeTwitter(_XError(403)))
+    asyncio.run(rejected._run(_job(RoastJobStatus.QUEUED)))
+    assert job_writes == [("update", RoastJobStatus.POSTING), ("update", RoastJobStatus.QUEUED)]
+
+    job_writes.clear()
+    unknown = roast_jobs.RoastJobRunner(_FakeTwitter(_XError(503)))
+    asyncio.run(unknown._run(_job(RoastJobStatus.QUEUED)))
+    assert job_writes == [("update", RoastJobStatus.POSTING)]
+
+
+class _CapSession:
+    """记录语句顺序；count 查询返回 active"""
+
+    def __init__(self, active: int):
+        self.active = active
+        self.log = []
+
+    async def execute(self, statement, params=None):
+        self.log.append(str(statement).split("(")[0])
+
+    async def scalar(self, statement):
+        self.log.append("count")
+        return self.active
+
+    async def rollback(self):
+        self.log.append("rollback")
+
+
+def test_roast_job_cap_is_checked_under_requester_lock():
+    session = _CapSession(active=3)
+    job = asyncio.run(crud.create_roast_job(session, "42", "alice", "bob", max_active=3))
+    assert job is None
+    assert session.log == ["SELECT pg_advisory_xact_lock", "count", "rollback"]
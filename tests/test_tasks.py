@@ -0,0 +1,62 @@
+"""
+[INPUT]: 依赖 asyncio, app.bot.tasks
+[OUTPUT]: TaskRegistry 排空逻辑的单元测试
+[POS]: tests 模块的在途任务登记表测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+
+from app.bot.tasks import TaskRegistry
+
+
+def test_drain_waits_for_fast_tasks_and_returns_slow_ones():
+    async def scenario():
+        registry = TaskRegistry()
+        cancelled = []
+
+        async def work(seconds: float, tweet_id: str):
+            try:
+                await asyncio.sleep(seconds)
+            except asyncio.CancelledError:
+                cancelled.append(tweet_id)
+                raise
+
+        registry.spawn({"tweet_id": "fast"}, work(0.01, "fast"))
+        registry.spawn({"tweet_id": "slow"}, work(10, "slow"))
+        assert len(registry) == 2
+
+        unfinished = await registry.drain(timeout=0.1)
+        return registry, unfinished, cancelled
+
+    registry, unfinished, cancelled = asyncio.run(scenario())
+    assert [m["tweet_id"] for m in unfinished] == ["slow"]
+    assert cancelled == ["slow"]
+    assert len(registry) == 0
+
+
+def test_spawn_rejected_after_drain():
+    async def scenario():
+        registry = TaskRegistry()
+        await registry.drain(timeout=0)
+
+        async def work():
+            return None
+
+        return registry.spawn({"tweet_id": "late"}, work())
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_wait_any_returns_after_first_task_finishes():
+    async def scenario():
+        registry = TaskRegistry()
+        registry.spawn({"tweet_id": "fast"}, asyncio.sleep(0.01))
+        slow = registry.spawn({"tweet_id": "slow"}, asyncio.sleep(10))
+
+        await asyncio.wait_for(registry.wait_any(), timeout=1)
+        ids = registry.tweet_ids()
+        slow.cancel()
+        return ids
+
+    assert asyncio.run(scenario()) == ["slow"]
@@ -0,0 +1,190 @@
+"""
+[INPUT]: 依赖 asyncio, time, pytest, app.services.x_scheduler
+[OUTPUT]: XWriteScheduler 的额度解析、发送时机、优先级、429 重新入队与排队超过最晚发送时间即失败的单元测试
+[POS]: tests 模块的 X 写调用调度测试 (不调用 Twitter)
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.x_scheduler import (
+    TWEETS_ENDPOINT,
+    WriteDelayed,
+    WritePriority,
+    XWriteScheduler,
+    parse_rate_windows,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, headers: dict | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class RateLimited(Exception):
+    def __init__(self, response: FakeResponse):
+        super().__init__("429 Too Many Requests")
+        self.response = response
+
+
+def _headers(limit: int, remaining: int, reset: float) -> dict:
+    return {
+        "x-rate-limit-limit": str(limit),
+        "x-rate-limit-remaining": str(remaining),
+        "x-rate-limit-reset": str(reset),
+    }
+
+
+def test_parse_rate_windows():
+    windows = parse_rate_windows({
+        **_headers(200, 150, 1000),
+        "X-User-Limit-24Hour-Limit": "2400",
+        "X-User-Limit-24Hour-Remaining": "10",
+        "X-User-Limit-24Hour-Reset": "5000",
+        "x-app-limit-24hour-limit": "oops",
+    })
+    assert set(windows) == {"x-rate-limit", "x-user-limit-24hour"}
+    assert windows["x-user-limit-24hour"].remaining == 10
+
+
+def test_send_delay_follows_remaining_budget():
+    now = 1000.0
+    scheduler = XWriteScheduler(pace_below=0.25, reserve_ratio=0.1, clock=lambda: now)
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.REPLY) == 0
+
+    scheduler.observe(TWEETS_ENDPOINT, _headers(100, 80, now + 600))
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.REPLY) == 0
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.REPLY, ahead=80) == 600
+
+    # ---- 低于水位: 按剩余时间均匀配速 ----
+    scheduler.observe(TWEETS_ENDPOINT, _headers(100, 20, now + 600))
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.REPLY) == 0
+    scheduler._consume(TWEETS_ENDPOINT)
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.REPLY) == pytest.approx(600 / 19)
+
+    # ---- 预留额度只对 BACKGROUND 生效 ----
+    scheduler.observe(TWEETS_ENDPOINT, _headers(100, 10, now + 600))
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.BACKGROUND) == 600
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.INTERACTIVE) < 600
+
+
+def test_window_refills_after_reset():
+    clock = [1000.0]
+    scheduler = XWriteScheduler(clock=lambda: clock[0])
+    scheduler.observe(TWEETS_ENDPOINT, _headers(100, 0, 1060))
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.REPLY) == 60
+    clock[0] = 1061
+    assert scheduler.send_delay(TWEETS_ENDPOINT, WritePriority.REPLY) == 0
+
+
+def test_sends_in_priority_order():
+    async def scenario():
+        scheduler = XWriteScheduler(concurrency=1)
+        order = []
+
+        def call(name):
+            def send():
+                order.append(name)
+                return FakeResponse()
+            return send
+
+        await asyncio.gather(
+            scheduler.submit(TWEETS_ENDPOINT, call("background"), WritePriority.BACKGROUND),
+            scheduler.submit(TWEETS_ENDPOINT, call("reply"), WritePriority.REPLY),
+            scheduler.submit(TWEETS_ENDPOINT, call("interactive"), WritePriority.INTERACTIVE),
+        )
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "reply", "background"]
+
+
+def test_rate_limited_write_is_requeued_until_reset():
+    async def scenario():
+        scheduler = XWriteScheduler()
+        attempts = []
+
+        def send():
+            attempts.append(time.time())
+            if len(attempts) == 1:
+                raise RateLimited(FakeResponse(429, _headers(100, 0, time.time() + 0.2)))
+            return FakeResponse(200, _headers(100, 99, time.time() + 900))
+
+        response = await scheduler.submit(TWEETS_ENDPOINT, send)
+        return response, attempts, scheduler
+
+    response, attempts, scheduler = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert len(attempts) == 2 and attempts[1] - attempts[0] >= 0.15
+    assert scheduler.rate_limited == 1 and scheduler.sent == 1
+
+
+def test_max_wait_fails_fast():
+    async def scenario():
+        scheduler = XWriteScheduler()
+        scheduler.observe(TWEETS_ENDPOINT, _headers(100, 0, time.time() + 300))
+        await scheduler.submit(TWEETS_ENDPOINT, FakeResponse, max_wait=10)
+
+    with pytest.raises(WriteDelayed) as excinfo:
+        asyncio.run(scenario())
+    assert excinfo.value.delay > 10
+
+
+def test_queued_write_past_its_deadline_is_failed_not_sent():
+    """入队时预估来得及，但 429 重排后要等到重置之后: 过了最晚发送时间就失败，不再发送"""
+    async def scenario():
+        scheduler = XWriteScheduler()
+        attempts = []
+
+        def send():
+            attempts.append(time.time())
+            raise RateLimited(FakeResponse(429, _headers(100, 0, time.time() + 5)))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(WriteDelayed):
+            await scheduler.submit(TWEETS_ENDPOINT, send, max_wait=0.1)
+        return attempts, loop.time() - started, scheduler
+
+    attempts, elapsed, scheduler = asyncio.run(scenario())
+    assert len(attempts) == 1
+    assert elapsed < 1
+    assert scheduler.delayed == 1 and scheduler.sent == 0
+    assert scheduler.stats()["queued"]["reply"] == 0
+
+
+def test_later_interactive_writes_cannot_push_a_reply_past_its_deadline():
+    async def scenario():
+        scheduler = XWriteScheduler(concurrency=1)
+        sent = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            def send():
+                sent.append("interactive")
+                return FakeResponse()
+            await gate.wait()
+            return await scheduler.submit(TWEETS_ENDPOINT, send, WritePriority.INTERACTIVE)
+
+        def slow():
+            time.sleep(0.2)
+            sent.append("slow")
+            return FakeResponse()
+
+        def reply():
+            sent.append("reply")
+            return FakeResponse()
+
+        first = asyncio.create_task(scheduler.submit(TWEETS_ENDPOINT, slow, WritePriority.INTERACTIVE))
+        await asyncio.sleep(0.01)
+        late = asyncio.create_task(scheduler.submit(TWEETS_ENDPOINT, reply, max_wait=0.1))
+        gate.set()
+        await asyncio.gather(first, blocker())
+        with pytest.raises(WriteDelayed):
+            await late
+        return sent
+
+    assert asyncio.run(scenario()) == ["slow", "interactive"]